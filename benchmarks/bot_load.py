@@ -0,0 +1,189 @@
+"""Load test of the bot's real handlers against the offline simulator.
+
+Run from the repository root (needs discord.py installed, but no token):
+
+    python -m benchmarks.bot_load
+
+Each scenario loads a fresh copy of the bot, set up like the English or
+the Polish community, fires a synthetic event stream at it as fast as the
+event loop takes it and waits until every handler, queue and scheduled REST
+call has finished. Reported are events per second over that whole run,
+p50/p99 handler latency and REST calls per event. 429s are injected only in
+the auto-reaction scenario (the Polish setup has auto-reactions off, so it
+makes no calls there). The raid queues' rates are raised so a join flood
+measures the bot, not the token bucket, and auto-reactions are shed after
+2 s of backlog instead of 10 so that scenario ends quickly.
+"""
+import asyncio
+import contextlib
+import io
+import random
+import re
+import tempfile
+import time
+
+from benchmarks.simulator import FakeChannel, FakeInteraction, FakeRest, Simulation, snowflake
+
+SEED = 1234
+CHALLENGE = re.compile(r"(\d+) ([+-]) (\d+)\?")
+OVERRIDES = {"raid_dm_rate": 100_000, "raid_kick_rate": 100_000, "raid_queue_size": 100_000,
+             "auto_reaction_max_delay": 2}
+# Guild settings of the two communities the bot serves.
+COMMUNITIES = {
+    "en": {},
+    "pl": {"locale": "pl", "link_filter": "invites", "auto_reactions": False},
+}
+# How long a joining member takes to answer the challenge; part of the join handler's latency.
+ANSWER_DELAY = 0.01
+# Pause after this many events so handlers interleave with the stream, like a socket read would.
+BURST = 50
+
+
+async def stream(events):
+    for i, (dispatch, args) in enumerate(events):
+        dispatch(*args)
+        if i % BURST == BURST - 1:
+            await asyncio.sleep(0)
+
+
+def join_flood(sim, rng, joins=500):
+    """Members join at once and answer the DM challenge; one in ten gets it wrong."""
+    def answer(member, text):
+        match = CHALLENGE.search(text or "")
+        if match is None:
+            return
+        a, op, b = int(match.group(1)), match.group(2), int(match.group(3))
+        result = a + b if op == "+" else a - b
+        if rng.random() < 0.1:
+            result += 1
+        asyncio.get_running_loop().call_later(ANSWER_DELAY, sim.gateway.dispatch, "message", sim.dm(member, str(result)))
+
+    events = []
+    for i in range(joins):
+        member = sim.guild.add_member(f"joiner{i}")
+        member.on_dm = answer
+        events.append((sim.gateway.dispatch, ("member_join", member)))
+    return events
+
+
+def link_spam(sim, rng, messages=3000, authors=40):
+    """Chat in a normal channel where a third of the messages carry an invite link."""
+    members = [sim.guild.add_member(f"spammer{i}") for i in range(authors)]
+    events = []
+    for i in range(messages):
+        content = f"join us discord.gg/raid{i % 7}" if rng.random() < 0.33 else f"just chatting, message {i}"
+        message = sim.message(sim.guild.general, rng.choice(members), content)
+        events.append((sim.gateway.dispatch, ("message", message)))
+    return events
+
+
+def reaction_storm(sim, rng, reactions=10_000, posts=300, reactors=200):
+    """Reactions coming and going on tracked posts, a fifth of them on the role panel."""
+    members = [sim.guild.add_member(f"reactor{i}") for i in range(reactors)]
+    tracked = [sim.message(sim.guild.target_channel, members[0], f"post {i}") for i in range(posts)]
+    panel_emoji = list(sim.module.settings.current.emoji_to_role)
+    events = []
+    for _ in range(reactions):
+        member = rng.choice(members)
+        if rng.random() < 0.2:
+            payload = sim.reaction(sim.guild.role_message, member, rng.choice(panel_emoji))
+        else:
+            payload = sim.reaction(rng.choice(tracked), member, rng.choice(("👍", "👎")))
+        event = "raw_reaction_add" if rng.random() < 0.7 else "raw_reaction_remove"
+        events.append((sim.gateway.dispatch, (event, payload)))
+    return events
+
+
+def role_toggles(sim, rng, members=300, toggles=3000):
+    """Members right after the role panel is posted, adding and taking back emojis in quick succession."""
+    reactors = [sim.guild.add_member(f"picker{i}") for i in range(members)]
+    panel_emoji = list(sim.module.settings.current.emoji_to_role)
+    held = set()
+    events = []
+    for _ in range(toggles):
+        member = rng.choice(reactors)
+        emoji = rng.choice(panel_emoji)
+        if (member.id, emoji) in held:
+            held.discard((member.id, emoji))
+            event = "raw_reaction_remove"
+        else:
+            held.add((member.id, emoji))
+            event = "raw_reaction_add"
+        events.append((sim.gateway.dispatch, (event, sim.reaction(sim.guild.role_message, member, emoji))))
+    return events
+
+
+def ticket_burst(sim, rng, clicks=400, users=300):
+    """Many users pressing the ticket button, some of them twice."""
+    members = [sim.guild.add_member(f"customer{i}") for i in range(users)]
+    button = sim.module.TicketButton().create_ticket
+    return [(sim.gateway.click, (button, FakeInteraction(sim.rest, rng.choice(members), sim.guild)))
+            for _ in range(clicks)]
+
+
+def auto_reactions(sim, rng, messages=500, authors=40, threads=4):
+    """Chat in the auto-reaction channel and its threads, where Discord allows few reactions per channel."""
+    members = [sim.guild.add_member(f"poster{i}") for i in range(authors)]
+    target = sim.guild.target_channel
+    channels = [target] + [FakeChannel(sim.rest, snowflake(), sim.guild, f"thread{i}", parent_id=target.id)
+                           for i in range(threads)]
+    return [(sim.gateway.dispatch, ("message", sim.message(rng.choice(channels), rng.choice(members), f"meme {i}")))
+            for i in range(messages)]
+
+
+# name -> (build events, REST rate limits as route -> (calls, per seconds))
+SCENARIOS = {
+    "join flood": (join_flood, None),
+    "link spam": (link_spam, None),
+    "reaction storm": (reaction_storm, None),
+    "role toggles": (role_toggles, None),
+    "ticket burst": (ticket_burst, None),
+    # Discord's reaction limit is per channel, about one call every 0.25 s.
+    "auto-reactions, 429s": (auto_reactions, {"add_reaction": (1, 0.25), "clear_reactions": (1, 0.25)}),
+}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+async def run(community, build, limits):
+    with tempfile.TemporaryDirectory() as workdir:
+        sim = Simulation(workdir, FakeRest(limits=limits), **OVERRIDES, **community)
+        try:
+            events = build(sim, random.Random(SEED))
+            # The handlers print per action; keep the report readable.
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                await stream(events)
+                await sim.settle()
+                elapsed = time.perf_counter() - start
+        finally:
+            sim.close()
+    latencies = sorted(sim.gateway.latencies)
+    return {
+        "events": sim.gateway.events,
+        "rate": sim.gateway.events / elapsed,
+        "p50": percentile(latencies, 0.5) * 1000,
+        "p99": percentile(latencies, 0.99) * 1000,
+        "rest": sim.rest.total,
+        "rate_limited": sum(sim.rest.rate_limited.values()),
+        "errors": sim.gateway.errors,
+    }
+
+
+def main():
+    print(f"{'bot':>3} | {'scenario':<20} | {'events':>6} | {'events/s':>9} | {'p50 ms':>7} | {'p99 ms':>8} | "
+          f"{'REST':>6} | {'REST/event':>10} | {'429s':>5} | {'errors':>6}")
+    for bot, community in COMMUNITIES.items():
+        for name, (build, limits) in SCENARIOS.items():
+            r = asyncio.run(run(community, build, limits))
+            print(f"{bot:>3} | {name:<20} | {r['events']:>6} | {r['rate']:>9,.0f} | {r['p50']:>7.2f} | "
+                  f"{r['p99']:>8.2f} | {r['rest']:>6} | {r['rest'] / r['events']:>10.2f} | "
+                  f"{r['rate_limited']:>5} | {r['errors']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Both communities in one bot process versus one process per community.
+
+Run from the repository root (needs discord.py installed, but no token):
+
+    python -m benchmarks.communities
+
+Each setup runs in fresh processes: the English and the Polish community
+alone (the way the two bots used to run side by side), and both served by
+one process, with the Polish guild set to ``locale: "pl"``. Every process
+gets the same mixed stream per guild as ``benchmarks.multi_guild``.
+Reported are the time to load the bot, peak RSS, events/s and the gateway
+sessions the setup needs.
+"""
+import asyncio
+import contextlib
+import io
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bot_load import COMMUNITIES
+from benchmarks.multi_guild import mixed_stream, peak_rss_mb
+from benchmarks.simulator import Simulation
+
+EVENTS_PER_GUILD = 10_000
+SEED = 1234
+
+
+async def measure(setup):
+    if setup == "both":
+        overrides = {"guilds": 2, "guild_overrides": COMMUNITIES["pl"]}
+    else:
+        overrides = dict(COMMUNITIES[setup])
+    with tempfile.TemporaryDirectory() as workdir:
+        start = time.perf_counter()
+        sim = Simulation(workdir, raid_join_threshold=1_000_000, **overrides)
+        load = time.perf_counter() - start
+        try:
+            stream = mixed_stream(sim, random.Random(SEED), EVENTS_PER_GUILD * len(sim.guilds))
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                for i, (event, arg) in enumerate(stream):
+                    sim.gateway.dispatch(event, arg)
+                    if i % 50 == 49:
+                        await asyncio.sleep(0)
+                await sim.settle()
+                elapsed = time.perf_counter() - start
+        finally:
+            sim.close()
+    return {"load": load, "rss": peak_rss_mb(), "rate": sim.gateway.events / elapsed, "errors": sim.gateway.errors}
+
+
+def run(setup):
+    output = subprocess.run([sys.executable, "-m", "benchmarks.communities", setup],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    print(f"{'setup':<24} | {'load s':>6} | {'peak RSS MB':>11} | {'events/s':>9} | {'gateway sessions':>16} | {'errors':>6}")
+    en, pl, both = run("en"), run("pl"), run("both")
+    rows = [
+        ("en alone", en, 1),
+        ("pl alone", pl, 1),
+        ("en + pl, two processes", {"load": en["load"] + pl["load"], "rss": en["rss"] + pl["rss"], "rate": None,
+                                    "errors": en["errors"] + pl["errors"]}, 2),
+        ("en + pl, one process", both, 1),
+    ]
+    for name, r, sessions in rows:
+        rate = "-" if r["rate"] is None else f"{r['rate']:,.0f}"
+        print(f"{name:<24} | {r['load']:>6.2f} | {r['rss']:>11.1f} | {rate:>9} | {sessions:>16} | {r['errors']:>6}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        print(json.dumps(asyncio.run(measure(sys.argv[1]))))
+    else:
+        main()
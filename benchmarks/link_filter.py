@@ -0,0 +1,80 @@
+"""Per-message cost of the link filter over a corpus of chat messages.
+
+Run from the repository root:
+
+    python -m benchmarks.link_filter
+"""
+import random
+import timeit
+
+from filar.links import LinkClassifier
+
+CHAT = [
+    "hey everyone, anyone up for a game tonight?",
+    "lol that was insane",
+    "gg wp",
+    "Cześć, co tam? Widziałeś wczorajszy mecz?",
+    "I think the update broke something, my inventory is empty again...",
+    "can a mod check #support pls",
+    "ok",
+    "what time is the event? 8pm CET or 9pm?",
+    "Ten build jest lepszy, sprawdź statystyki na 3.5 patchu",
+    "honestly the new map is way better than the old one, especially the north side with the bridges",
+    "brb",
+    "e.g. use the fire role if you want pings for events",
+    "my script is in main.py and config.json btw",
+    "did you try restarting it?",
+    "XD",
+    "jutro o 18:00 gramy, kto wbija?",
+]
+LINKS = [
+    "check this https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://tenor.com/view/cat-dance-gif-123456",
+    "found it on example.com/guides/beginner",
+    "JOIN MY SERVER discord.gg/freenitro",
+    "free nitro hxxps://discord[.]gg/scam",
+    "https://discord.com/invite/abcdef come hang out",
+    "see https://github.com/Ribengame/filar-bot for the code",
+    "discord . gg / spaced",
+]
+ALLOW = ["youtube.com", "tenor.com", "github.com"]
+DENY = ["grabify.link", "iplogger.org"]
+
+
+def make_corpus(size=10_000, link_ratio=0.05, seed=1):
+    rng = random.Random(seed)
+    return [rng.choice(LINKS) if rng.random() < link_ratio else rng.choice(CHAT) for _ in range(size)]
+
+
+def old_filter(content):
+    # What both bots did before: scheme check in bot.py, lowercase + invite check in Translate/bot.py.
+    if "http://" in content or "https://" in content:
+        return True
+    lowered = content.lower()
+    return "discord.gg/" in lowered or "discord.com/invite/" in lowered
+
+
+def run():
+    corpus = make_corpus()
+    classifier = LinkClassifier(allow_domains=ALLOW, deny_domains=DENY)
+
+    def old():
+        for content in corpus:
+            old_filter(content)
+
+    def new():
+        for content in corpus:
+            classifier.classify(content)
+
+    old_time = min(timeit.repeat(old, number=5, repeat=3)) / 5 / len(corpus)
+    new_time = min(timeit.repeat(new, number=5, repeat=3)) / 5 / len(corpus)
+    flagged_old = sum(old_filter(c) for c in corpus)
+    flagged_new = sum(classifier.classify(c) is not None for c in corpus)
+
+    print(f"corpus: {len(corpus)} messages")
+    print(f"substring checks : {old_time * 1e9:8.0f} ns/msg, {flagged_old} flagged")
+    print(f"LinkClassifier   : {new_time * 1e9:8.0f} ns/msg, {flagged_new} flagged")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,140 @@
+"""Time to ready and memory with the full and the lean member cache.
+
+Run from the repository root (needs discord.py installed, but no token):
+
+    python -m benchmarks.member_cache
+
+Each run is a fresh process that loads the bot with ``member_cache`` set
+to ``full`` or ``lean`` and feeds discord.py's own connection state what
+the gateway sends on connect: READY, a GUILD_CREATE for a large guild of
+10k or 100k members, and, when the bot asks for them, the member chunks (1000
+members each, decoded from JSON like gateway frames). The chunks are
+generated before the clock starts, so both modes carry them in memory and
+the reported RSS growth is what the member cache itself costs. Network
+time isn't simulated: a real gateway adds its own delay per chunk.
+"""
+import asyncio
+import json
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.simulator import load_bot
+
+SIZES = (10_000, 100_000)
+MODES = ("full", "lean")
+CHUNK = 1000
+GUILD_ID = 123456789012345678
+BOT_ID = 900000000000000000
+# discord.py waits this long after the last GUILD_CREATE before it is ready (2 s by default).
+GUILD_READY_TIMEOUT = 0.05
+
+
+def rss_mb():
+    with open("/proc/self/status", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def member_payload(user_id):
+    return {
+        "user": {"id": str(user_id), "username": f"member{user_id % 1_000_000}", "discriminator": "0",
+                 "global_name": None, "avatar": None},
+        "roles": [], "joined_at": "2024-01-01T00:00:00+00:00",
+        "deaf": False, "mute": False, "flags": 0,
+    }
+
+
+def guild_create(member_count):
+    return {
+        "id": str(GUILD_ID), "name": "Large guild", "member_count": member_count, "large": True,
+        "unavailable": False, "owner_id": str(BOT_ID), "features": [], "emojis": [], "stickers": [],
+        "roles": [{"id": str(GUILD_ID), "name": "@everyone", "permissions": "0", "position": 0, "color": 0,
+                   "hoist": False, "managed": False, "mentionable": False}],
+        "channels": [], "threads": [], "voice_states": [], "presences": [],
+        "members": [member_payload(BOT_ID)],
+    }
+
+
+class FakeShardSocket:
+    """Answers ``request_chunks`` with pre-encoded GUILD_MEMBERS_CHUNK frames."""
+
+    def __init__(self, state, frames):
+        self.state = state
+        self.frames = frames
+        self.requests = 0
+
+    async def request_chunks(self, guild_id, query=None, *, limit, user_ids=None, presences=False, nonce=None):
+        self.requests += 1
+        asyncio.create_task(self._send(nonce))
+
+    async def _send(self, nonce):
+        for index, frame in enumerate(self.frames):
+            data = json.loads(frame)
+            data.update(chunk_index=index, chunk_count=len(self.frames), nonce=nonce)
+            self.state.parse_guild_members_chunk(data)
+            await asyncio.sleep(0)
+
+
+async def measure(mode, member_count):
+    with tempfile.TemporaryDirectory() as workdir:
+        module = load_bot(workdir, guild_id=GUILD_ID, member_cache=mode)
+        bot = module.bot
+        state = bot._connection
+        frames = [
+            json.dumps({"guild_id": str(GUILD_ID),
+                        "members": [member_payload(BOT_ID + 1 + i) for i in range(start, min(start + CHUNK, member_count))]})
+            for start in range(0, member_count, CHUNK)
+        ]
+        ws = FakeShardSocket(state, frames)
+        bot.loop = state.loop = asyncio.get_running_loop()
+        state.shard_ids = [0]
+        state.guild_ready_timeout = GUILD_READY_TIMEOUT
+        state._get_websocket = lambda guild_id=None, *, shard_id=None: ws
+        ready = asyncio.Event()
+        # Only the time to ready is measured, not the bot's own on_ready work.
+        bot.on_ready = ready.wait
+        state.call_handlers = lambda key, *args: ready.set() if key == "ready" else None
+
+        before = rss_mb()
+        start = time.perf_counter()
+        state.parse_ready({
+            "user": member_payload(BOT_ID)["user"] | {"bot": True},
+            "guilds": [{"id": str(GUILD_ID), "unavailable": True}],
+            "shard": [0, 1], "session_id": "simulated", "resume_gateway_url": "wss://localhost",
+        })
+        state.parse_guild_create(guild_create(member_count))
+        await ready.wait()
+        elapsed = time.perf_counter() - start
+        guild = bot.get_guild(GUILD_ID)
+        return {
+            "ready": elapsed, "rss": rss_mb(), "growth": rss_mb() - before,
+            "cached": len(guild.members), "chunk_requests": ws.requests,
+        }
+
+
+def run(mode, member_count):
+    output = subprocess.run([sys.executable, "-m", "benchmarks.member_cache", mode, str(member_count)],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    print(f"{'members':>8} | {'mode':<4} | {'ready s':>7} | {'RSS MB':>7} | {'RSS growth MB':>13} | "
+          f"{'cached members':>14} | {'chunk requests':>14}")
+    for member_count in SIZES:
+        for mode in MODES:
+            r = run(mode, member_count)
+            print(f"{member_count:>8,} | {mode:<4} | {r['ready']:>7.2f} | {r['rss']:>7.1f} | {r['growth']:>13.1f} | "
+                  f"{r['cached']:>14,} | {r['chunk_requests']:>14}")
+    print(f"(ready includes discord.py's {GUILD_READY_TIMEOUT} s wait after the last GUILD_CREATE)")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        print(json.dumps(asyncio.run(measure(sys.argv[1], int(sys.argv[2])))))
+    else:
+        main()
@@ -0,0 +1,93 @@
+"""Command latency while on_message moderates and auto-reacts, with per-stage timings.
+
+Run from the repository root (needs discord.py installed, but no token):
+
+    python -m benchmarks.message_pipeline
+
+Members chat in the target channel (so every message gets the 👍/👎
+auto-reactions) while some post invite links and some use ``!reactions``.
+Every REST call takes ``REST_LATENCY`` seconds. Reported are on_message
+latency, the time from a command arriving to the bot starting to process
+it, and how long each stage of the message pipeline took: classification
+and commands in the handler, link removal (coalesced bulk delete and
+warning) in the background.
+"""
+import asyncio
+import contextlib
+import io
+import random
+import tempfile
+import time
+from collections import defaultdict
+
+from benchmarks.bot_load import percentile, stream
+from benchmarks.simulator import FakeRest, Simulation
+
+MESSAGES = 3000
+REST_LATENCY = 0.05
+SEED = 1234
+
+
+def ms(values, fraction):
+    return percentile(sorted(values), fraction) * 1000
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as workdir:
+        sim = Simulation(workdir, FakeRest(latency=REST_LATENCY))
+        try:
+            channel = sim.guild.target_channel
+            members = [sim.guild.add_member(f"member{i}") for i in range(50)]
+            rng = random.Random(SEED)
+
+            arrived = {}
+            to_commands = []
+            process_commands = sim.bot.process_commands
+
+            async def timed_process_commands(message):
+                if message.id in arrived:
+                    to_commands.append(time.perf_counter() - arrived.pop(message.id))
+                return await process_commands(message)
+
+            sim.bot.process_commands = timed_process_commands
+
+            def command(message):
+                arrived[message.id] = time.perf_counter()
+                sim.gateway.dispatch("message", message)
+
+            stages = defaultdict(list)
+            observer = sim.module.message_tasks.observer
+
+            def observe(stage, seconds, error):
+                stages[stage].append(seconds)
+                observer(stage, seconds, error)
+
+            sim.module.message_tasks.observer = observe
+
+            events = []
+            for i in range(MESSAGES):
+                roll = rng.random()
+                if roll < 0.1:
+                    events.append((command, (sim.message(channel, rng.choice(members), "!reactions 1h"),)))
+                    continue
+                content = f"come to discord.gg/raid{i % 7}" if roll < 0.3 else f"just chatting, message {i}"
+                events.append((sim.gateway.dispatch, ("message", sim.message(channel, rng.choice(members), content))))
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                await stream(events)
+                await sim.settle()
+        finally:
+            sim.close()
+
+    handler = sim.gateway.latencies
+    print(f"{'':<20} | {'count':>6} | {'p50 ms':>8} | {'p99 ms':>8}")
+    print(f"{'on_message':<20} | {len(handler):>6} | {ms(handler, 0.5):>8.2f} | {ms(handler, 0.99):>8.2f}")
+    print(f"{'command dispatched':<20} | {len(to_commands):>6} | {ms(to_commands, 0.5):>8.2f} | "
+          f"{ms(to_commands, 0.99):>8.2f}")
+    for stage, values in stages.items():
+        print(f"{'stage ' + stage:<20} | {len(values):>6} | {ms(values, 0.5):>8.2f} | {ms(values, 0.99):>8.2f}")
+    print(f"REST calls: {sim.rest.total}, handler errors: {sim.gateway.errors}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
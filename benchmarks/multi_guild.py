@@ -0,0 +1,120 @@
+"""Memory and event throughput of one bot process serving 1, 10 and 100 guilds.
+
+Run from the repository root (needs discord.py installed, but no token):
+
+    python -m benchmarks.multi_guild
+
+Each size runs in a fresh process. It loads the bot against that
+many simulated guilds and pushes the same mixed stream through it: chat,
+invite links, reactions on tracked posts and the role panel, and joins
+answering the challenge. The stream is spread evenly over the guilds.
+Reported are the process's peak RSS, events/s and p50/p99 handler latency,
+next to what one process per guild would need in memory.
+"""
+import asyncio
+import contextlib
+import io
+import json
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.simulator import Simulation
+
+SIZES = (1, 10, 100)
+EVENTS = 20_000
+SEED = 1234
+CHALLENGE = re.compile(r"(\d+) ([+-]) (\d+)\?")
+
+
+def peak_rss_mb():
+    with open("/proc/self/status", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def mixed_stream(sim, rng, events):
+    def answer(member, text):
+        match = CHALLENGE.search(text or "")
+        if match:
+            a, op, b = int(match.group(1)), match.group(2), int(match.group(3))
+            reply = sim.dm(member, str(a + b if op == "+" else a - b))
+            asyncio.get_running_loop().call_later(0.01, sim.gateway.dispatch, "message", reply)
+
+    per_guild = []
+    for guild in sim.guilds:
+        members = [guild.add_member(f"member{i}") for i in range(50)]
+        posts = [sim.message(guild.target_channel, members[0], f"post {i}") for i in range(20)]
+        per_guild.append((guild, members, posts))
+
+    stream = []
+    for i in range(events):
+        guild, members, posts = per_guild[i % len(per_guild)]
+        roll = rng.random()
+        if roll < 0.5:
+            content = "join discord.gg/spam" if roll < 0.05 else f"hello {i}"
+            stream.append(("message", sim.message(guild.general, rng.choice(members), content)))
+        elif roll < 0.95:
+            if roll < 0.6:
+                emoji = rng.choice(list(sim.module.settings.current.guild(guild.id).emoji_to_role))
+                target = guild.role_message
+            else:
+                emoji, target = rng.choice(("👍", "👎")), rng.choice(posts)
+            event = "raw_reaction_add" if rng.random() < 0.7 else "raw_reaction_remove"
+            stream.append((event, sim.reaction(target, rng.choice(members), emoji)))
+        else:
+            member = guild.add_member(f"joiner{i}")
+            member.on_dm = answer
+            stream.append(("member_join", member))
+    return stream
+
+
+async def measure(guilds):
+    with tempfile.TemporaryDirectory() as workdir:
+        # Raid mode would only add token-bucket waits on top of the handlers.
+        sim = Simulation(workdir, guilds=guilds, raid_join_threshold=1_000_000)
+        try:
+            stream = mixed_stream(sim, random.Random(SEED), EVENTS)
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                for i, (event, arg) in enumerate(stream):
+                    sim.gateway.dispatch(event, arg)
+                    if i % 50 == 49:
+                        await asyncio.sleep(0)
+                await sim.settle()
+                elapsed = time.perf_counter() - start
+        finally:
+            sim.close()
+    latencies = sorted(sim.gateway.latencies)
+    return {
+        "rss": peak_rss_mb(),
+        "rate": sim.gateway.events / elapsed,
+        "p50": latencies[len(latencies) // 2] * 1000,
+        "p99": latencies[int(len(latencies) * 0.99)] * 1000,
+        "errors": sim.gateway.errors,
+    }
+
+
+def main():
+    print(f"{'guilds':>6} | {'peak RSS MB':>11} | {'1 process/guild MB':>18} | {'events/s':>9} | "
+          f"{'p50 ms':>7} | {'p99 ms':>7} | {'errors':>6}")
+    single = None
+    for guilds in SIZES:
+        output = subprocess.run([sys.executable, "-m", "benchmarks.multi_guild", str(guilds)],
+                                capture_output=True, text=True, check=True).stdout
+        r = json.loads(output.strip().splitlines()[-1])
+        single = single or r["rss"]
+        print(f"{guilds:>6} | {r['rss']:>11.1f} | {single * guilds:>18.1f} | {r['rate']:>9,.0f} | "
+              f"{r['p50']:>7.2f} | {r['p99']:>7.2f} | {r['errors']:>6}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        print(json.dumps(asyncio.run(measure(int(sys.argv[1])))))
+    else:
+        main()
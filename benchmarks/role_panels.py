@@ -0,0 +1,97 @@
+"""Reaction handling with many role panels in one guild.
+
+Run from the repository root (needs discord.py installed, but no token):
+
+    python -m benchmarks.role_panels
+
+For 1, 10 and 50 panels of five roles each it pushes the same stream
+through ``on_raw_reaction_add``/``remove``: mostly reactions on ordinary
+posts, some on a panel with an emoji it doesn't map, the rest real role
+picks. Reported are µs per event, how often the guild and member caches
+were consulted (member lookups include the role coalescer's own when it
+applies a batch) and the role edits that went out.
+"""
+import asyncio
+import contextlib
+import io
+import random
+import tempfile
+import time
+
+from benchmarks.simulator import Simulation, snowflake
+
+PANEL_COUNTS = (1, 10, 50)
+EMOJIS = ("🔥", "💧", "🌿", "⚡", "❄️")
+EVENTS = 50_000
+MEMBERS = 500
+SEED = 1234
+
+
+def panel_settings(count):
+    return {
+        f"panel_{i}": {"channel_id": snowflake(), "emoji_to_role": {emoji: snowflake() for emoji in EMOJIS}}
+        for i in range(count)
+    }
+
+
+async def measure(panel_count):
+    with tempfile.TemporaryDirectory() as workdir:
+        sim = Simulation(workdir, role_panels=panel_settings(panel_count))
+        try:
+            guild = sim.guild
+            members = [guild.add_member(f"member{i}") for i in range(MEMBERS)]
+            posts = [sim.message(guild.general, members[0], "post") for _ in range(200)]
+            panels = list(guild.role_panels.values())
+            rng = random.Random(SEED)
+            stream = []
+            for _ in range(EVENTS):
+                roll = rng.random()
+                if roll < 0.9:
+                    message, emoji = rng.choice(posts), rng.choice(EMOJIS)
+                elif roll < 0.95:
+                    message, emoji = rng.choice(panels), "👀"
+                else:
+                    message, emoji = rng.choice(panels), rng.choice(EMOJIS)
+                event = rng.choice(("raw_reaction_add", "raw_reaction_remove"))
+                stream.append((event, sim.reaction(message, rng.choice(members), emoji)))
+
+            lookups = {"get_guild": 0, "get_member": 0}
+            get_guild, get_member = sim.bot.get_guild, guild.get_member
+
+            def counted_get_guild(guild_id):
+                lookups["get_guild"] += 1
+                return get_guild(guild_id)
+
+            def counted_get_member(member_id):
+                lookups["get_member"] += 1
+                return get_member(member_id)
+
+            sim.bot.get_guild, guild.get_member = counted_get_guild, counted_get_member
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                for i, (event, payload) in enumerate(stream):
+                    sim.gateway.dispatch(event, payload)
+                    if i % 50 == 49:
+                        await asyncio.sleep(0)
+                elapsed = time.perf_counter() - start
+                await sim.settle()
+        finally:
+            sim.close()
+    return {
+        "us": elapsed / EVENTS * 1e6,
+        "lookups": lookups,
+        "edits": sim.rest.calls["edit_member"],
+        "errors": sim.gateway.errors,
+    }
+
+
+def main():
+    print(f"{'panels':>6} | {'µs/event':>8} | {'get_guild':>9} | {'get_member':>10} | {'role edits':>10} | {'errors':>6}")
+    for count in PANEL_COUNTS:
+        r = asyncio.run(measure(count))
+        print(f"{count:>6} | {r['us']:>8.2f} | {r['lookups']['get_guild']:>9} | {r['lookups']['get_member']:>10} | "
+              f"{r['edits']:>10} | {r['errors']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,472 @@
+"""Offline stand-in for the Discord gateway and REST API that drives the bot's real handlers.
+
+``Simulation`` imports ``bot.py`` against a throwaway config and state file and attaches it to a ``FakeGuild``. The
+guild's members, channels, roles and messages provide just the attributes
+and methods the handlers use. Their REST methods go through a ``FakeRest``,
+which records each call under discord.py's method name. It adds a fixed
+latency and can answer with 429s the way discord.py handles them: a warning
+on the ``discord.http`` logger, then a sleep until the bucket resets.
+``Gateway`` runs every event in its own task, as discord.py does, and times
+each handler.
+
+Prefix commands are parsed by discord.py as usual, but the built-in streams
+don't invoke any: their replies go through discord.py's own HTTP client,
+which isn't faked.
+"""
+import asyncio
+import importlib.util
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from filar.outbound import LANE_NAMES
+from filar.reactions import DISCORD_EPOCH_MS
+
+BOT = "bot.py"
+
+_http_log = logging.getLogger("discord.http")
+_sequence = itertools.count()
+
+
+def snowflake():
+    """A fresh id that reads as created now, like the ones Discord hands out."""
+    return ((int(time.time() * 1000) - DISCORD_EPOCH_MS) << 22) | (next(_sequence) & 0x3FFFFF)
+
+
+class FakeRest:
+    """Records REST calls by route, with optional latency and per-route rate limits.
+
+    ``route_latency`` overrides ``latency`` for single routes. ``limits`` maps
+    a route to ``(calls, per_seconds)``; calls beyond that in a window get a
+    429 and retry when the window resets. Calls made with a ``bucket`` (e.g.
+    the channel, for reactions) are limited per bucket, the way Discord
+    limits routes per channel.
+    """
+
+    def __init__(self, latency=0.0, limits=None, route_latency=None):
+        self.latency = latency
+        self.route_latency = dict(route_latency or {})
+        self.limits = dict(limits or {})
+        self.calls = Counter()
+        self.rate_limited = Counter()
+        # (route, bucket) -> (window start, calls in window)
+        self._windows = {}
+
+    @property
+    def total(self):
+        return sum(self.calls.values())
+
+    async def request(self, route, bucket=None):
+        limit = self.limits.get(route)
+        if limit is not None:
+            await self._respect(route, bucket, *limit)
+        self.calls[route] += 1
+        latency = self.route_latency.get(route, self.latency)
+        if latency:
+            await asyncio.sleep(latency)
+
+    async def _respect(self, route, bucket, calls, per):
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            start, used = self._windows.get((route, bucket), (now, 0))
+            if now - start >= per:
+                start, used = now, 0
+            if used < calls:
+                self._windows[(route, bucket)] = (start, used + 1)
+                return
+            retry_after = start + per - now
+            self.rate_limited[route] += 1
+            _http_log.warning("We are being rate limited. %s responded with 429. Retrying in %.2f seconds.",
+                              route, retry_after)
+            await asyncio.sleep(retry_after)
+
+
+class FakeRole:
+    def __init__(self, id, name):
+        self.id = id
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+
+class FakeUser:
+    """A user; ``on_dm(user, text)``, if set, sees every DM the bot sends them."""
+
+    def __init__(self, rest, id, name, bot=False):
+        self._rest = rest
+        self.id = id
+        self.name = name
+        self.bot = bot
+        self.dm_channel = None
+        self.on_dm = None
+
+    @property
+    def mention(self):
+        return f"<@{self.id}>"
+
+    def __str__(self):
+        return self.name
+
+    async def send(self, content=None, **kwargs):
+        await self._rest.request("send")
+        if self.on_dm is not None:
+            self.on_dm(self, content)
+
+    async def create_dm(self):
+        await self._rest.request("create_dm")
+        self.dm_channel = FakeChannel(self._rest, snowflake(), None, f"dm-{self.name}")
+        return self.dm_channel
+
+
+class FakeMember(FakeUser):
+    def __init__(self, rest, id, name, guild, bot=False):
+        super().__init__(rest, id, name, bot)
+        self.guild = guild
+        self.roles = []
+
+    async def kick(self, reason=None):
+        await self._rest.request("kick")
+        self.guild.members.pop(self.id, None)
+
+    async def add_roles(self, *roles, reason=None):
+        await self._rest.request("add_roles")
+        self.roles.extend(role for role in roles if role not in self.roles)
+
+    async def remove_roles(self, *roles, reason=None):
+        await self._rest.request("remove_roles")
+        self.roles = [role for role in self.roles if role not in roles]
+
+    async def edit(self, roles=None, reason=None, **kwargs):
+        await self._rest.request("edit_member")
+        if roles is not None:
+            self.roles = list(roles)
+
+
+class FakeMessage:
+    def __init__(self, rest, id, content, author, channel):
+        self._rest = rest
+        # discord.py's Context reads this; nothing here goes through it.
+        self._state = None
+        self.id = id
+        self.content = content
+        self.author = author
+        self.channel = channel
+        self.guild = channel.guild
+        self.reactions = []
+        self.embeds = []
+        self.attachments = []
+
+    async def delete(self, delay=None):
+        await self._rest.request("delete")
+
+    async def add_reaction(self, emoji):
+        await self._rest.request("add_reaction", self.channel.id)
+
+    async def clear_reactions(self):
+        await self._rest.request("clear_reactions", self.channel.id)
+
+    async def edit(self, **kwargs):
+        await self._rest.request("edit")
+        self.content = kwargs.get("content", self.content)
+        return self
+
+
+class FakeChannel:
+    def __init__(self, rest, id, guild, name, topic=None, category=None, parent_id=None):
+        self._rest = rest
+        self.id = id
+        self.guild = guild
+        self.name = name
+        self.topic = topic
+        self.category = category
+        self.parent_id = parent_id
+        self.threads = []
+
+    @property
+    def mention(self):
+        return f"<#{self.id}>"
+
+    def __str__(self):
+        return self.name
+
+    async def send(self, content=None, **kwargs):
+        await self._rest.request("send")
+        return FakeMessage(self._rest, snowflake(), content or "", self.guild.me if self.guild else None, self)
+
+    async def delete_messages(self, messages, reason=None):
+        await self._rest.request("delete_messages")
+
+    async def edit(self, name=None, topic=None, reason=None, **kwargs):
+        await self._rest.request("edit_channel")
+        self.name = name or self.name
+        self.topic = topic if topic is not None else self.topic
+        return self
+
+    async def delete(self, reason=None):
+        await self._rest.request("delete")
+        if self.guild is not None:
+            self.guild.channels.pop(self.id, None)
+            self.guild.channel_index.pop(self.id, None)
+
+
+class FakeGuild:
+    """``channel_index``, if given, is a dict shared by several guilds that maps every channel id to its channel."""
+
+    def __init__(self, rest, id, name, channel_index=None):
+        self._rest = rest
+        self.id = id
+        self.name = name
+        self.members = {}
+        self.channels = {}
+        self.channel_index = channel_index if channel_index is not None else {}
+        self.roles = {}
+        self.default_role = self.add_role("@everyone", id)
+        self.me = None
+        self.banned = set()
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def text_channels(self):
+        return list(self.channels.values())
+
+    def add_role(self, name, id=None):
+        role = FakeRole(id or snowflake(), name)
+        self.roles[role.id] = role
+        return role
+
+    def add_channel(self, name, id=None, topic=None):
+        channel = FakeChannel(self._rest, id or snowflake(), self, name, topic)
+        self.channels[channel.id] = channel
+        self.channel_index[channel.id] = channel
+        return channel
+
+    def add_member(self, name, id=None, bot=False):
+        member = FakeMember(self._rest, id or snowflake(), name, self, bot)
+        self.members[member.id] = member
+        return member
+
+    def get_member(self, member_id):
+        return self.members.get(member_id)
+
+    def get_role(self, role_id):
+        return self.roles.get(role_id)
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    async def create_text_channel(self, name, overwrites=None, topic=None, reason=None, category=None, **kwargs):
+        await self._rest.request("create_text_channel")
+        channel = self.add_channel(name, topic=topic)
+        channel.category = category
+        return channel
+
+    async def ban(self, user, reason=None, **kwargs):
+        await self._rest.request("ban")
+        self.banned.add(user.id)
+        self.members.pop(user.id, None)
+
+    async def unban(self, user, reason=None):
+        await self._rest.request("unban")
+        self.banned.discard(user.id)
+
+
+class FakeInteraction:
+    def __init__(self, rest, user, guild, locale="en-US"):
+        self.user = user
+        self.guild = guild
+        self.locale = locale
+        self.response = SimpleNamespace(send_message=self._respond, defer=self._defer)
+        self.followup = SimpleNamespace(send=self._follow_up)
+        self._rest = rest
+
+    async def _respond(self, content=None, **kwargs):
+        # Interaction replies skip the outbound scheduler, but are still REST calls.
+        await self._rest.request("interaction_response")
+
+    async def _defer(self, **kwargs):
+        await self._rest.request("interaction_response")
+
+    async def _follow_up(self, content=None, **kwargs):
+        await self._rest.request("followup")
+
+
+class Gateway:
+    """Feeds events to a bot's handlers, one task per event, and times them."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.latencies = []
+        self.errors = 0
+        self._tasks = set()
+
+    @property
+    def events(self):
+        return len(self.latencies)
+
+    def dispatch(self, event, *args):
+        handler = getattr(self.bot, "on_" + event, None)
+        if handler is not None:
+            self._spawn(handler, args)
+
+    def click(self, item, interaction):
+        """Press a ``discord.ui`` component, the way a component interaction would."""
+        self._spawn(item.callback, (interaction,))
+
+    def _spawn(self, handler, args):
+        task = asyncio.create_task(self._run(handler, args))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, handler, args):
+        start = time.perf_counter()
+        try:
+            await handler(*args)
+        except Exception:
+            self.errors += 1
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+    async def drain(self):
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks))
+
+
+def load_bot(workdir, **overrides):
+    """Import ``bot.py`` as a fresh module, with its config and state in ``workdir``.
+
+    ``overrides`` replace keys of the repository's ``config.json``.
+    """
+    with open(os.path.join(ROOT, "config.json"), "r", encoding="utf-8") as f:
+        config = json.load(f)
+    config.update(state_file=os.path.join(workdir, "state.db"), metrics_port=0)
+    config.update(overrides)
+    with open(os.path.join(workdir, "config.json"), "w", encoding="utf-8") as f:
+        json.dump(config, f)
+
+    spec = importlib.util.spec_from_file_location(f"simulated_bot_{next(_sequence)}", os.path.join(ROOT, BOT))
+    module = importlib.util.module_from_spec(spec)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        os.chdir(cwd)
+    return module
+
+
+def guild_settings(count, **extra):
+    """A "guilds" config entry for ``count`` extra guilds with fresh ids and the settings in ``extra``."""
+    return {
+        str(snowflake()): {
+            "ticket_channel_id": snowflake(),
+            "role_channel_id": snowflake(),
+            "target_channel_id": snowflake(),
+            "staff_role_id": snowflake(),
+            "allowed_link_channels": [snowflake()],
+            "emoji_to_role": {"🔥": snowflake(), "💧": snowflake(), "🌿": snowflake()},
+            **extra,
+        }
+        for _ in range(count)
+    }
+
+
+class Simulation:
+    """A bot module wired to fake guilds built from its config.
+
+    ``guilds`` is how many guilds the bot serves: the one from the top-level
+    settings plus generated ones, which get the settings in
+    ``guild_overrides``. Each ``FakeGuild`` in ``self.guilds`` has
+    ``ticket_channel``, ``role_channel``, ``target_channel`` and ``general``
+    attributes, the posted panels by name in ``role_panels`` and the first
+    as ``role_message``; ``self.guild`` is the first. Call from
+    inside a running event loop, and ``close`` when done.
+    """
+
+    def __init__(self, workdir, rest=None, guilds=1, guild_overrides=None, **overrides):
+        self.rest = rest or FakeRest()
+        if guilds > 1:
+            overrides.setdefault("guilds", guild_settings(guilds - 1, **(guild_overrides or {})))
+        self.module = load_bot(workdir, **overrides)
+        self.bot = self.module.bot
+        config = self.module.settings.current
+
+        channels = {}
+        self.guilds = [self._build_guild(rules, channels) for rules in config.guilds.values()]
+        self.guild = self.guilds[0]
+        by_id = {guild.id: guild for guild in self.guilds}
+
+        # What login and on_ready would have set up: the loop, the logged-in user and the role panels.
+        self.bot.loop = asyncio.get_running_loop()
+        self.bot._connection.user = self.guild.me
+        self.bot.get_guild = by_id.get
+        self.bot.get_channel = channels.get
+        for guild in self.guilds:
+            for name, message in guild.role_panels.items():
+                self.module.role_panels.bind(guild.id, name, message.id)
+
+        self.gateway = Gateway(self.bot)
+
+    def _build_guild(self, rules, channel_index):
+        guild = FakeGuild(self.rest, rules.guild_id, f"Simulated guild {rules.guild_id}", channel_index)
+        guild.me = guild.add_member("filar", bot=True)
+        guild.ticket_channel = guild.add_channel("tickets", rules.ticket_channel_id)
+        guild.role_channel = guild.add_channel("roles", rules.role_channel_id)
+        guild.target_channel = guild.add_channel("memes", rules.target_channel_id)
+        for channel_id in rules.allowed_link_channels:
+            guild.add_channel("links", channel_id)
+        guild.general = guild.add_channel("general")
+        guild.add_role("Staff", rules.staff_role_id)
+        guild.role_panels = {}
+        for panel in rules.role_panels.values():
+            channel = guild.channels.get(panel.channel_id) or guild.add_channel(panel.name, panel.channel_id)
+            for emoji, role_id in panel.emoji_to_role.items():
+                if role_id not in guild.roles:
+                    guild.add_role(f"role {emoji}", role_id)
+            guild.role_panels[panel.name] = FakeMessage(self.rest, snowflake(), panel.name, guild.me, channel)
+        guild.role_message = next(iter(guild.role_panels.values()), None)
+        return guild
+
+    def message(self, channel, author, content):
+        return FakeMessage(self.rest, snowflake(), content, author, channel)
+
+    def dm(self, author, content):
+        channel = author.dm_channel or FakeChannel(self.rest, snowflake(), None, f"dm-{author.name}")
+        return FakeMessage(self.rest, snowflake(), content, author, channel)
+
+    def reaction(self, message, member, emoji):
+        return SimpleNamespace(channel_id=message.channel.id, message_id=message.id, guild_id=message.guild.id,
+                               user_id=member.id, emoji=emoji, member=member)
+
+    def _busy(self):
+        outbound = self.module.outbound
+        return (outbound.in_flight or any(outbound.depth(lane) for lane in range(len(LANE_NAMES)))
+                or len(self.module.role_changes) or len(self.module.message_tasks)
+                or len(self.module.auto_reactions)
+                or any(guild.ticket_pool._filling for guild in self.module.guilds))
+
+    async def settle(self):
+        """Wait until every handler, queued action and scheduled REST call has finished."""
+        while True:
+            await self.gateway.drain()
+            for queue in (self.module.dm_queue, self.module.kick_queue):
+                await queue.join()
+            while self._busy():
+                await asyncio.sleep(0.001)
+            if not self.gateway._tasks:
+                return
+
+    def close(self):
+        self.module.state.close()
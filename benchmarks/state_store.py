@@ -0,0 +1,61 @@
+"""Sustained write throughput of the state store.
+
+Run from the repository root:
+
+    python -m benchmarks.state_store
+
+It compares rewriting a JSON file on every change (what the
+ticket registry and temp-ban scheduler used to do) with ``StateStore.set``.
+Crash recovery is checked in ``tests/test_store.py``.
+"""
+import json
+import os
+import tempfile
+import time
+
+from filar.store import StateStore
+
+
+def json_rewrite(path, entries, writes):
+    data = {}
+    keys = [str(i) for i in range(entries)]
+    start = time.perf_counter()
+    for i in range(writes):
+        data[keys[i % entries]] = i
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    return time.perf_counter() - start
+
+
+def store_writes(path, entries, writes):
+    store = StateStore(path)
+    keys = [str(i) for i in range(entries)]
+    start = time.perf_counter()
+    for i in range(writes):
+        store.set("bench", keys[i % entries], i)
+    caller = time.perf_counter() - start
+    store.flush()
+    total = time.perf_counter() - start
+    batches = store.batches
+    store.close()
+    return caller, total, batches
+
+
+def throughput():
+    print(f"{'keys':>7} | {'writes':>7} | {'JSON rewrite (writes/s)':>23} | "
+          f"{'store set (µs)':>14} | {'store committed (writes/s)':>26} | {'batches':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for entries, writes in ((100, 2_000), (10_000, 2_000), (10_000, 200_000), (1_000_000, 1_000_000)):
+            if entries <= 10_000 and writes <= 2_000:
+                json_rate = f"{writes / json_rewrite(os.path.join(tmp, 'state.json'), entries, writes):>23,.0f}"
+            else:
+                json_rate = f"{'(too slow)':>23}"
+            caller, total, batches = store_writes(os.path.join(tmp, f"state-{entries}-{writes}.db"), entries, writes)
+            print(f"{entries:>7} | {writes:>7} | {json_rate} | {caller / writes * 1e6:>14.2f} | "
+                  f"{writes / total:>26,.0f} | {batches:>7}")
+
+
+if __name__ == "__main__":
+    throughput()
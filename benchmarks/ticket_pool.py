@@ -0,0 +1,83 @@
+"""Ticket button response time with and without a pool of spare ticket channels.
+
+Run from the repository root (needs discord.py installed, but no token):
+
+    python -m benchmarks.ticket_pool
+
+Users press the ticket button every ``CLICK_GAP`` seconds. Creating a
+channel takes ``CREATE_LATENCY`` seconds and Discord allows only a few
+creations in a row; editing one (claiming a spare) takes ``EDIT_LATENCY``.
+With a pool, it is filled before the first click and refilled at one
+channel per ``REFILL_INTERVAL`` seconds. The click is acknowledged at
+once; reported is the time from the click to the reply with the ticket
+channel, and how many replies took longer than 3 s.
+"""
+import asyncio
+import contextlib
+import io
+import tempfile
+import time
+
+from benchmarks.bot_load import percentile
+from benchmarks.simulator import FakeInteraction, FakeRest, Simulation
+
+POOL_SIZES = (0, 5, 10)
+CLICKS = 30
+CLICK_GAP = 0.2
+CREATE_LATENCY = 0.8
+EDIT_LATENCY = 0.15
+# Channel creations per guild: calls, per seconds.
+CREATE_LIMIT = (5, 5)
+REFILL_INTERVAL = 1.0
+DEADLINE = 3.0
+
+
+async def measure(pool_size):
+    rest = FakeRest(latency=0.05, limits={"create_text_channel": CREATE_LIMIT},
+                    route_latency={"create_text_channel": CREATE_LATENCY, "edit_channel": EDIT_LATENCY})
+    with tempfile.TemporaryDirectory() as workdir:
+        sim = Simulation(workdir, rest, ticket_pool_size=pool_size, ticket_pool_interval=REFILL_INTERVAL)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                pool = sim.module.guilds.get(sim.guild.id).ticket_pool
+                # The bot has been up for a while: the pool is full and the rate limit window is clear.
+                pool.interval = 0
+                pool.refill()
+                while pool._filling:
+                    await asyncio.sleep(0.05)
+                pool.interval = REFILL_INTERVAL
+                await asyncio.sleep(CREATE_LIMIT[1])
+
+                button = sim.module.TicketButton().create_ticket
+                responses = []
+                for i in range(CLICKS):
+                    interaction = FakeInteraction(rest, sim.guild.add_member(f"customer{i}"), sim.guild)
+                    respond, clicked = interaction.followup.send, time.perf_counter()
+
+                    async def timed_respond(*args, respond=respond, clicked=clicked, **kwargs):
+                        responses.append(time.perf_counter() - clicked)
+                        await respond(*args, **kwargs)
+
+                    interaction.followup.send = timed_respond
+                    sim.gateway.click(button, interaction)
+                    await asyncio.sleep(CLICK_GAP)
+                await sim.gateway.drain()
+        finally:
+            sim.close()
+    responses.sort()
+    return {
+        "p50": percentile(responses, 0.5), "p99": percentile(responses, 0.99), "max": responses[-1],
+        "late": sum(1 for r in responses if r > DEADLINE), "claimed": pool.claimed, "errors": sim.gateway.errors,
+    }
+
+
+def main():
+    print(f"{'pool':>4} | {'p50 s':>6} | {'p99 s':>6} | {'max s':>6} | {'over 3 s':>8} | {'from pool':>9} | {'errors':>6}")
+    for size in POOL_SIZES:
+        r = asyncio.run(measure(size))
+        print(f"{size:>4} | {r['p50']:>6.2f} | {r['p99']:>6.2f} | {r['max']:>6.2f} | {r['late']:>8} | "
+              f"{r['claimed']:>9} | {r['errors']:>6}")
+
+
+if __name__ == "__main__":
+    main()
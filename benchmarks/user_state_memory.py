@@ -0,0 +1,70 @@
+"""Memory per tracked user: dict/set state vs. the array-backed stores.
+
+Run from the repository root:
+
+    python -m benchmarks.user_state_memory
+
+tracemalloc slows the builds down a lot; the 1M row takes a minute or two.
+"""
+import gc
+import random
+import timeit
+import tracemalloc
+from datetime import datetime, timedelta
+
+from filar.userstate import CompactIdMap, VerificationOutcomes
+
+
+def make_ids(count, seed=1):
+    rng = random.Random(seed)
+    # Realistic snowflakes: 2018-2024 creation times with random low bits.
+    return [(rng.randrange(100, 400) << 54) | rng.randrange(1 << 22) for _ in range(count)]
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    state = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return state, size
+
+
+def build_old(ids):
+    now = datetime.utcnow()
+    last_message_times = {user_id: now - timedelta(seconds=i) for i, user_id in enumerate(ids)}
+    verified_members = set(ids)
+    failed_verifications = set(ids[::10])
+    return last_message_times, verified_members, failed_verifications
+
+
+def build_new(ids):
+    day = int(datetime.utcnow().timestamp() // 86400)
+    days = CompactIdMap("H")
+    days.update((user_id, day) for user_id in ids)
+    outcomes = VerificationOutcomes()
+    for i, user_id in enumerate(ids):
+        outcomes.set(user_id, 2 if i % 10 == 0 else 1)
+    outcomes._records.compact()
+    return days, outcomes
+
+
+def run(sizes=(10_000, 100_000, 1_000_000)):
+    print(f"{'users':>9} | {'dict/set (B/user)':>17} | {'arrays (B/user)':>15} | "
+          f"{'dict lookup (ns)':>16} | {'array lookup (ns)':>17}")
+    for count in sizes:
+        ids = make_ids(count)
+        old, old_size = measure(lambda: build_old(ids))
+        new, new_size = measure(lambda: build_new(ids))
+
+        probes = random.Random(2).sample(ids, 1000)
+        old_lookup = min(timeit.repeat(lambda: [p in old[1] and old[0].get(p) for p in probes], number=20, repeat=3))
+        new_lookup = min(timeit.repeat(lambda: [p in new[1].verified and new[0].get(p) for p in probes],
+                                       number=20, repeat=3))
+        print(f"{count:>9} | {old_size / count:>17.1f} | {new_size / count:>15.1f} | "
+              f"{old_lookup / 20 / 1000 * 1e9:>16.0f} | {new_lookup / 20 / 1000 * 1e9:>17.0f}")
+        del old, new
+
+
+if __name__ == "__main__":
+    run()
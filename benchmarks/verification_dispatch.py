@@ -0,0 +1,92 @@
+"""Per-message dispatch cost: wait_for listeners vs. VerificationManager.
+
+Run from the repository root:
+
+    python -m benchmarks.verification_dispatch
+"""
+import asyncio
+import timeit
+
+from filar.verification import VerificationManager
+
+
+class FakeUser:
+    def __init__(self, user_id):
+        self.id = user_id
+
+
+class FakeChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+
+
+class FakeMessage:
+    def __init__(self, author, channel, guild=None):
+        self.author = author
+        self.channel = channel
+        self.guild = guild
+
+
+def make_listeners(loop, pending):
+    """One (future, check) pair per join, the way bot.wait_for registers them."""
+    listeners = []
+    for i in range(pending):
+        member = FakeUser(i)
+        dm_channel = FakeChannel(10_000_000 + i)
+
+        def check(m, member=member, dm_channel=dm_channel):
+            return m.author == member and m.channel == dm_channel
+
+        listeners.append((loop.create_future(), check))
+    return listeners
+
+
+def dispatch_listeners(listeners, message):
+    # Mirrors discord.Client.dispatch: every listener's check sees every message.
+    for future, condition in listeners:
+        if future.cancelled():
+            continue
+        if condition(message):
+            return True
+    return False
+
+
+async def run(pending_counts=(10, 1_000, 10_000), number=2_000):
+    loop = asyncio.get_running_loop()
+    stranger_dm = FakeMessage(FakeUser(-1), FakeChannel(-1))
+    guild_message = FakeMessage(FakeUser(-2), FakeChannel(-2), guild=object())
+
+    print(f"{'pending':>8} | {'wait_for (µs/msg)':>18} | {'manager (µs/msg)':>17} | speedup")
+    for pending in pending_counts:
+        listeners = make_listeners(loop, pending)
+
+        manager = VerificationManager(timeout=600)
+        waiters = [asyncio.create_task(manager.wait_for_answer(0, i)) for i in range(pending)]
+        await asyncio.sleep(0)
+
+        def new_path():
+            for message in (stranger_dm, guild_message):
+                if message.guild is None:
+                    manager.dispatch(message)
+
+        def old_path():
+            for message in (stranger_dm, guild_message):
+                dispatch_listeners(listeners, message)
+
+        # The listener scan is linear, so run it fewer times for large backlogs.
+        old_runs = max(1, number // max(1, pending // 100))
+        old = min(timeit.repeat(old_path, number=old_runs, repeat=3))
+        new = min(timeit.repeat(new_path, number=number, repeat=3))
+        old_us = old / old_runs / 2 * 1e6
+        new_us = new / number / 2 * 1e6
+        print(f"{pending:>8} | {old_us:>18.3f} | {new_us:>17.3f} | {old_us / new_us:>6.0f}x")
+
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        for future, _ in listeners:
+            future.cancel()
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
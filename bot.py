@@ -2,22 +2,64 @@ import discord
 from discord.ext import commands
 import asyncio
 import random
-import os
-import json
+import sys
+import time
+from datetime import timedelta
+
+from filar.tempbans import TempBanScheduler
+from filar.verification import VerificationManager
+from filar.raid import ActionQueue, RaidMonitor
+from filar.links import DENIED
+from filar.tickets import TicketRegistry
+from filar.reactions import ReactionTally, parse_window
+from filar.activity import ActivityIndex
+from filar.userstate import VerificationOutcomes
+from filar.deletions import DeletionCoalescer, purge_history
+from filar.roles import RoleCoalescer
+from filar.rolepanels import RolePanelIndex
+from filar.members import MemberLookup
+from filar.pipeline import TaskGroup
+from filar.autoreact import AutoReactor
+from filar.ticketpool import SPARE_TOPIC, TicketPool
+from filar.bans import BanIndex
+from filar.outbound import COSMETIC, MODERATION, ROLES, VERIFICATION, OutboundScheduler
+from filar.notices import WarningDigest
+from filar.catalog import CATALOG
+from filar.config import ConfigError, ConfigManager
+from filar.store import StateStore
+from filar.metrics import MetricsRegistry, instrument_bot, instrument_outbound, instrument_pipeline, watch_rate_limits
+from filar.guilds import GuildPartitions, partition_namespace
+from filar.shards import ShardLayout, preparing
 
 # --- Load Config ---
-with open("config.json", "r") as f:
-    config = json.load(f)
-
-TOKEN = config["token"]
-COMMAND_PREFIX = config.get("prefix", "!")
-GUILD_ID = config["guild_id"]
-TICKET_CHANNEL_ID = config["ticket_channel_id"]
-STAFF_ROLE_ID = config["staff_role_id"]
-ROLE_CHANNEL_ID = config["role_channel_id"]
-TARGET_CHANNEL_ID = config["target_channel_id"]
-ALLOWED_LINK_CHANNELS = set(config["allowed_link_channels"])
-EMOJI_TO_ROLE = config["emoji_to_role"]
+# Settings that can change at runtime are read from settings.current where they
+# are used (see !reload); the ones below are fixed until the bot restarts.
+settings = ConfigManager("config.json")
+
+TOKEN = settings.current.token
+COMMAND_PREFIX = settings.current.prefix
+GUILD_ID = settings.current.guild_id
+REACTION_RETENTION_DAYS = settings.current.reaction_retention_days
+REACTION_BACKFILL_LIMIT = settings.current.reaction_backfill_limit
+VERIFICATION_TTL_DAYS = settings.current.verification_ttl_days
+RAID_QUEUE_SIZE = settings.current.raid_queue_size
+layout = ShardLayout.from_config(settings.current)
+
+# --- State ---
+state = StateStore(settings.current.state_file)
+# Workers started by the shard launcher share the state file; its prepare run has migrated it already.
+if not layout.launched:
+    state.migrate_json(settings.current.temp_bans_file, "temp_bans")
+    state.migrate_json(settings.current.tickets_file, "tickets")
+    state.migrate_json(settings.current.activity_file, "activity")
+    for name in ("ticket_message", "role_message"):
+        state.migrate_json(f"{name}.json", "messages", lambda data, name=name: {name: data.get("message_id")})
+    # State from before per-guild partitions belongs to the main guild.
+    for namespace in ("tickets", "activity", "messages", "stats"):
+        state.rename(namespace, partition_namespace(namespace, GUILD_ID))
+if preparing():
+    state.close()
+    sys.exit(0)
 
 # --- Intents and Bot Setup ---
 intents = discord.Intents.default()
@@ -25,266 +67,831 @@ intents.message_content = True
 intents.guilds = True
 intents.members = True
 
-bot = commands.Bot(command_prefix=COMMAND_PREFIX, intents=intents)
+# A lean member cache skips downloading every member at startup; handlers look members up when they need one.
+member_cache_options = {}
+if settings.current.member_cache == "lean":
+    member_cache_options = {"chunk_guilds_at_startup": False, "member_cache_flags": discord.MemberCacheFlags.none()}
+
+bot = commands.AutoShardedBot(command_prefix=COMMAND_PREFIX, intents=intents, **layout.bot_options(),
+                              **member_cache_options)
 
 # --- Globals ---
-open_tickets = {}
-role_message_id = None
+
+STAT_NAMES = (
+    "passed_verification", "failed_verification", "users_joined", "users_left", "banned_users", "inactive_users",
+)
+
+class GuildState:
+    """What the bot keeps for each guild it serves; ``rules`` are its current settings."""
+
+    def __init__(self, guild_id):
+        rules = settings.current.guild(guild_id)
+        self.guild_id = guild_id
+        self.stats = dict.fromkeys(STAT_NAMES, 0)
+        self.stats.update(state.load(partition_namespace("stats", guild_id)))
+        self.activity = ActivityIndex(state, partition_namespace("activity", guild_id))
+        self.tickets = TicketRegistry(state, partition_namespace("tickets", guild_id))
+        self.ticket_pool = TicketPool(lambda: create_spare_ticket(guild_id), size=rules.ticket_pool_size,
+                                      interval=settings.current.ticket_pool_interval)
+        # Ids of the bot's own panel messages, by name.
+        self.panel_messages = state.load(partition_namespace("messages", guild_id))
+        for name in rules.role_panels:
+            if name in self.panel_messages:
+                role_panels.bind(guild_id, name, self.panel_messages[name])
+        self.reactions = ReactionTally(retention=REACTION_RETENTION_DAYS * 86400)
+        self.raid_monitor = RaidMonitor(threshold=rules.raid_join_threshold, window=rules.raid_join_window)
+        self.bans = BanIndex()
+        self.bans_started = False
+
+    @property
+    def rules(self):
+        return settings.current.guild(self.guild_id)
+
+    def save_message_id(self, name, message_id):
+        self.panel_messages[name] = message_id
+        state.set(partition_namespace("messages", self.guild_id), name, message_id)
+
+    def count_stat(self, name, delta=1):
+        self.stats[name] += delta
+        state.set(partition_namespace("stats", self.guild_id), name, self.stats[name])
+
+guilds = GuildPartitions(GuildState, settings, layout)
+
+def text_for(guild):
+    """Messages in ``guild``'s language; the default language outside served guilds and in DMs."""
+    rules = settings.current.guild(guild.id) if guild else None
+    return rules.text if rules else CATALOG.default
+
+def interaction_text(interaction):
+    """Messages for replies only the user sees: their client's language if there is a catalog for it."""
+    return CATALOG.for_client(interaction.locale, text_for(interaction.guild))
+
+# Verification outcomes are forgotten after VERIFICATION_TTL_DAYS even if on_member_remove is missed.
+verification_outcomes = VerificationOutcomes(ttl=VERIFICATION_TTL_DAYS * 86400)
+verified_members = verification_outcomes.verified
+failed_verifications = verification_outcomes.failed
+verification_sessions = VerificationManager(timeout=120)
+# Every REST call made by a handler goes through here, most important lane first.
+outbound = OutboundScheduler(
+    max_concurrency=settings.current.outbound_max_concurrency,
+    route_limits={"add_reaction": 2},
+    shed_backlog=settings.current.outbound_cosmetic_backlog,
+)
+metrics = MetricsRegistry()
+instrument_outbound(metrics, outbound)
+watch_rate_limits(metrics)
+deletion_coalescer = DeletionCoalescer(runner=lambda func, *args: outbound.call(MODERATION, func, *args))
+role_panels = RolePanelIndex()
+auto_reactions = AutoReactor(
+    rate=settings.current.auto_reaction_rate,
+    max_delay=settings.current.auto_reaction_max_delay,
+    runner=lambda func, *args: outbound.call(COSMETIC, func, *args),
+)
+# REST side effects of on_message, run without holding up the handler.
+message_tasks = TaskGroup(limit=settings.current.message_task_limit)
+instrument_pipeline(metrics, message_tasks)
+member_lookup = MemberLookup(
+    size=settings.current.member_lookup_size,
+    ttl=settings.current.member_lookup_ttl,
+    runner=lambda func, *args: outbound.call(ROLES, func, *args),
+    not_found=(discord.NotFound,),
+)
+
+async def edit_member_roles(func, *args, **kwargs):
+    member = await outbound.call(ROLES, func, *args, **kwargs)
+    # The edit's response has the member's new roles; the gateway cache may not hold them.
+    if member is not None:
+        member_lookup.put(member)
+    return member
+
+# Reaction-role changes are batched per member and applied as one role edit.
+role_changes = RoleCoalescer(
+    window=settings.current.role_change_window,
+    runner=edit_member_roles,
+    deltas=settings.current.member_cache == "lean",
+)
+
+def render_link_warning(count, channels):
+    text = text_for(channels[0].guild)
+    where = ", ".join(channel.mention for channel in channels)
+    if count == 1:
+        return text("link_warning_one", channels=where)
+    return text("link_warning_many", count=count, channels=where)
+
+link_warnings = WarningDigest(
+    render_link_warning,
+    cooldown=settings.current.link_warning_cooldown,
+    runner=lambda func, *args: outbound.call(VERIFICATION, func, *args),
+)
+reaction_backfill_started = False
 
 # --- Ticket System ---
 
 class TicketButton(discord.ui.View):
-    def __init__(self):
+    """The persistent ticket button. ``label`` only matters when a panel is posted."""
+
+    def __init__(self, label=None):
         super().__init__(timeout=None)
+        if label:
+            self.create_ticket.label = label
 
     @discord.ui.button(label="Create Ticket", style=discord.ButtonStyle.green, custom_id="create_ticket_button")
     async def create_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
         user_id = interaction.user.id
         guild = interaction.guild
+        guild_state = guilds.get(guild.id)
+        if guild_state is None:
+            return
+        rules = guild_state.rules
+        reply = interaction_text(interaction)
 
-        if user_id in open_tickets:
-            await interaction.response.send_message("You already have an open ticket!", ephemeral=True)
+        if user_id in guild_state.tickets:
+            await interaction.response.send_message(reply("ticket_exists"), ephemeral=True)
             return
 
         overwrites = {
             guild.default_role: discord.PermissionOverwrite(read_messages=False),
             interaction.user: discord.PermissionOverwrite(read_messages=True, send_messages=True),
-            guild.get_role(STAFF_ROLE_ID): discord.PermissionOverwrite(read_messages=True, send_messages=True),
-            bot.user: discord.PermissionOverwrite(read_messages=True, send_messages=True),
+            guild.get_role(rules.staff_role_id): discord.PermissionOverwrite(read_messages=True, send_messages=True),
+            guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True),
+        }
+        ticket = {
+            "name": f"ticket-{interaction.user.name}",
+            "overwrites": overwrites,
+            "topic": rules.text("ticket_topic", user=interaction.user, user_id=interaction.user.id),
+            "reason": rules.text("ticket_reason"),
         }
 
-        ticket_channel = await guild.create_text_channel(
-            name=f"ticket-{interaction.user.name}",
-            overwrites=overwrites,
-            topic=f"Ticket for {interaction.user} (ID: {interaction.user.id})",
-            reason="New support ticket created"
-        )
+        # Channel calls can outlast the 3 s interaction deadline, so acknowledge the click first.
+        await interaction.response.defer(ephemeral=True, thinking=True)
+
+        # A spare channel from the pool only needs renaming and opening up to the user.
+        ticket_channel = guild_state.ticket_pool.claim()
+        if ticket_channel is not None:
+            try:
+                await outbound.call(VERIFICATION, ticket_channel.edit, **ticket)
+            except Exception as e:
+                print(f"⚠️ Could not open spare ticket channel {ticket_channel.id}, creating a new one: {e}")
+                # It may be half renamed, so it can't go back to the pool.
+                outbound.submit(VERIFICATION, ticket_channel.delete, reason=rules.text("ticket_spare_reason"))
+                ticket_channel = None
+        if ticket_channel is None:
+            try:
+                ticket_channel = await outbound.call(VERIFICATION, guild.create_text_channel, **ticket)
+            except Exception as e:
+                print(f"❌ Could not create a ticket channel for {interaction.user}: {e}")
+                await interaction.followup.send(reply("ticket_create_failed", error=e), ephemeral=True)
+                return
 
-        open_tickets[user_id] = ticket_channel.id
+        guild_state.tickets.add(user_id, ticket_channel.id)
 
-        await interaction.response.send_message(f"Your ticket has been created: {ticket_channel.mention}", ephemeral=True)
-        await ticket_channel.send(f"Hello {interaction.user.mention}! A staff member will be with you shortly.\nTo close this ticket, type `!close`.")
+        await interaction.followup.send(reply("ticket_created", channel=ticket_channel.mention), ephemeral=True)
+        await outbound.call(
+            VERIFICATION, ticket_channel.send,
+            rules.text("ticket_welcome", user=interaction.user.mention, prefix=COMMAND_PREFIX)
+        )
+
+async def create_spare_ticket(guild_id):
+    """A hidden channel for the guild's ticket pool, in ``ticket_pool_category_id`` if set."""
+    guild = bot.get_guild(guild_id)
+    rules = settings.current.guild(guild_id)
+    category = guild.get_channel(rules.ticket_pool_category_id) if rules.ticket_pool_category_id else None
+    overwrites = {
+        guild.default_role: discord.PermissionOverwrite(read_messages=False),
+        guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True),
+    }
+    # Nobody waits for it, so it queues behind everything users are waiting for, but
+    # above the cosmetic lane, which drops calls when it backs up.
+    return await outbound.call(
+        ROLES, guild.create_text_channel, name="spare-ticket", category=category, overwrites=overwrites,
+        topic=SPARE_TOPIC, reason=rules.text("ticket_spare_reason"),
+    )
 
 @bot.command()
 async def close(ctx):
-    user_id = ctx.author.id
-    channel = ctx.channel
+    guild_state = guilds.get(ctx.guild.id) if ctx.guild else None
+    if guild_state is None:
+        return
+    rules = guild_state.rules
+    text = rules.text
 
-    if channel.id not in open_tickets.values():
-        await ctx.send("This command can only be used inside a ticket channel.")
+    # Inside a ticket channel its owner or staff close that ticket.
+    owner_id = guild_state.tickets.owner_of(ctx.channel.id)
+    if owner_id is not None:
+        is_staff = any(role.id == rules.staff_role_id for role in ctx.author.roles)
+        if ctx.author.id != owner_id and not is_staff:
+            await ctx.send(text("ticket_not_yours"))
+            return
+        guild_state.tickets.remove_channel(ctx.channel.id)
+        await ctx.send(text("ticket_closing"))
+        await outbound.call(MODERATION, ctx.channel.delete, reason=text("ticket_closed_reason", user=ctx.author))
         return
 
-    owner_id = next((uid for uid, cid in open_tickets.items() if cid == channel.id), None)
-    if owner_id is None:
-        await ctx.send("Error: ticket owner not found.")
+    # Anywhere else the author closes their own ticket.
+    ticket_channel_id = guild_state.tickets.channel_for(ctx.author.id)
+    if ticket_channel_id is None:
+        await ctx.send(text("ticket_none"), delete_after=10)
+        return
+    ticket_channel = bot.get_channel(ticket_channel_id)
+    if ticket_channel is None:
+        guild_state.tickets.remove_owner(ctx.author.id)
+        await ctx.send(text("ticket_channel_missing"), delete_after=10)
         return
+    try:
+        await outbound.call(MODERATION, ticket_channel.delete, reason=text("ticket_closed_reason", user=ctx.author))
+        guild_state.tickets.remove_owner(ctx.author.id)
+        await ctx.send(text("ticket_closed"), delete_after=10)
+    except Exception as e:
+        await ctx.send(text("ticket_close_failed", error=e), delete_after=10)
 
-    is_staff = any(role.id == STAFF_ROLE_ID for role in ctx.author.roles)
-    if ctx.author.id != owner_id and not is_staff:
-        await ctx.send("You don't have permission to close this ticket.")
+@bot.event
+async def on_guild_channel_delete(channel):
+    # Keeps the registry right when staff delete a ticket channel by hand.
+    guild_state = guilds.get(channel.guild.id)
+    if guild_state:
+        guild_state.tickets.remove_channel(channel.id)
+
+async def setup_ticket_message(guild, guild_state):
+    channel = guild.get_channel(guild_state.rules.ticket_channel_id)
+    if not channel:
+        print(f"❌ {guild}: ticket channel not found!")
         return
 
-    open_tickets.pop(owner_id)
-    await ctx.send("Closing ticket...")
-    await channel.delete(reason=f"Ticket closed by {ctx.author}")
+    ticket_message_id = guild_state.panel_messages.get("ticket_message")
+    if ticket_message_id:
+        try:
+            msg = await channel.fetch_message(ticket_message_id)
+            print(f"✅ Ticket message found by ID: {msg.id}")
+            return
+        except discord.NotFound:
+            print("⚠️ Stored ticket message not found, searching recent history.")
+
+    text = guild_state.rules.text
+    async for msg in channel.history(limit=50):
+        if msg.author == bot.user and msg.content == text("ticket_panel"):
+            guild_state.save_message_id("ticket_message", msg.id)
+            print(f"✅ Found existing ticket message in channel history: {msg.id}")
+            return
+
+    msg = await channel.send(text("ticket_panel"), view=TicketButton(text("ticket_button")))
+    guild_state.save_message_id("ticket_message", msg.id)
+    print(f"✅ New ticket message sent: {msg.id}")
 
 # --- On Ready ---
 
+class CatalogTranslator(discord.app_commands.Translator):
+    """Shows slash command descriptions in the user's client language, from the message catalog."""
+
+    async def translate(self, string, locale, context):
+        key = string.extras.get("key")
+        text = CATALOG.for_client(locale.value, None)
+        return text(key) if key and text else None
+
 @bot.event
-async def on_ready():
-    print(f"✅ Logged in as {bot.user}!")
-
-    guild = bot.get_guild(GUILD_ID)
-    ticket_channel = guild.get_channel(TICKET_CHANNEL_ID)
-    if ticket_channel:
-        async for msg in ticket_channel.history(limit=100):
-            if msg.author == bot.user and msg.content.startswith("Click the button"):
-                await msg.edit(view=TicketButton())
-                break
-        else:
-            await ticket_channel.send("Click the button below to create a ticket!", view=TicketButton())
+async def setup_hook():
+    # One registration serves the ticket panels of every guild, whatever their label.
+    bot.add_view(TicketButton())
+    await bot.tree.set_translator(CatalogTranslator())
+
+async def setup_guild(guild):
+    guild_state = guilds.get(guild.id)
+    try:
+        bot.tree.copy_global_to(guild=guild)
+        await bot.tree.sync(guild=guild)
+        print(f"✅ {guild}: slash commands synced.")
+    except Exception as e:
+        print(f"❌ {guild}: could not sync slash commands: {e}")
+
+    added, removed = guild_state.tickets.sync(guild.text_channels)
+    print(f"✅ {guild}: {len(guild_state.tickets)} open ticket(s), {added} recovered from channel topics, "
+          f"{removed} stale removed.")
+    ticket_pool = guild_state.ticket_pool
+    ticket_pool.adopt(channel for channel in guild.text_channels if channel.topic == SPARE_TOPIC)
+    ticket_pool.refill()
+    if ticket_pool.size:
+        print(f"✅ {guild}: {len(ticket_pool)} spare ticket channel(s), keeping {ticket_pool.size} ready.")
+    if guild.chunked:
+        added, removed = guild_state.activity.sync(member.id for member in guild.members if not member.bot)
+        print(f"✅ {guild}: activity index has {len(guild_state.activity)} member(s), {added} new, {removed} gone.")
     else:
-        print("❌ Ticket channel not found!")
+        # Without the full member list, joins and leaves from now on keep the saved index up to date.
+        print(f"✅ {guild}: activity index has {len(guild_state.activity)} member(s) (member list not loaded).")
+    start_ban_index(guild, guild_state)
+
+    await setup_ticket_message(guild, guild_state)
+    await setup_role_panels(guild, guild_state)
 
-    await setup_self_assign_roles()
+@bot.event
+async def on_ready():
+    print(f"✅ Logged in as {bot.user}, running {layout.describe()}!")
+
+    for guild in guilds.served(bot.guilds):
+        await setup_guild(guild)
+    print(f"✅ Serving {len(guilds)} of {len(bot.guilds)} guild(s).")
+
+    start_reaction_backfill()
+    tempban_scheduler.start()
+    settings.start()
+    if settings.current.metrics_port:
+        # Launcher workers on one machine each get the next port.
+        await metrics.serve(settings.current.metrics_host, settings.current.metrics_port + layout.worker)
+    print(f"✅ {len(tempban_scheduler)} pending unban(s) scheduled.")
     print("✅ Bot is ready.")
 
+@bot.event
+async def on_guild_join(guild):
+    if guilds.get(guild.id) is not None:
+        await setup_guild(guild)
+
 # --- Anti-Raid Math Challenge ---
 
-def generate_math_question():
+def generate_math_question(text):
     a = random.randint(1, 20)
     b = random.randint(1, 20)
     op = random.choice(['+', '-'])
-    question = f"What is {a} {op} {b}?"
+    question = text("math_question", a=a, op=op, b=b)
     answer = a + b if op == '+' else a - b
     return question, answer
 
+dm_queue = ActionQueue("Verification DM", rate=settings.current.raid_dm_rate, maxsize=RAID_QUEUE_SIZE)
+kick_queue = ActionQueue("Kick", rate=settings.current.raid_kick_rate, maxsize=RAID_QUEUE_SIZE)
+
+def in_raid(guild):
+    guild_state = guilds.get(guild.id)
+    return guild_state is not None and guild_state.raid_monitor.active
+
+async def verification_dm(member, text, skip_in_raid=False):
+    """DM a joining member. During a raid the DM is queued and dropped when the queue is full."""
+    if not in_raid(member.guild):
+        await outbound.call(VERIFICATION, member.send, text)
+        return True
+    if skip_in_raid:
+        return False
+    return dm_queue.submit(lambda: outbound.call(VERIFICATION, member.send, text))
+
+async def verification_kick(member, reason):
+    if in_raid(member.guild):
+        await kick_queue.put(lambda: outbound.call(MODERATION, member.kick, reason=reason))
+    else:
+        await outbound.call(MODERATION, member.kick, reason=reason)
+
+async def fail_verification(member, guild_state, message, reason):
+    guild_state.count_stat("failed_verification")
+    failed_verifications.add(member.id)
+    text = guild_state.rules.text
+    await verification_dm(member, text(message), skip_in_raid=True)
+    await verification_kick(member, text(reason))
+
 @bot.event
 async def on_member_join(member):
+    guild_state = guilds.get(member.guild.id)
+    if guild_state is None:
+        return
+    guild_state.count_stat("users_joined")
+    if not member.bot:
+        guild_state.activity.add(member.id)
+    guild_state.raid_monitor.record_join()
+    text = guild_state.rules.text
     try:
-        question, correct_answer = generate_math_question()
-        dm_channel = await member.create_dm()
-        await dm_channel.send(
-            f"Welcome to {member.guild.name}! Please answer this to verify you're human:\n{question}"
-        )
-
-        def check(m):
-            return m.author == member and m.channel == dm_channel
+        question, correct_answer = generate_math_question(text)
+        # If the raid DM queue is full the member gets no challenge and is kicked on timeout.
+        await verification_dm(member, text("verify_welcome", guild=member.guild.name, question=question))
 
         try:
-            msg = await bot.wait_for('message', check=check, timeout=120)
+            msg = await verification_sessions.wait_for_answer(member.guild.id, member.id)
         except asyncio.TimeoutError:
-            await dm_channel.send("You didn't respond in time. You will be kicked.")
-            await member.kick(reason="Verification failed: timeout")
+            await fail_verification(member, guild_state, "verify_timeout", "kick_timeout")
+            return
+        if msg is None:
+            # The member rejoined and that join's challenge took over.
             return
 
         try:
             user_answer = int(msg.content.strip())
         except ValueError:
-            await dm_channel.send("Invalid format. You will be kicked.")
-            await member.kick(reason="Verification failed: invalid answer")
+            await fail_verification(member, guild_state, "verify_invalid", "kick_invalid")
             return
 
         if user_answer == correct_answer:
-            await dm_channel.send("✅ Verified successfully!")
+            guild_state.count_stat("passed_verification")
+            verified_members.add(member.id)
+            await verification_dm(member, text("verify_passed"))
         else:
-            await dm_channel.send("❌ Incorrect. You will be kicked.")
-            await member.kick(reason="Verification failed: wrong answer")
+            await fail_verification(member, guild_state, "verify_wrong", "kick_wrong")
 
     except Exception as e:
         print(f"Error verifying member {member}: {e}")
 
-# --- Self Assign Roles (Fixed) ---
+# The raw event also fires for members that aren't in the member cache.
+@bot.event
+async def on_raw_member_remove(payload):
+    user_id = payload.user.id
+    verified_members.discard(user_id)
+    failed_verifications.discard(user_id)
+    member_lookup.discard(payload.guild_id, user_id)
+    guild_state = guilds.get(payload.guild_id)
+    if guild_state is None:
+        return
+    guild_state.count_stat("users_left")
+    guild_state.activity.remove(user_id)
+    guild_state.tickets.remove_owner(user_id)
 
-async def setup_self_assign_roles():
-    global role_message_id
-    channel = bot.get_channel(ROLE_CHANNEL_ID)
-    if channel is None:
-        print("❌ Role channel not found!")
+@bot.command(name="raid")
+@commands.has_permissions(kick_members=True)
+async def raid_status(ctx):
+    guild_state = guilds.get(ctx.guild.id)
+    if guild_state is None:
         return
+    raid_monitor = guild_state.raid_monitor
+    text = guild_state.rules.text
+    await ctx.send(text(
+        "raid_status",
+        mode=text("raid_on") if raid_monitor.active else text("raid_off"), rate=raid_monitor.join_rate(),
+        dm_depth=dm_queue.depth, dm_size=dm_queue.maxsize, dm_rate=dm_queue.drain_rate(), dm_dropped=dm_queue.dropped,
+        kick_depth=kick_queue.depth, kick_size=kick_queue.maxsize, kick_rate=kick_queue.drain_rate(),
+        in_flight=outbound.in_flight, lanes=outbound.status(),
+    ))
 
-    # Load the message ID if it exists
-    if os.path.exists("role_message.json"):
-        with open("role_message.json", "r") as f:
-            try:
-                data = json.load(f)
-                role_message_id = data.get("message_id")
-            except json.JSONDecodeError:
-                role_message_id = None
+# --- Self Assign Roles ---
+
+async def setup_role_panels(guild, guild_state, names=None):
+    """Post or find the role panels of ``guild`` (those in ``names``, or all) and add their reactions."""
+    panels = [panel for name, panel in guild_state.rules.role_panels.items() if names is None or name in names]
+    await asyncio.gather(*(setup_role_panel(guild, guild_state, panel) for panel in panels))
+
+async def setup_role_panel(guild, guild_state, panel):
+    channel = guild.get_channel(panel.channel_id)
+    if channel is None:
+        print(f"❌ {guild}: channel of role panel {panel.name} not found!")
+        return
 
     # Try to fetch the existing message
-    if role_message_id:
+    msg = None
+    message_id = guild_state.panel_messages.get(panel.name)
+    if message_id:
         try:
-            msg = await channel.fetch_message(role_message_id)
-            print(f"✅ Role message found: {msg.id}")
-            return  # Reuse existing message
+            msg = await channel.fetch_message(message_id)
+            print(f"✅ Role panel {panel.name} found: {msg.id}")
         except discord.NotFound:
-            print("⚠️ Previous role message not found. Sending a new one.")
-
-    # Create a new message
-    description = "React to assign yourself a role:\n"
-    for emoji, role_id in EMOJI_TO_ROLE.items():
-        role = channel.guild.get_role(role_id)
-        if role:
-            description += f"{emoji} : {role.name}\n"
+            print(f"⚠️ Previous role panel {panel.name} not found. Sending a new one.")
 
-    embed = discord.Embed(title="Self-Assign Roles", description=description)
-    msg = await channel.send(embed=embed)
-    
-    for emoji in EMOJI_TO_ROLE.keys():
-        await msg.add_reaction(emoji)
+    if msg is None:
+        text = guild_state.rules.text
+        description = text("roles_intro") + "\n"
+        for emoji, role_id in panel.emoji_to_role.items():
+            role = guild.get_role(role_id)
+            if role:
+                description += f"{emoji} : {role.name}\n"
+        embed = discord.Embed(title=panel.title or text("roles_title"), description=description)
+        msg = await channel.send(embed=embed)
+        guild_state.save_message_id(panel.name, msg.id)
+        print(f"✅ New role panel {panel.name} sent: {msg.id}")
+    role_panels.bind(guild.id, panel.name, msg.id)
 
-    role_message_id = msg.id
+    # Only emojis the panel is missing are added, in order, since Discord shows reactions in the order they came.
+    present = {str(reaction.emoji) for reaction in msg.reactions if reaction.me}
+    for emoji in panel.emoji_to_role:
+        if emoji not in present:
+            try:
+                await outbound.call(ROLES, msg.add_reaction, emoji)
+            except Exception as e:
+                print(f"Failed to add reaction {emoji} to role panel {panel.name}: {e}")
 
-    # Save the message ID
-    with open("role_message.json", "w") as f:
-        json.dump({"message_id": role_message_id}, f)
+async def panel_member_role(payload):
+    """The member and role a reaction on a role panel is about, or None.
 
-    print(f"✅ New role message sent: {role_message_id}")
+    Reactions on other messages, the bot's own and emojis a panel doesn't
+    map stop before the guild and member caches are looked at.
+    """
+    panel = role_panels.get(payload.message_id)
+    if panel is None or payload.user_id == bot.user.id:
+        return None
+    guild_id, name = panel
+    rules = settings.current.guild(guild_id)
+    panel = rules.role_panels.get(name) if rules else None
+    role_id = panel.emoji_to_role.get(str(payload.emoji)) if panel else None
+    if role_id is None:
+        return None
+    guild = bot.get_guild(guild_id)
+    if guild is None:
+        return None
+    # Reaction adds carry the member; removes only their ID.
+    member = payload.member
+    if member is not None:
+        member_lookup.put(member)
+    else:
+        member = await member_lookup.get(guild, payload.user_id)
+    if not member or member.bot:
+        return None
+    role = guild.get_role(role_id)
+    return (member, role) if role else None
 
 @bot.event
 async def on_raw_reaction_add(payload):
-    if payload.message_id != role_message_id:
+    guild_state = guilds.get(payload.guild_id)
+    if guild_state is None:
         return
-    guild = bot.get_guild(payload.guild_id)
-    member = guild.get_member(payload.user_id)
-    if member and not member.bot:
-        role_id = EMOJI_TO_ROLE.get(str(payload.emoji))
-        if role_id:
-            role = guild.get_role(role_id)
-            if role:
-                await member.add_roles(role)
+    # The bot's own auto-reactions arrive here too, so they are counted like reaction.count does.
+    if is_target_channel_id(guild_state.rules, payload.channel_id):
+        guild_state.reactions.add(payload.channel_id, payload.message_id, str(payload.emoji))
+    change = await panel_member_role(payload)
+    if change:
+        role_changes.add(*change)
 
 @bot.event
 async def on_raw_reaction_remove(payload):
-    if payload.message_id != role_message_id:
+    guild_state = guilds.get(payload.guild_id)
+    if guild_state is None:
         return
-    guild = bot.get_guild(payload.guild_id)
-    member = guild.get_member(payload.user_id)
-    if member and not member.bot:
-        role_id = EMOJI_TO_ROLE.get(str(payload.emoji))
-        if role_id:
-            role = guild.get_role(role_id)
-            if role:
-                await member.remove_roles(role)
+    if is_target_channel_id(guild_state.rules, payload.channel_id):
+        guild_state.reactions.remove(payload.channel_id, payload.message_id, str(payload.emoji))
+    change = await panel_member_role(payload)
+    if change:
+        role_changes.remove(*change)
 
 # --- Auto Reactions & Link Filter ---
 
+def is_target_channel(rules, channel):
+    """The target channel itself, its threads, or a channel in it if the target is a category."""
+    target_id = rules.target_channel_id
+    if channel.id == target_id or getattr(channel, "parent_id", None) == target_id:
+        return True
+    category = getattr(channel, "category", None)
+    return category is not None and category.id == target_id
+
+def is_target_channel_id(rules, channel_id):
+    if channel_id == rules.target_channel_id:
+        return True
+    channel = bot.get_channel(channel_id)
+    return channel is not None and is_target_channel(rules, channel)
+
+async def remove_link_message(message):
+    await deletion_coalescer.delete(message)
+    # Repeat offenders get one digest DM per cooldown instead of one DM per message.
+    link_warnings.warn(message.author, message.channel)
+
 @bot.event
 async def on_message(message):
     if message.author.bot:
         return
 
-    is_target = (
-        message.channel.id == TARGET_CHANNEL_ID or
-        (hasattr(message.channel, "parent_id") and message.channel.parent_id == TARGET_CHANNEL_ID)
-    )
+    # Verification answers arrive as DMs and go straight to their session.
+    if message.guild is None and verification_sessions.dispatch(message):
+        return
 
-    if is_target:
-        try:
-            await message.clear_reactions()
-            await message.add_reaction("👍")
-            await message.add_reaction("👎")
-        except Exception as e:
-            print(f"Reaction error: {e}")
-
-    # Link Filtering
-    if message.channel.id not in ALLOWED_LINK_CHANNELS:
-        if "http://" in message.content or "https://" in message.content:
-            try:
-                await message.delete()
-                await message.author.send(
-                    f"⚠️ Your message with a link was removed in {message.channel.mention}."
-                )
-            except Exception:
-                pass
+    # Everything is decided up front without a REST call; the calls then run
+    # in the background and commands don't wait for any of them.
+    start = time.perf_counter()
+    emojis = ()
+    remove_link = False
+    guild_state = guilds.get(message.guild.id) if message.guild else None
+    if guild_state is not None:
+        guild_state.activity.touch(message.author.id)
+        rules = guild_state.rules
+        emojis = rules.reaction_emojis(message.channel)
+        # Link Filtering (denied domains are removed even in channels that allow links)
+        verdict = rules.link_classifier.classify(message.content)
+        remove_link = verdict == DENIED or (
+            verdict in rules.filtered_links and message.channel.id not in rules.allowed_link_channels)
+    message_tasks.record("classify", time.perf_counter() - start)
+
+    if remove_link:
+        # Commands in the message still run, as they did before removals moved to the background.
+        await message_tasks.spawn("link_removal", remove_link_message, message)
+    elif emojis:
+        # Paced per channel and sheddable; the handler doesn't wait for it.
+        auto_reactions.react(message, emojis)
 
+    start = time.perf_counter()
     await bot.process_commands(message)
+    message_tasks.record("commands", time.perf_counter() - start)
+
+@bot.event
+async def on_raw_reaction_clear(payload):
+    guild_state = guilds.get(payload.guild_id)
+    if guild_state:
+        guild_state.reactions.clear(payload.message_id)
+
+@bot.event
+async def on_raw_reaction_clear_emoji(payload):
+    guild_state = guilds.get(payload.guild_id)
+    if guild_state:
+        guild_state.reactions.clear(payload.message_id, str(payload.emoji))
+
+@bot.event
+async def on_raw_message_delete(payload):
+    guild_state = guilds.get(payload.guild_id)
+    if guild_state:
+        guild_state.reactions.forget(payload.message_id)
+
+def start_reaction_backfill():
+    global reaction_backfill_started
+    if not reaction_backfill_started:
+        reaction_backfill_started = True
+        asyncio.create_task(backfill_reaction_tally())
+
+async def backfill_reaction_tally():
+    """Fill each served guild's reaction tally from recent history once per start."""
+    after = discord.utils.utcnow() - timedelta(days=REACTION_RETENTION_DAYS)
+    for guild_state in list(guilds):
+        rules = guild_state.rules
+        channel = bot.get_channel(rules.target_channel_id) if rules else None
+        if channel is None:
+            print(f"❌ Target channel of guild {guild_state.guild_id} not found, its reaction tally starts empty.")
+            continue
+        if isinstance(channel, discord.CategoryChannel):
+            sources = channel.text_channels
+        else:
+            sources = [channel, *getattr(channel, "threads", [])]
+        for source in sources:
+            try:
+                async for msg in source.history(limit=REACTION_BACKFILL_LIMIT, after=after):
+                    guild_state.reactions.backfill(source.id, msg.id, {str(r.emoji): r.count for r in msg.reactions})
+            except discord.HTTPException as e:
+                print(f"Reaction backfill failed for {source}: {e}")
+    print(f"✅ Reaction tallies filled from history: {sum(len(g.reactions) for g in guilds)} message(s).")
 
 @bot.command(name="reactions")
-async def reactions(ctx):
-    if ctx.channel.id != TARGET_CHANNEL_ID:
+async def reactions(ctx, window: str = None):
+    guild_state = guilds.get(ctx.guild.id) if ctx.guild else None
+    if guild_state is None:
+        return
+    rules = guild_state.rules
+    text = rules.text
+
+    seconds = parse_window(window) if window else None
+    if window and seconds is None:
+        await ctx.send(text("reactions_bad_window"), delete_after=10)
+        return
+
+    if is_target_channel(rules, ctx.channel):
+        # Inside a thread (or a channel of the target category) only it counts; in the target itself all do.
+        channel_id = ctx.channel.id if ctx.channel.id != rules.target_channel_id else None
+        counts = guild_state.reactions.totals(window=seconds, channel_id=channel_id)
+        await ctx.send(text("reactions_tracked", up=counts["👍"], down=counts["👎"], total=sum(counts.values()),
+                            window=window or f"{REACTION_RETENTION_DAYS}d"))
+        return
+
+    # Other channels aren't tallied; moderators get a count of their recent history.
+    if not ctx.author.guild_permissions.manage_messages:
+        return
+    counter = 0
+    async for msg in ctx.channel.history(limit=100):
+        counter += sum(reaction.count for reaction in msg.reactions)
+    await ctx.send(text("reactions_history", total=counter))
+
+# --- Stats and Utility Commands ---
+
+@bot.command(name="stats")
+async def stats_cmd(ctx):
+    guild = ctx.guild
+    if not guild:
+        await ctx.send(text_for(guild)("guild_only"))
+        return
+    guild_state = guilds.get(guild.id)
+    if guild_state is None:
+        return
+
+    text = guild_state.rules.text
+    stats = guild_state.stats
+    stats["inactive_users"] = guild_state.activity.inactive_count(30)
+
+    embed = discord.Embed(title=text("stats_title"), color=discord.Color.blue())
+    for name in STAT_NAMES:
+        embed.add_field(name=text(f"stat_{name}"), value=stats[name], inline=True)
+    embed.add_field(name=text("stat_calls_saved"), value=deletion_coalescer.calls_saved, inline=True)
+
+    await ctx.send(embed=embed)
+
+@bot.command(name="ping")
+async def ping(ctx):
+    await ctx.send(text_for(ctx.guild)("pong", ms=round(bot.latency * 1000)))
+
+# Messages older than 14 days can't be bulk-deleted; they go one by one through this slower lane.
+old_message_queue = ActionQueue("Old message delete", rate=settings.current.clean_old_delete_rate, maxsize=100)
+
+@bot.command(name="clean")
+@commands.has_permissions(manage_messages=True)
+async def clean(ctx, amount: int, time_range: int):
+    text = text_for(ctx.guild)
+    if amount <= 0:
+        await ctx.send(text("clean_bad_amount"), delete_after=10)
+        return
+    if time_range <= 0:
+        await ctx.send(text("clean_bad_range"), delete_after=10)
+        return
+
+    time_limit = discord.utils.utcnow() - timedelta(hours=time_range)
+    status = await ctx.send(text("clean_started"))
+
+    async def report(progress):
+        outbound.submit(
+            COSMETIC, status.edit,
+            content=text("clean_progress", scanned=progress.scanned, deleted=progress.deleted)
+        )
+
+    try:
+        result = await purge_history(
+            ctx.channel, amount, time_limit.timestamp(), old_message_queue,
+            before=status,
+            runner=lambda func, *args: outbound.call(MODERATION, func, *args),
+            on_progress=report,
+        )
+    except Exception as e:
+        await status.edit(content=text("clean_error", error=e), delete_after=10)
         return
 
-    messages = await ctx.channel.history(limit=50).flatten()
+    if not result.scanned:
+        await status.edit(content=text("clean_nothing"), delete_after=10)
+        return
+    summary = text("clean_done", deleted=result.deleted, hours=time_range)
+    if result.failed:
+        summary += text("clean_failed", failed=result.failed)
+    await status.edit(content=summary, delete_after=10)
 
-    total_up = 0
-    total_down = 0
+# --- Config Reload ---
 
-    for msg in messages:
-        for reaction in msg.reactions:
-            if reaction.emoji == "👍":
-                total_up += reaction.count
-            elif reaction.emoji == "👎":
-                total_down += reaction.count
+def update_role_panels(guild_state, old_rules, rules):
+    """Forget removed role panels; post added ones and add new emojis to changed ones."""
+    old_panels = old_rules.role_panels if old_rules else {}
+    for name in old_panels.keys() - rules.role_panels.keys():
+        role_panels.unbind(guild_state.guild_id, name)
+    changed = {name for name, panel in rules.role_panels.items()
+               if name not in old_panels or panel.emoji_to_role.keys() - old_panels[name].emoji_to_role.keys()}
+    guild = bot.get_guild(guild_state.guild_id)
+    if guild and changed and bot.is_ready():
+        asyncio.create_task(setup_role_panels(guild, guild_state, changed))
 
-    await ctx.send(f"👍: {total_up}, 👎: {total_down}")
+@settings.on_reload
+def apply_config(old, new):
+    link_warnings.cooldown = new.link_warning_cooldown
+    role_changes.window = new.role_change_window
+    member_lookup.ttl = new.member_lookup_ttl
+    auto_reactions.rate = new.auto_reaction_rate
+    auto_reactions.max_delay = new.auto_reaction_max_delay
+    for guild_state in guilds.prune():
+        print(f"⚠️ Guild {guild_state.guild_id} was removed from the config and is no longer served.")
+        guild_state.ticket_pool.close()
+        for name in old.guild(guild_state.guild_id).role_panels:
+            role_panels.unbind(guild_state.guild_id, name)
+    for guild_state in guilds:
+        rules = new.guild(guild_state.guild_id)
+        if rules:
+            guild_state.raid_monitor.threshold = rules.raid_join_threshold
+            guild_state.raid_monitor.window = rules.raid_join_window
+            update_role_panels(guild_state, old.guild(guild_state.guild_id), rules)
+            guild_state.ticket_pool.size = rules.ticket_pool_size
+            guild_state.ticket_pool.interval = new.ticket_pool_interval
+            if bot.is_ready():
+                guild_state.ticket_pool.refill()
+    # on_guild_join won't fire for guilds the bot is already in, so set up newly configured ones here.
+    if bot.is_ready():
+        for guild_id in new.guilds.keys() - old.guilds.keys():
+            guild = bot.get_guild(guild_id)
+            if guild is not None and guilds.get(guild_id) is not None:
+                asyncio.create_task(setup_guild(guild))
+    for queue, rate in ((dm_queue, new.raid_dm_rate), (kick_queue, new.raid_kick_rate),
+                        (old_message_queue, new.clean_old_delete_rate)):
+        queue.bucket.set_rate(rate)
+    outbound.max_concurrency = new.outbound_max_concurrency
+    outbound.shed_backlog = new.outbound_cosmetic_backlog
 
-# --- Ban Command ---
+@bot.command(name="reload")
+@commands.has_permissions(administrator=True)
+async def reload_config(ctx):
+    try:
+        changed, needs_restart = settings.reload()
+    except ConfigError as e:
+        await ctx.send(text_for(ctx.guild)("reload_failed", error=e))
+        return
+    text = text_for(ctx.guild)
+    reply = text("reload_done", changed=", ".join(changed) or text("reload_nothing"))
+    if needs_restart:
+        reply += "\n" + text("reload_restart", keys=", ".join(needs_restart))
+    await ctx.send(reply)
+
+# --- Bans ---
+
+async def unban_expired(guild_id, user_id, channel_id):
+    guild = bot.get_guild(guild_id)
+    if guild is None:
+        # Unavailable during an outage; the scheduler keeps the ban and retries.
+        raise LookupError(f"guild {guild_id} is not available")
+    text = text_for(guild)
+    try:
+        await outbound.call(MODERATION, guild.unban, discord.Object(id=user_id), reason=text("tempban_reason"))
+    except discord.NotFound:
+        return
+    channel = guild.get_channel(channel_id) if channel_id else None
+    if channel:
+        await outbound.call(MODERATION, channel.send, text("tempban_expired", user_id=user_id))
+
+tempban_scheduler = TempBanScheduler(state, unban_expired, owns=layout.owns)
 
 @bot.command(name="ban")
 @commands.has_permissions(ban_members=True)
-async def ban(ctx, user: discord.User, duration: str = None, *, reason: str = "No reason provided"):
+async def ban(ctx, user: discord.User, duration: str = None, *, reason: str = None):
+    text = text_for(ctx.guild)
     ban_duration = None
     if duration and duration.lower() != "permanent":
         try:
@@ -295,23 +902,152 @@ async def ban(ctx, user: discord.User, duration: str = None, *, reason: str = "N
             elif unit == "h":
                 ban_duration = time_amount * 3600
             else:
-                await ctx.send("Invalid format. Use '7d', '12h', or 'permanent'.")
+                await ctx.send(text("ban_bad_format"))
                 return
         except Exception:
-            await ctx.send("Invalid duration.")
+            await ctx.send(text("ban_bad_duration"))
             return
 
-    await ctx.guild.ban(user, reason=reason)
-    await ctx.send(f"Banned {user.mention} {'permanently' if not ban_duration else f'for {duration}'}.")
-
+    await outbound.call(MODERATION, ctx.guild.ban, user, reason=reason or text("ban_no_reason"))
     if ban_duration:
-        await asyncio.sleep(ban_duration)
-        await ctx.guild.unban(user)
-        await ctx.send(f"{user.mention} has been unbanned after {duration}.")
+        await ctx.send(text("ban_temporary", user=user.mention, duration=duration))
+        tempban_scheduler.schedule(ctx.guild.id, user.id, time.time() + ban_duration, ctx.channel.id)
+    else:
+        await ctx.send(text("ban_permanent", user=user.mention))
+        tempban_scheduler.cancel(ctx.guild.id, user.id)
+
+@bot.event
+async def on_member_ban(guild, user):
+    guild_state = guilds.get(guild.id)
+    if guild_state:
+        guild_state.count_stat("banned_users")
+        guild_state.bans.add(user)
+
+@bot.event
+async def on_member_unban(guild, user):
+    # A manual unban makes any pending temporary ban obsolete.
+    tempban_scheduler.cancel(guild.id, user.id)
+    guild_state = guilds.get(guild.id)
+    if guild_state:
+        if guild_state.stats["banned_users"] > 0:
+            guild_state.count_stat("banned_users", -1)
+        guild_state.bans.remove(user.id)
+
+def start_ban_index(guild, guild_state):
+    if not guild_state.bans_started:
+        guild_state.bans_started = True
+        asyncio.create_task(fill_ban_index(guild, guild_state.bans))
+
+async def fill_ban_index(guild, ban_index):
+    try:
+        await ban_index.fill(guild)
+        print(f"✅ {guild}: ban index has {len(ban_index)} ban(s).")
+    except discord.HTTPException as e:
+        print(f"❌ {guild}: could not load the ban list: {e}")
+
+def catalog_str(key):
+    """A slash command text in the default language, translated per user by ``CatalogTranslator``."""
+    return discord.app_commands.locale_str(CATALOG.default(key), key=key)
+
+@bot.tree.command(name="unban", description=catalog_str("unban_description"))
+@discord.app_commands.describe(user=catalog_str("unban_user_description"))
+async def unban(interaction: discord.Interaction, user: str):
+    reply = interaction_text(interaction)
+    if not interaction.guild:
+        await interaction.response.send_message(reply("guild_only"), ephemeral=True)
+        return
+
+    if not interaction.user.guild_permissions.ban_members:
+        await interaction.response.send_message(reply("unban_no_permission"), ephemeral=True)
+        return
+
+    guild_state = guilds.get(interaction.guild.id)
+    if guild_state is None:
+        await interaction.response.send_message(reply("guild_not_configured"), ephemeral=True)
+        return
+    ban_index = guild_state.bans
+    text = guild_state.rules.text
+
+    if not ban_index.ready:
+        await interaction.response.send_message(reply("unban_loading"), ephemeral=True)
+        return
+
+    user_id = ban_index.resolve(user)
+    if user_id is None:
+        await interaction.response.send_message(reply("unban_not_banned", user=user), ephemeral=True)
+        return
+
+    label = ban_index.label(user_id)
+    try:
+        await outbound.call(
+            MODERATION, interaction.guild.unban, discord.Object(id=user_id),
+            reason=text("unban_reason", user=interaction.user)
+        )
+        await interaction.response.send_message(text("unban_done", user=label))
+    except discord.NotFound:
+        ban_index.remove(user_id)
+        await interaction.response.send_message(reply("unban_not_banned", user=label), ephemeral=True)
+    except Exception as e:
+        await interaction.response.send_message(reply("error", error=e), ephemeral=True)
+
+@unban.autocomplete("user")
+async def unban_autocomplete(interaction: discord.Interaction, current: str):
+    guild_state = guilds.get(interaction.guild.id) if interaction.guild else None
+    if guild_state is None:
+        return []
+    return [
+        discord.app_commands.Choice(name=label[:100], value=str(user_id))
+        for label, user_id in guild_state.bans.complete(current)
+    ]
+
+# --- Metrics ---
+
+def stat_total(name):
+    return sum(guild_state.stats[name] for guild_state in guilds)
+
+# The !stats counters are exported as they are (summed over guilds), so they keep their saved totals.
+metrics.callback("filar_verifications_total", "Finished verification challenges.",
+                 lambda: {("passed",): stat_total("passed_verification"), ("failed",): stat_total("failed_verification")},
+                 ("result",), kind="counter")
+metrics.callback("filar_members_joined_total", "Members that joined.", lambda: stat_total("users_joined"), kind="counter")
+metrics.callback("filar_members_left_total", "Members that left.", lambda: stat_total("users_left"), kind="counter")
+metrics.callback("filar_banned_members", "Members banned from the served guilds.",
+                 lambda: sum(len(g.bans) if g.bans.ready else g.stats["banned_users"] for g in guilds))
+metrics.callback("filar_inactive_members", "Members without a message in the last 30 days.",
+                 lambda: sum(g.activity.inactive_count(30) for g in guilds))
+metrics.callback("filar_gateway_latency_seconds", "Gateway heartbeat latency.", lambda: bot.latency)
+metrics.callback("filar_guilds_served", "Guilds with settings that this process serves.", lambda: len(guilds))
+metrics.callback("filar_raid_mode", "Guilds in raid mode.", lambda: sum(g.raid_monitor.active for g in guilds))
+metrics.callback("filar_raid_queue_waiting", "Actions waiting in the raid queues.",
+                 lambda: {("dm",): dm_queue.depth, ("kick",): kick_queue.depth, ("old_message",): old_message_queue.depth},
+                 ("queue",))
+metrics.callback("filar_pending_verifications", "Members with an open verification challenge.",
+                 lambda: len(verification_sessions))
+metrics.callback("filar_open_tickets", "Open ticket channels.", lambda: sum(len(g.tickets) for g in guilds))
+metrics.callback("filar_pending_unbans", "Temporary bans waiting to expire.", lambda: len(tempban_scheduler))
+metrics.callback("filar_delete_calls_saved_total", "REST calls saved by bulk-deleting filtered links.",
+                 lambda: deletion_coalescer.calls_saved, kind="counter")
+metrics.callback("filar_member_lookups_total", "Members handlers needed that the gateway cache didn't have.",
+                 lambda: {("cached",): member_lookup.hits, ("fetched",): member_lookup.fetches},
+                 labelnames=("result",), kind="counter")
+metrics.callback("filar_auto_reactions_total", "Auto-reactions added, skipped as already present, or shed.",
+                 lambda: {("added",): auto_reactions.added, ("skipped",): auto_reactions.skipped,
+                          ("shed",): auto_reactions.shed},
+                 labelnames=("result",), kind="counter")
+metrics.callback("filar_ticket_pool_spare", "Spare ticket channels ready to be claimed.",
+                 lambda: sum(len(g.ticket_pool) for g in guilds))
+metrics.callback("filar_ticket_pool_claimed_total", "Tickets opened in a spare channel instead of a new one.",
+                 lambda: sum(g.ticket_pool.claimed for g in guilds), kind="counter")
+metrics.callback("filar_role_calls_saved_total", "Reaction-role changes merged into another role edit.",
+                 lambda: role_changes.calls_saved, kind="counter")
+metrics.callback("filar_warning_dms_saved_total", "Link warnings folded into a digest DM.",
+                 lambda: link_warnings.dms_saved, kind="counter")
+instrument_bot(metrics, bot, views=(TicketButton,))
 
 # --- Run Bot ---
 
-if not TOKEN or TOKEN == "TOKEN_HERE":
-    print("❌ Token not set in config.json.")
-else:
-    bot.run(TOKEN)
+if __name__ == "__main__":
+    if not TOKEN or TOKEN == "TOKEN_HERE":
+        print("❌ Token not set in config.json.")
+    else:
+        bot.run(TOKEN)
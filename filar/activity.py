@@ -0,0 +1,95 @@
+import time
+
+from filar.userstate import CompactIdMap
+
+NEVER = 0
+
+
+def today():
+    return int(time.time() // 86400)
+
+
+class ActivityIndex:
+    """Members bucketed by the day they were last active.
+
+    Each member maps to an epoch day (``NEVER`` if they haven't written
+    anything yet) and a per-day counter is kept alongside, so counting the
+    members active within N days only walks the distinct days rather than
+    every member. Days are kept in a ``CompactIdMap`` (10 bytes per member)
+    and every change is written through to a ``StateStore``, which batches
+    them; a member is written at most once a day.
+    """
+
+    def __init__(self, store, namespace="activity"):
+        self.store = store
+        self.namespace = namespace
+        self._day_of = CompactIdMap("H")
+        self._day_counts = {}
+        self.load()
+
+    def __len__(self):
+        return len(self._day_of)
+
+    def __contains__(self, member_id):
+        return member_id in self._day_of
+
+    def _set(self, member_id, day):
+        old = self._day_of.get(member_id)
+        if old == day:
+            return
+        if old is not None:
+            self._day_counts[old] -= 1
+            if not self._day_counts[old]:
+                del self._day_counts[old]
+        self._day_of[member_id] = day
+        self._day_counts[day] = self._day_counts.get(day, 0) + 1
+        self.store.set(self.namespace, member_id, day)
+
+    def touch(self, member_id, day=None):
+        """Mark a member active today (or on ``day``)."""
+        self._set(member_id, day if day is not None else today())
+
+    def add(self, member_id):
+        """Track a member without recording any activity."""
+        if member_id not in self._day_of:
+            self._set(member_id, NEVER)
+
+    def remove(self, member_id):
+        day = self._day_of.pop(member_id, None)
+        if day is not None:
+            self._day_counts[day] -= 1
+            if not self._day_counts[day]:
+                del self._day_counts[day]
+            self.store.delete(self.namespace, member_id)
+
+    def sync(self, member_ids):
+        """Match the index to the current member list. Returns (added, removed)."""
+        current = set(member_ids)
+        gone = [member_id for member_id in self._day_of if member_id not in current]
+        for member_id in gone:
+            self.remove(member_id)
+        new = [member_id for member_id in current if member_id not in self._day_of]
+        if new:
+            self._day_of.update((member_id, NEVER) for member_id in new)
+            self._day_counts[NEVER] = self._day_counts.get(NEVER, 0) + len(new)
+            self.store.update(self.namespace, ((member_id, NEVER) for member_id in new))
+        return len(new), len(gone)
+
+    def last_active_day(self, member_id):
+        day = self._day_of.get(member_id)
+        return None if day in (None, NEVER) else day
+
+    def active_count(self, days):
+        cutoff = today() - days
+        return sum(count for day, count in self._day_counts.items() if day >= cutoff)
+
+    def inactive_count(self, days):
+        return len(self._day_of) - self.active_count(days)
+
+    def load(self):
+        self._day_of.clear()
+        self._day_counts.clear()
+        data = self.store.load(self.namespace)
+        self._day_of.update((int(member_id), day) for member_id, day in data.items())
+        for day in data.values():
+            self._day_counts[day] = self._day_counts.get(day, 0) + 1
@@ -0,0 +1,70 @@
+import asyncio
+
+from filar.outbound import direct
+
+
+class AutoReactor:
+    """Adds a channel's emoji set to new messages with only the calls that are needed.
+
+    The reactions already on the message are read from its payload, so only
+    missing emojis are added (a new message has none, so nothing needs
+    clearing). Discord limits reactions per channel, so every channel gets
+    its own schedule of at most ``rate`` reactions per second; a message
+    waits for free slots and its emojis go out in order. When a channel is
+    more than ``max_delay`` seconds behind, new messages there get no
+    reactions until it catches up. ``runner`` makes the ``add_reaction``
+    calls.
+    """
+
+    def __init__(self, rate=3, max_delay=10.0, runner=None):
+        self.rate = rate
+        self.max_delay = max_delay
+        self.runner = runner or direct
+        # channel_id -> loop time the channel's next reaction may go out
+        self._next_slot = {}
+        self._tasks = set()
+        self.added = 0
+        self.skipped = 0
+        self.shed = 0
+
+    def __len__(self):
+        """Messages still waiting for reactions."""
+        return len(self._tasks)
+
+    def react(self, message, emojis):
+        """Schedule the ``emojis`` missing from ``message``."""
+        present = {str(reaction.emoji) for reaction in message.reactions if reaction.me}
+        missing = [emoji for emoji in emojis if emoji not in present]
+        self.skipped += len(emojis) - len(missing)
+        if not missing:
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        channel_id = message.channel.id
+        start = max(now, self._next_slot.get(channel_id, now))
+        if start - now > self.max_delay:
+            self.shed += len(missing)
+            return
+        interval = 1 / self.rate
+        self._next_slot[channel_id] = start + len(missing) * interval
+        task = asyncio.create_task(self._add(message, missing, start, interval))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _add(self, message, emojis, start, interval):
+        loop = asyncio.get_running_loop()
+        try:
+            for i, emoji in enumerate(emojis):
+                delay = start + i * interval - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await self.runner(message.add_reaction, emoji)
+                self.added += 1
+        except Exception as e:
+            print(f"Reaction error: {e}")
+        finally:
+            self._forget_idle(message.channel.id, loop.time())
+
+    def _forget_idle(self, channel_id, now):
+        if self._next_slot.get(channel_id, now) <= now:
+            self._next_slot.pop(channel_id, None)
@@ -0,0 +1,117 @@
+import re
+from bisect import bisect_left, insort
+
+_MENTION = re.compile(r"<@!?(\d+)>")
+
+
+def normalize_name(name):
+    """Lower-case a username and drop a ``#0``/``#0000`` discriminator."""
+    name = name.strip().lstrip("@").casefold()
+    if name.endswith("#0") or name.endswith("#0000"):
+        name = name.rsplit("#", 1)[0]
+    return name
+
+
+def user_key(user):
+    """Name a user is looked up by: ``name#1234`` for legacy accounts, otherwise ``name``."""
+    discriminator = getattr(user, "discriminator", "0")
+    if discriminator and discriminator.strip("0"):
+        return normalize_name(f"{user.name}#{discriminator}")
+    return normalize_name(user.name)
+
+
+class BanIndex:
+    """Local copy of one guild's ban list, keyed by user id and by name.
+
+    Filled once from ``guild.bans()`` and then kept current from ban and
+    unban events. Names are also kept in a sorted list so autocomplete can
+    find every ban whose name starts with what was typed with a bisect.
+    """
+
+    def __init__(self):
+        # user_id -> (name key, display label)
+        self._users = {}
+        self._by_name = {}
+        self._sorted = []
+        self._unbanned_during_fill = set()
+        self.ready = False
+
+    def __len__(self):
+        return len(self._users)
+
+    def __contains__(self, user_id):
+        return user_id in self._users
+
+    def label(self, user_id):
+        entry = self._users.get(user_id)
+        return entry[1] if entry else None
+
+    async def fill(self, guild):
+        """Load the full ban list. Ban and unban events that arrive meanwhile win."""
+        self.ready = False
+        self._unbanned_during_fill.clear()
+        async for entry in guild.bans(limit=None):
+            user = entry.user
+            if user.id not in self._users and user.id not in self._unbanned_during_fill:
+                self._sorted.append((self._store(user), user.id))
+        self._sorted.sort()
+        self._unbanned_during_fill.clear()
+        self.ready = True
+
+    def _store(self, user):
+        key = user_key(user)
+        self._users[user.id] = (key, str(user))
+        self._by_name.setdefault(key, set()).add(user.id)
+        return key
+
+    def add(self, user):
+        self.remove(user.id)
+        self._unbanned_during_fill.discard(user.id)
+        insort(self._sorted, (self._store(user), user.id))
+
+    def remove(self, user_id):
+        if not self.ready:
+            self._unbanned_during_fill.add(user_id)
+        entry = self._users.pop(user_id, None)
+        if entry is None:
+            return False
+        key = entry[0]
+        ids = self._by_name[key]
+        ids.discard(user_id)
+        if not ids:
+            del self._by_name[key]
+        if self.ready:
+            i = bisect_left(self._sorted, (key, user_id))
+            del self._sorted[i]
+        else:
+            # The list is only sorted once the fill is done.
+            self._sorted.remove((key, user_id))
+        return True
+
+    def resolve(self, query):
+        """User id for an id, mention or (legacy) username, or None if not banned."""
+        query = query.strip()
+        match = _MENTION.fullmatch(query)
+        if match or query.isdigit():
+            user_id = int(match.group(1) if match else query)
+            if user_id in self._users:
+                return user_id
+        ids = self._by_name.get(normalize_name(query))
+        if ids and len(ids) == 1:
+            return next(iter(ids))
+        return None
+
+    def complete(self, prefix, limit=25):
+        """Up to ``limit`` ``(label, user_id)`` pairs whose name starts with ``prefix``."""
+        prefix = normalize_name(prefix)
+        if prefix.isdigit() and int(prefix) in self._users:
+            return [(self.label(int(prefix)), int(prefix))]
+        results = []
+        i = bisect_left(self._sorted, (prefix,))
+        while i < len(self._sorted) and len(results) < limit:
+            key, user_id = self._sorted[i]
+            if not key.startswith(prefix):
+                break
+            results.append((self._users[user_id][1], user_id))
+            i += 1
+        return results
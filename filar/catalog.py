@@ -0,0 +1,92 @@
+import json
+import os
+import string
+
+LOCALES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "locales")
+DEFAULT_LOCALE = "en"
+
+
+class CatalogError(Exception):
+    """A locale file is unreadable, misses a message or uses an unknown placeholder."""
+
+
+def placeholders(template):
+    return {name.split(".")[0].split("[")[0] for _, name, _, _ in string.Formatter().parse(template) if name}
+
+
+class Messages:
+    """The messages of one locale: ``text(key, **fields)`` renders one.
+
+    Every template is compiled to its bound ``str.format`` when the catalog
+    is loaded, so rendering a message is one dict lookup and the format.
+    """
+
+    __slots__ = ("locale", "_render")
+
+    def __init__(self, locale, templates):
+        self.locale = locale
+        self._render = {key: template.format for key, template in templates.items()}
+
+    def __call__(self, key, **fields):
+        return self._render[key](**fields)
+
+    def __repr__(self):
+        return f"<Messages {self.locale}>"
+
+
+class Catalog:
+    """Bot messages for every locale, from one ``<locale>.json`` file each.
+
+    ``DEFAULT_LOCALE`` defines the keys. Other locales must have all of them
+    and may only use placeholders the default template uses, so a typo in a
+    translation stops the bot at startup instead of failing in a handler.
+    """
+
+    def __init__(self, templates, default=DEFAULT_LOCALE):
+        if default not in templates:
+            raise CatalogError(f"no messages for the default locale {default!r}")
+        base = templates[default]
+        for locale, messages in templates.items():
+            missing = sorted(set(base) - set(messages))
+            extra = sorted(set(messages) - set(base))
+            if missing or extra:
+                raise CatalogError(f"{locale}: missing {', '.join(missing) or '-'}, unknown {', '.join(extra) or '-'}")
+            for key, template in messages.items():
+                try:
+                    unknown = placeholders(template) - placeholders(base[key])
+                except ValueError as e:
+                    raise CatalogError(f"{locale}.{key}: {e}") from e
+                if unknown:
+                    raise CatalogError(f"{locale}.{key} uses unknown placeholders: {', '.join(sorted(unknown))}")
+        self._locales = {locale: Messages(locale, messages) for locale, messages in templates.items()}
+        self.default = self._locales[default]
+
+    @classmethod
+    def load(cls, directory=LOCALES_DIR):
+        templates = {}
+        for name in sorted(os.listdir(directory)):
+            locale, ext = os.path.splitext(name)
+            if ext != ".json":
+                continue
+            try:
+                with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+                    templates[locale] = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                raise CatalogError(f"Could not read {name}: {e}") from e
+        return cls(templates)
+
+    def __contains__(self, locale):
+        return locale in self._locales
+
+    def __iter__(self):
+        return iter(self._locales)
+
+    def __getitem__(self, locale):
+        return self._locales[locale]
+
+    def for_client(self, locale, fallback):
+        """Messages for a Discord client locale such as ``"en-US"`` or ``"pl"``, else ``fallback``."""
+        return self._locales.get(str(locale).partition("-")[0], fallback)
+
+
+CATALOG = Catalog.load()
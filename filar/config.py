@@ -0,0 +1,429 @@
+import asyncio
+import json
+import os
+
+from filar.catalog import CATALOG
+from filar.links import INVITE, LINK, LinkClassifier
+
+_REQUIRED = object()
+# link_filter -> what is removed outside allowed_link_channels (denied domains go everywhere).
+LINK_FILTERS = {"links": frozenset({LINK, INVITE}), "invites": frozenset({INVITE})}
+# "full" caches every member at startup; "lean" caches none and looks them up when needed.
+MEMBER_CACHE_MODES = ("full", "lean")
+
+
+class ConfigError(Exception):
+    """config.json is missing, unreadable or has an invalid value."""
+
+
+def _check_str(key, value):
+    if not isinstance(value, str):
+        raise ConfigError(f"{key} must be a string")
+    return value
+
+
+def _check_id(key, value):
+    if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+        raise ConfigError(f"{key} must be a Discord ID (a positive integer)")
+    return value
+
+
+def _check_optional_id(key, value):
+    return None if value is None else _check_id(key, value)
+
+
+def _check_ids(key, value):
+    if not isinstance(value, list):
+        raise ConfigError(f"{key} must be a list of Discord IDs")
+    return frozenset(_check_id(key, item) for item in value)
+
+
+def _check_domains(key, value):
+    if not isinstance(value, list):
+        raise ConfigError(f"{key} must be a list of domains")
+    return tuple(_check_str(key, item).strip().lower() for item in value)
+
+
+def _check_emoji_roles(key, value):
+    if not isinstance(value, dict):
+        raise ConfigError(f"{key} must map emojis to role IDs")
+    return {_check_str(key, emoji): _check_id(f"{key}[{emoji}]", role_id) for emoji, role_id in value.items()}
+
+
+def _check_emojis(key, value):
+    if not isinstance(value, list):
+        raise ConfigError(f"{key} must be a list of emojis")
+    return tuple(_check_str(key, emoji) for emoji in value)
+
+
+def _check_channel_emojis(key, value):
+    if not isinstance(value, dict):
+        raise ConfigError(f"{key} must map channel IDs to lists of emojis")
+    channels = {}
+    for channel_id, emojis in value.items():
+        try:
+            channel_id = int(channel_id)
+        except ValueError:
+            raise ConfigError(f"{key}: {channel_id!r} is not a channel ID") from None
+        channels[_check_id(key, channel_id)] = _check_emojis(f"{key}.{channel_id}", emojis)
+    return channels
+
+
+def _check_role_panels(key, value):
+    if not isinstance(value, dict):
+        raise ConfigError(f"{key} must map panel names to their settings")
+    panels = {}
+    for name, panel in value.items():
+        if name == "ticket_message":
+            raise ConfigError(f"{key}: {name} is reserved")
+        if not isinstance(panel, dict) or "emoji_to_role" not in panel:
+            raise ConfigError(f"{key}.{name} must be an object with emoji_to_role")
+        unknown = sorted(set(panel) - {"channel_id", "title", "emoji_to_role"})
+        if unknown:
+            raise ConfigError(f"{key}.{name}: unknown keys {', '.join(unknown)}")
+        panels[name] = {
+            "channel_id": _check_id(f"{key}.{name}.channel_id", panel["channel_id"]) if "channel_id" in panel else None,
+            "title": _check_str(f"{key}.{name}.title", panel["title"]) if "title" in panel else None,
+            "emoji_to_role": _check_emoji_roles(f"{key}.{name}.emoji_to_role", panel["emoji_to_role"]),
+        }
+    return panels
+
+
+def _check_positive(key, value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        raise ConfigError(f"{key} must be a positive number")
+    return value
+
+
+def _check_count(key, value):
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ConfigError(f"{key} must be a whole number of at least 1")
+    return value
+
+
+def _check_size(key, value):
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        raise ConfigError(f"{key} must be a whole number (0 turns it off)")
+    return value
+
+
+def _check_port(key, value):
+    if isinstance(value, bool) or not isinstance(value, int) or not 0 <= value <= 65535:
+        raise ConfigError(f"{key} must be a port number (0 disables it)")
+    return value
+
+
+def _check_bool(key, value):
+    if not isinstance(value, bool):
+        raise ConfigError(f"{key} must be true or false")
+    return value
+
+
+def _check_locale(key, value):
+    if value not in CATALOG:
+        raise ConfigError(f"{key} must be one of: {', '.join(CATALOG)}")
+    return value
+
+
+def _check_link_filter(key, value):
+    if value not in LINK_FILTERS:
+        raise ConfigError(f"{key} must be one of: {', '.join(LINK_FILTERS)}")
+    return value
+
+
+def _check_member_cache(key, value):
+    if value not in MEMBER_CACHE_MODES:
+        raise ConfigError(f"{key} must be one of: {', '.join(MEMBER_CACHE_MODES)}")
+    return value
+
+
+def _check_shard_count(key, value):
+    return None if value is None else _check_count(key, value)
+
+
+def _check_shard_ids(key, value):
+    if value is None:
+        return None
+    if not isinstance(value, list) or any(isinstance(i, bool) or not isinstance(i, int) or i < 0 for i in value):
+        raise ConfigError(f"{key} must be a list of shard numbers")
+    return tuple(sorted(set(value)))
+
+
+def _check_interval(key, value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+        raise ConfigError(f"{key} must be a number of seconds (0 disables it)")
+    return value
+
+
+# key -> (check, default, reloadable). Keys that aren't reloadable keep their
+# startup value until the bot is restarted.
+SCHEMA = {
+    "token": (_check_str, _REQUIRED, False),
+    "prefix": (_check_str, "!", False),
+    "locale": (_check_locale, "en", True),
+    "guild_id": (_check_id, _REQUIRED, False),
+    "ticket_channel_id": (_check_id, _REQUIRED, False),
+    "staff_role_id": (_check_id, _REQUIRED, True),
+    "role_channel_id": (_check_id, _REQUIRED, False),
+    "target_channel_id": (_check_id, _REQUIRED, True),
+    "allowed_link_channels": (_check_ids, [], True),
+    "emoji_to_role": (_check_emoji_roles, {}, True),
+    "role_panels": (_check_role_panels, {}, True),
+    "link_allow_domains": (_check_domains, [], True),
+    "link_deny_domains": (_check_domains, [], True),
+    "link_filter": (_check_link_filter, "links", True),
+    "auto_reactions": (_check_bool, True, True),
+    "auto_reaction_emojis": (_check_emojis, ["👍", "👎"], True),
+    "auto_reaction_channels": (_check_channel_emojis, {}, True),
+    "auto_reaction_rate": (_check_positive, 3, True),
+    "auto_reaction_max_delay": (_check_positive, 10, True),
+    "ticket_pool_size": (_check_size, 0, True),
+    "ticket_pool_category_id": (_check_optional_id, None, True),
+    "ticket_pool_interval": (_check_positive, 5, True),
+    "link_warning_cooldown": (_check_interval, 60, True),
+    "role_change_window": (_check_interval, 0.5, True),
+    "state_file": (_check_str, "filar_state.db", False),
+    # Pre-state_file JSON files, imported into the state store once if present.
+    "temp_bans_file": (_check_str, "temp_bans.json", False),
+    "tickets_file": (_check_str, "open_tickets.json", False),
+    "activity_file": (_check_str, "activity.json", False),
+    "reaction_retention_days": (_check_count, 7, False),
+    "reaction_backfill_limit": (_check_count, 1000, False),
+    "verification_ttl_days": (_check_count, 30, False),
+    "raid_join_threshold": (_check_count, 10, True),
+    "raid_join_window": (_check_positive, 10, True),
+    "raid_dm_rate": (_check_positive, 2, True),
+    "raid_kick_rate": (_check_positive, 2, True),
+    "raid_queue_size": (_check_count, 200, False),
+    "outbound_max_concurrency": (_check_count, 8, True),
+    "outbound_cosmetic_backlog": (_check_count, 50, True),
+    "message_task_limit": (_check_count, 200, False),
+    "clean_old_delete_rate": (_check_positive, 1, True),
+    "config_watch_interval": (_check_interval, 5, False),
+    "metrics_host": (_check_str, "127.0.0.1", False),
+    "metrics_port": (_check_port, 9108, False),
+    "shard_count": (_check_shard_count, None, False),
+    "shard_ids": (_check_shard_ids, None, False),
+    "member_cache": (_check_member_cache, "full", False),
+    "member_lookup_size": (_check_count, 1000, False),
+    "member_lookup_ttl": (_check_positive, 300, True),
+}
+
+# Keys a guild under "guilds" can set for itself; the rest of its settings
+# come from the top level. The first four have no sensible shared value.
+GUILD_KEYS = (
+    "ticket_channel_id", "role_channel_id", "target_channel_id", "staff_role_id",
+    "allowed_link_channels", "emoji_to_role", "role_panels", "link_allow_domains", "link_deny_domains",
+    "raid_join_threshold", "raid_join_window", "locale", "link_filter", "auto_reactions",
+    "auto_reaction_emojis", "auto_reaction_channels", "ticket_pool_size", "ticket_pool_category_id",
+)
+_GUILD_REQUIRED = GUILD_KEYS[:4]
+# IDs that only mean something in one guild, so other guilds start from the default instead of inheriting them.
+_GUILD_SCOPED = ("allowed_link_channels", "emoji_to_role", "role_panels", "auto_reaction_channels",
+                 "ticket_pool_category_id")
+
+
+def _check_guilds(key, value):
+    if not isinstance(value, dict):
+        raise ConfigError(f"{key} must map guild IDs to their settings")
+    guilds = {}
+    for guild_id, overrides in value.items():
+        guild_id = _check_id(f"{key} key {guild_id!r}", int(guild_id) if str(guild_id).isdigit() else guild_id)
+        if not isinstance(overrides, dict):
+            raise ConfigError(f"{key}.{guild_id} must be an object")
+        unknown = sorted(set(overrides) - set(GUILD_KEYS))
+        if unknown:
+            raise ConfigError(f"{key}.{guild_id}: {', '.join(unknown)} can't be set per guild")
+        missing = [name for name in _GUILD_REQUIRED if name not in overrides]
+        if missing:
+            raise ConfigError(f"{key}.{guild_id} is missing {', '.join(missing)}")
+        guilds[guild_id] = {name: SCHEMA[name][0](f"{key}.{guild_id}.{name}", item) for name, item in overrides.items()}
+    return guilds
+
+
+SCHEMA["guilds"] = (_check_guilds, {}, True)
+
+
+# Name of the panel built from role_channel_id and emoji_to_role when no role_panels are set.
+DEFAULT_ROLE_PANEL = "role_message"
+
+
+class RolePanel:
+    """One self-assign panel: where it is posted, its title (None for the default) and its emoji → role map."""
+
+    def __init__(self, name, channel_id, emoji_to_role, title=None):
+        self.name = name
+        self.channel_id = channel_id
+        self.emoji_to_role = emoji_to_role
+        self.title = title
+
+
+class GuildConfig:
+    """The settings of one guild, with its link classifier and messages looked up once.
+
+    ``text`` is the ``Messages`` of the guild's locale. ``role_panels`` maps
+    panel names to ``RolePanel``; without a ``role_panels`` setting it is
+    the one panel from ``role_channel_id`` and ``emoji_to_role``, or none
+    if that maps no emojis.
+    ``reaction_sets`` maps channel, forum and category IDs to the emojis
+    new messages there get (none if ``auto_reactions`` is off).
+    """
+
+    def __init__(self, guild_id, values):
+        self.guild_id = guild_id
+        for key in GUILD_KEYS:
+            setattr(self, key, values[key])
+        self.link_classifier = LinkClassifier(
+            allow_domains=self.link_allow_domains, deny_domains=self.link_deny_domains
+        )
+        self.filtered_links = LINK_FILTERS[self.link_filter]
+        self.text = CATALOG[self.locale]
+        if self.role_panels:
+            self.role_panels = {
+                name: RolePanel(name, panel["channel_id"] or self.role_channel_id, panel["emoji_to_role"], panel["title"])
+                for name, panel in self.role_panels.items()
+            }
+        elif self.emoji_to_role:
+            self.role_panels = {DEFAULT_ROLE_PANEL: RolePanel(DEFAULT_ROLE_PANEL, self.role_channel_id, self.emoji_to_role)}
+        self.reaction_sets = {}
+        if self.auto_reactions:
+            self.reaction_sets = {self.target_channel_id: self.auto_reaction_emojis, **self.auto_reaction_channels}
+
+    def reaction_emojis(self, channel):
+        """Emojis for a new message in ``channel``: its own set, else its parent's (threads, forum posts), else its category's."""
+        sets = self.reaction_sets
+        if not sets:
+            return ()
+        for channel_id in (channel.id, getattr(channel, "parent_id", None)):
+            if channel_id in sets:
+                return sets[channel_id]
+        category = getattr(channel, "category", None)
+        return sets.get(category.id, ()) if category is not None else ()
+
+
+class Config:
+    """Validated settings from config.json, with the lookups built from them.
+
+    Every key in ``SCHEMA`` is an attribute (lists of IDs become frozensets).
+    The top-level settings describe ``guild_id``; other guilds are listed
+    under ``guilds`` and inherit what they don't set, except channel and
+    role IDs (``_GUILD_SCOPED``). ``guild(guild_id)``
+    returns a guild's ``GuildConfig``, or None for guilds the bot doesn't
+    serve. Treat it as read-only: a reload builds a new ``Config`` and swaps
+    the reference.
+    """
+
+    def __init__(self, raw):
+        if not isinstance(raw, dict):
+            raise ConfigError("config.json must contain a JSON object")
+        self.raw = raw
+        self.values = {}
+        for key, (check, default, _) in SCHEMA.items():
+            if key in raw:
+                value = check(key, raw[key])
+            elif default is _REQUIRED:
+                raise ConfigError(f"{key} is missing")
+            else:
+                value = check(key, default)
+            self.values[key] = value
+            setattr(self, key, value)
+        self.unknown_keys = sorted(set(raw) - set(SCHEMA))
+        if self.shard_ids is not None:
+            if self.shard_count is None:
+                raise ConfigError("shard_ids needs shard_count")
+            if self.shard_ids and self.shard_ids[-1] >= self.shard_count:
+                raise ConfigError("shard_ids must be below shard_count")
+
+        # Replaces the raw "guilds" value; that stays in values["guilds"].
+        self.guilds = {self.guild_id: GuildConfig(self.guild_id, self.values)}
+        inherited = dict(self.values)
+        for key in _GUILD_SCOPED:
+            inherited[key] = SCHEMA[key][0](key, SCHEMA[key][1])
+        for guild_id, overrides in self.values["guilds"].items():
+            self.guilds[guild_id] = GuildConfig(guild_id, {**inherited, **overrides})
+        self.link_classifier = self.guilds[self.guild_id].link_classifier
+
+    def guild(self, guild_id):
+        return self.guilds.get(guild_id)
+
+
+class ConfigManager:
+    """Holds the current ``Config`` and reloads it from disk on request.
+
+    ``current`` is replaced in one assignment, so a handler that reads it
+    once sees either the old settings or the new ones, never a mix.
+    Callbacks registered with ``on_reload`` get ``(old, new)`` after a swap.
+    """
+
+    def __init__(self, path="config.json"):
+        self.path = path
+        self.current = Config(self._read())
+        self._mtime = self._stat()
+        self._listeners = []
+        self._task = None
+        if self.current.unknown_keys:
+            print(f"⚠️ Unknown config keys ignored: {', '.join(self.current.unknown_keys)}")
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise ConfigError(f"Could not read {self.path}: {e}") from e
+
+    def _stat(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def on_reload(self, callback):
+        self._listeners.append(callback)
+        return callback
+
+    def reload(self):
+        """Re-read the file and swap it in.
+
+        Returns ``(changed, needs_restart)``: keys now in effect, and changed
+        keys that keep their old value until a restart. Raises ``ConfigError``
+        and keeps the current config if the file is invalid.
+        """
+        self._mtime = self._stat()
+        old = self.current
+        raw = self._read()
+        new = Config(raw)
+        needs_restart = [key for key, (_, _, reloadable) in SCHEMA.items()
+                         if not reloadable and new.values[key] != old.values[key]]
+        if needs_restart:
+            raw = dict(raw)
+            for key in needs_restart:
+                if key in old.raw:
+                    raw[key] = old.raw[key]
+                else:
+                    del raw[key]
+            new = Config(raw)
+        changed = [key for key in SCHEMA if new.values[key] != old.values[key]]
+        self.current = new
+        for callback in self._listeners:
+            callback(old, new)
+        return changed, needs_restart
+
+    def start(self):
+        """Poll the file every ``config_watch_interval`` seconds and reload on change."""
+        interval = self.current.config_watch_interval
+        if interval and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._watch(interval))
+
+    async def _watch(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            if self._stat() == self._mtime:
+                continue
+            try:
+                changed, needs_restart = self.reload()
+            except ConfigError as e:
+                print(f"❌ {self.path} changed but was not applied: {e}")
+                continue
+            print(f"✅ Reloaded {self.path}: {', '.join(changed) or 'no changes'}.")
+            if needs_restart:
+                print(f"⚠️ Restart needed for: {', '.join(needs_restart)}")
@@ -0,0 +1,161 @@
+import asyncio
+import time
+
+from filar.outbound import direct
+from filar.reactions import snowflake_time
+
+BULK_DELETE_LIMIT = 100
+# Discord refuses bulk deletes of messages older than 14 days; keep a minute of margin.
+BULK_DELETE_MAX_AGE = 14 * 86400 - 60
+
+
+class DeletionCoalescer:
+    """Collects message deletions per channel and sends them as bulk deletes.
+
+    Deletions requested within ``window`` seconds of the first one in a
+    channel are flushed together with ``channel.delete_messages`` (up to 100
+    per call). A lone message, or one too old for bulk delete, is deleted on
+    its own. ``delete`` waits for the flush and raises if the delete failed,
+    so callers can treat it like ``message.delete()``. The deletes
+    themselves go through ``runner``.
+    """
+
+    def __init__(self, window=0.05, runner=None):
+        self.window = window
+        self.runner = runner or direct
+        # channel_id -> {message_id: (message, future)}
+        self._batches = {}
+        self.requested = 0
+        self.rest_calls = 0
+
+    @property
+    def calls_saved(self):
+        return self.requested - self.rest_calls
+
+    async def delete(self, message):
+        loop = asyncio.get_running_loop()
+        channel = message.channel
+        batch = self._batches.get(channel.id)
+        if batch is None:
+            batch = self._batches[channel.id] = {}
+            asyncio.create_task(self._flush_later(channel, batch))
+
+        entry = batch.get(message.id)
+        if entry is None:
+            entry = batch[message.id] = (message, loop.create_future())
+            self.requested += 1
+            if len(batch) >= BULK_DELETE_LIMIT:
+                del self._batches[channel.id]
+                asyncio.create_task(self._flush(channel, batch))
+        await asyncio.shield(entry[1])
+
+    async def _flush_later(self, channel, batch):
+        await asyncio.sleep(self.window)
+        if self._batches.get(channel.id) is batch:
+            del self._batches[channel.id]
+            await self._flush(channel, batch)
+
+    async def _flush(self, channel, batch):
+        cutoff = time.time() - BULK_DELETE_MAX_AGE
+        recent = [entry for message_id, entry in batch.items() if snowflake_time(message_id) > cutoff]
+        single = [entry for message_id, entry in batch.items() if snowflake_time(message_id) <= cutoff]
+
+        if len(recent) >= 2:
+            try:
+                self.rest_calls += 1
+                await self.runner(channel.delete_messages, [message for message, _ in recent])
+                for _, future in recent:
+                    if not future.done():
+                        future.set_result(None)
+                print(f"🧹 Bulk-deleted {len(recent)} messages in #{channel}, saved {len(recent) - 1} API calls.")
+            except Exception as e:
+                print(f"Bulk delete in #{channel} failed, deleting one by one: {e}")
+                single.extend(recent)
+        else:
+            single.extend(recent)
+
+        for message, future in single:
+            try:
+                self.rest_calls += 1
+                await self.runner(message.delete)
+                if not future.done():
+                    future.set_result(None)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+
+
+class PurgeStats:
+    """Running counts for one ``purge_history`` call."""
+
+    def __init__(self):
+        self.scanned = 0
+        self.deleted = 0
+        self.old = 0
+        self.failed = 0
+
+
+async def purge_history(channel, amount, after, single_queue, before=None, runner=None,
+                        on_progress=None, progress_interval=2.0):
+    """Delete up to ``amount`` of the newest messages in ``channel`` sent after ``after``.
+
+    History is walked newest first and the walk ends at the first message
+    at or before ``after`` (epoch seconds). Recent messages are bulk-deleted
+    100 at a time, with one batch in flight while the next page is read.
+    Messages too old for bulk delete are put on ``single_queue`` (a
+    rate-limited ``ActionQueue``), which blocks the walk while it is full,
+    so memory use doesn't grow with ``amount``. ``on_progress(stats)`` is
+    awaited at most every ``progress_interval`` seconds.
+    """
+    runner = runner or direct
+    stats = PurgeStats()
+    batch = []
+    in_flight = None
+
+    async def delete_batch(messages):
+        try:
+            if len(messages) == 1:
+                await runner(messages[0].delete)
+            else:
+                await runner(channel.delete_messages, messages)
+            stats.deleted += len(messages)
+        except Exception as e:
+            stats.failed += len(messages)
+            print(f"Bulk delete of {len(messages)} messages in #{channel} failed: {e}")
+
+    async def delete_old(message):
+        try:
+            await runner(message.delete)
+            stats.deleted += 1
+        except Exception as e:
+            stats.failed += 1
+            print(f"Deleting old message {message.id} in #{channel} failed: {e}")
+
+    last_report = time.monotonic()
+    async for message in channel.history(limit=amount, before=before, oldest_first=False):
+        sent_at = snowflake_time(message.id)
+        if sent_at <= after:
+            break
+        stats.scanned += 1
+        if sent_at > time.time() - BULK_DELETE_MAX_AGE:
+            batch.append(message)
+            if len(batch) == BULK_DELETE_LIMIT:
+                if in_flight is not None:
+                    await in_flight
+                in_flight = asyncio.create_task(delete_batch(batch))
+                batch = []
+        else:
+            stats.old += 1
+            await single_queue.put(lambda message=message: delete_old(message))
+
+        if on_progress is not None and time.monotonic() - last_report >= progress_interval:
+            last_report = time.monotonic()
+            await on_progress(stats)
+
+    if in_flight is not None:
+        await in_flight
+    if batch:
+        await delete_batch(batch)
+    if stats.old:
+        await single_queue.join()
+    return stats
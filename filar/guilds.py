@@ -0,0 +1,44 @@
+class GuildPartitions:
+    """Per-guild state, created on first use.
+
+    ``factory(guild_id)`` builds the state for one guild. Only guilds that
+    have settings in the current config and belong to this process's shards
+    get one; ``get`` returns None for the rest, so their events are ignored
+    with one lookup. After a config reload, ``prune`` drops the partitions of
+    guilds that lost their settings.
+    """
+
+    def __init__(self, factory, settings, layout):
+        self.factory = factory
+        self.settings = settings
+        self.layout = layout
+        self._partitions = {}
+
+    def __len__(self):
+        return len(self._partitions)
+
+    def __iter__(self):
+        return iter(self._partitions.values())
+
+    def get(self, guild_id):
+        partition = self._partitions.get(guild_id)
+        if partition is None:
+            if self.settings.current.guild(guild_id) is None or not self.layout.owns(guild_id):
+                return None
+            partition = self._partitions[guild_id] = self.factory(guild_id)
+        return partition
+
+    def prune(self):
+        """Drop and return the partitions of guilds no longer in the current config."""
+        config = self.settings.current
+        removed = [guild_id for guild_id in self._partitions if config.guild(guild_id) is None]
+        return [self._partitions.pop(guild_id) for guild_id in removed]
+
+    def served(self, guilds):
+        """The guilds from ``guilds`` (e.g. ``bot.guilds``) that have a partition here."""
+        return [guild for guild in guilds if self.get(guild.id) is not None]
+
+
+def partition_namespace(namespace, guild_id):
+    """State store namespace of one guild's share of ``namespace``."""
+    return f"{namespace}:{guild_id}"
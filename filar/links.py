@@ -0,0 +1,135 @@
+import re
+
+LINK = "link"
+INVITE = "invite"
+DENIED = "denied"
+
+_SEVERITY = {None: 0, LINK: 1, INVITE: 2, DENIED: 3}
+
+DEFAULT_INVITE_HOSTS = frozenset({"discord.gg", "discord.io", "discord.me", "discord.li", "dsc.gg"})
+# Hosts that only serve invites under an /invite/ path.
+DEFAULT_INVITE_PATH_HOSTS = frozenset({"discord.com", "discordapp.com"})
+
+# Top-level domains that make a bare "word.tld" count as a link without a scheme.
+_TLDS = (
+    "com|net|org|gg|io|me|co|xyz|ru|info|biz|app|dev|ly|to|tv|pl|de|uk|eu|us|gl|sh|"
+    "site|online|top|click|link|shop|store|live|fun|club|li|cc|ws|su|tk|ml|ga|cf|gq"
+)
+# TLDs that are also everyday words ("it.me", "hi.to", "po prostu.pl"): a bare
+# domain ending in one only counts with a "www." or a path.
+_AMBIGUOUS_TLDS = frozenset({"me", "to", "us", "co", "de", "li", "pl"})
+# The same goes for one- and two-letter names such as "so.com" or "ok.co".
+_MIN_BARE_NAME = 3
+# A dot, or one of the usual ways of hiding it: [.] (.) [dot] (dot)
+_DOT = r"(?:\.|\[\.\]|\(\.\)|\[dot\]|\(dot\))"
+_OBFUSCATED_DOT = re.compile(r"\s*(?:\[\.\]|\(\.\)|\[dot\]|\(dot\)|\.)\s*", re.IGNORECASE)
+
+_PATTERN = re.compile(
+    # http://, https:// and the "hxxp" spelling, tolerating spaces around ":" and "//"
+    rf"h(?:tt|xx)ps?\s*:\s*/\s*/\s*(?P<host>[^\s/?#]+)(?P<path>\S*)"
+    # Invites spelled with spaces or hidden dots, e.g. "discord . gg / abc"
+    rf"|(?P<invite>discord(?:app)?\s*{_DOT}\s*com\s*/\s*invite|(?:discord|dsc)\s*{_DOT}\s*(?:gg|io|me|li))\s*/\s*[\w-]"
+    # The ".tld" of a bare domain such as "example.com/path"; the host is walked back from here
+    # (only where the host ends, so "a.to.to.to" is one match rather than three)
+    rf"|(?P<tld>{_DOT}(?:{_TLDS}))(?![\w-]|\.[\w-])(?P<bare_path>/\S*)?",
+    re.IGNORECASE,
+)
+# Everything _PATTERN matches contains one of these characters, so most chat
+# messages are rejected by this cheap scan before the full pattern runs.
+_TRIGGER = re.compile(r"[.:\[(]")
+# How far before the first trigger character a scheme or "discord" may start.
+_LOOKBACK = 32
+_HOST_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-.")
+# Longest valid host name, so the walk back from a bare ".tld" stays bounded.
+_MAX_HOST = 253
+
+
+def normalize_host(raw):
+    """Lowercase a matched host and undo the common obfuscations."""
+    host = _OBFUSCATED_DOT.sub(".", raw.lower())
+    host = host.rpartition("@")[2].partition(":")[0].strip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    return host
+
+
+def _matches_domain(host, domains):
+    # "cdn.example.com" matches an "example.com" entry.
+    while host:
+        if host in domains:
+            return True
+        dot = host.find(".")
+        if dot < 0:
+            return False
+        host = host[dot + 1:]
+    return False
+
+
+class LinkClassifier:
+    """Single-pass link and invite detection for chat messages.
+
+    One precompiled, case-insensitive pattern finds scheme links, obfuscated
+    invites and bare domains without building a lowercased copy of the
+    message. Only the matched hosts are normalized and checked against the
+    allow and deny lists. ``classify`` returns ``None`` for a clean message or
+    the most severe of ``LINK``, ``INVITE`` and ``DENIED`` found in it, and
+    stops scanning as soon as nothing later in the message could change that.
+    """
+
+    def __init__(self, allow_domains=(), deny_domains=(),
+                 invite_hosts=DEFAULT_INVITE_HOSTS, invite_path_hosts=DEFAULT_INVITE_PATH_HOSTS):
+        self.allow_domains = frozenset(normalize_host(d) for d in allow_domains)
+        self.deny_domains = frozenset(normalize_host(d) for d in deny_domains)
+        self.invite_hosts = frozenset(invite_hosts)
+        self.invite_path_hosts = frozenset(invite_path_hosts)
+
+    def _classify_host(self, host, path):
+        if _matches_domain(host, self.deny_domains):
+            return DENIED
+        if host in self.invite_hosts:
+            return INVITE
+        if host in self.invite_path_hosts and path.lower().lstrip("/ ").startswith("invite"):
+            return INVITE
+        if _matches_domain(host, self.allow_domains):
+            return None
+        return LINK
+
+    def classify(self, content):
+        trigger = _TRIGGER.search(content)
+        if trigger is None:
+            return None
+        # Nothing outranks DENIED, and without a deny list nothing outranks INVITE.
+        worst = DENIED if self.deny_domains else INVITE
+        verdict = None
+        # End of the previous match: a host never reaches back into it, so no text is walked twice.
+        scanned = 0
+        for match in _PATTERN.finditer(content, max(0, trigger.start() - _LOOKBACK)):
+            if match.group("invite") is not None:
+                found = INVITE
+            elif match.group("host") is not None:
+                found = self._classify_host(normalize_host(match.group("host")), match.group("path"))
+            else:
+                found = self._classify_bare(content, match, max(scanned, match.start() - _MAX_HOST))
+            scanned = match.end()
+            if _SEVERITY[found] > _SEVERITY[verdict]:
+                verdict = found
+                if verdict == worst:
+                    break
+        return verdict
+
+    def _classify_bare(self, content, match, floor):
+        start = match.start()
+        while start > floor and content[start - 1] in _HOST_CHARS:
+            start -= 1
+        # No label before the dot, or an e-mail address rather than a link.
+        if start == match.start() or (start > 0 and content[start - 1] == "@"):
+            return None
+        host = normalize_host(content[start:match.end("tld")])
+        path = match.group("bare_path") or ""
+        found = self._classify_host(host, path)
+        if found == DENIED or path or content[start:start + 4].lower() == "www.":
+            return found
+        name, _, tld = host.rpartition(".")
+        if tld in _AMBIGUOUS_TLDS or len(name) < _MIN_BARE_NAME:
+            return None
+        return found
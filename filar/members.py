@@ -0,0 +1,69 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+from filar.outbound import direct
+
+
+class MemberLookup:
+    """Guild members by ID for handlers, when the gateway cache may not have them.
+
+    ``get`` answers from ``guild.get_member`` first. With a lean member cache
+    most members aren't there, so the last ``size`` members fetched or seen
+    in events are kept in an LRU for ``ttl`` seconds (they get no gateway
+    updates, so they must not live long), and the rest are fetched through
+    ``runner``. Concurrent lookups of one member share a single fetch. A
+    member that isn't in the guild is None.
+    """
+
+    def __init__(self, size=1000, ttl=300.0, runner=None, not_found=(LookupError,)):
+        self.size = size
+        self.ttl = ttl
+        self.runner = runner or direct
+        self.not_found = not_found
+        # (guild_id, member_id) -> (member, time stored)
+        self._cache = OrderedDict()
+        self._fetching = {}
+        self.hits = 0
+        self.fetches = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+    def put(self, member):
+        """Remember a member fresh from an event or an API response."""
+        key = (member.guild.id, member.id)
+        self._cache[key] = (member, time.monotonic())
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.size:
+            self._cache.popitem(last=False)
+
+    def discard(self, guild_id, member_id):
+        self._cache.pop((guild_id, member_id), None)
+
+    async def get(self, guild, member_id):
+        member = guild.get_member(member_id)
+        if member is not None:
+            return member
+        key = (guild.id, member_id)
+        entry = self._cache.get(key)
+        if entry is not None:
+            if time.monotonic() - entry[1] < self.ttl:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            del self._cache[key]
+        task = self._fetching.get(key)
+        if task is None:
+            task = self._fetching[key] = asyncio.create_task(self._fetch(guild, member_id))
+            task.add_done_callback(lambda _: self._fetching.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, guild, member_id):
+        self.fetches += 1
+        try:
+            member = await self.runner(guild.fetch_member, member_id)
+        except self.not_found:
+            return None
+        self.put(member)
+        return member
@@ -0,0 +1,292 @@
+import asyncio
+import functools
+import logging
+import time
+from bisect import bisect_left
+
+from filar.outbound import LANE_NAMES
+
+# Seconds; covers a cheap dict lookup up to a slow REST call.
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(labelnames, values):
+    if not labelnames:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def get(self, *labels):
+        return self._values.get(labels, 0)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in self._values.items():
+            yield f"{self.name}{_labels(self.labelnames, labels)} {value}"
+
+
+class Histogram:
+    """Latency histogram with fixed buckets; ``observe`` is a bisect and two adds."""
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self._series = {}
+
+    def observe(self, value, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def count(self, *labels):
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, total) in self._series.items():
+            base = _labels(self.labelnames, labels)[1:-1]
+            prefix = base + "," if base else ""
+            running = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                running += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                yield f'{self.name}_bucket{{{prefix}le="{le}"}} {running}'
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {total}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {running}"
+
+
+class Callback:
+    """Metric read at scrape time from ``fn()``: a number, or a dict of label tuples to numbers."""
+
+    def __init__(self, name, help, fn, labelnames=(), kind="gauge"):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.labelnames = tuple(labelnames)
+        self.kind = kind
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        values = self.fn()
+        if not isinstance(values, dict):
+            values = {(): values}
+        for labels, value in values.items():
+            yield f"{self.name}{_labels(self.labelnames, labels)} {value}"
+
+
+class MetricsRegistry:
+    """In-process metrics, rendered in the Prometheus text format.
+
+    Everything runs on the event loop, so updates need no locking. ``serve``
+    answers ``GET /metrics`` on a local port.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._server = None
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name, help, fn, labelnames=(), kind="gauge"):
+        return self._register(Callback(name, help, fn, labelnames, kind))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                print(f"Metric {metric.name} failed to render: {e}")
+        return "\n".join(lines) + "\n"
+
+    async def serve(self, host="127.0.0.1", port=9108):
+        if self._server is not None:
+            return
+        try:
+            self._server = await asyncio.start_server(self._handle, host, port)
+        except OSError as e:
+            print(f"❌ Metrics endpoint could not listen on {host}:{port}: {e}")
+            return
+        print(f"✅ Metrics at http://{host}:{port}/metrics")
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 5)
+            path = request.split(b" ", 2)[1] if request.count(b" ") >= 2 else b""
+            if path.split(b"?")[0] == b"/metrics":
+                status, body = "200 OK", self.render().encode()
+            else:
+                status, body = "404 Not Found", b"Not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def instrument_bot(metrics, bot, views=()):
+    """Time every registered event handler, prefix command and app command of ``bot``.
+
+    Component callbacks are timed for the ``discord.ui.View`` classes in
+    ``views``. Also counts raw gateway events by type. Call once after all
+    handlers, commands and views are defined.
+    """
+    seconds = metrics.histogram("filar_handler_seconds", "Time spent in event handlers and commands.",
+                                ("kind", "name"))
+    errors = metrics.counter("filar_handler_errors_total", "Handlers and commands that raised.", ("kind", "name"))
+    events = metrics.counter("filar_gateway_events_total", "Gateway events received, handled or not.", ("type",))
+
+    def timed(name, handler, kind="event"):
+        # functools.wraps also copies the attributes discord.ui keeps on decorated callbacks.
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await handler(*args, **kwargs)
+            except Exception:
+                errors.inc(kind, name)
+                raise
+            finally:
+                seconds.observe(time.perf_counter() - start, kind, name)
+        return wrapper
+
+    # bot.event stores handlers as instance attributes, so vars() lists exactly ours.
+    for name, handler in list(vars(bot).items()):
+        if name.startswith("on_") and asyncio.iscoroutinefunction(handler):
+            setattr(bot, name, timed(name[3:], handler))
+
+    for command in bot.tree.walk_commands():
+        # Groups have no callback of their own; their subcommands are walked too.
+        if hasattr(command, "_callback"):
+            command._callback = timed(command.qualified_name, command._callback, "app_command")
+
+    for view in views:
+        # Each view instance builds its items from this mapping, so wrapping it covers every instance.
+        view.__view_children_items__ = {
+            name: timed(f"{view.__name__}.{name}", item, "component") if callable(item) else item
+            for name, item in view.__view_children_items__.items()
+        }
+
+    async def count_event(event_type):
+        events.inc(event_type)
+
+    bot.add_listener(count_event, "on_socket_event_type")
+
+    started = {}
+
+    @bot.before_invoke
+    async def start_command_timer(ctx):
+        started[id(ctx)] = time.perf_counter()
+
+    @bot.after_invoke
+    async def stop_command_timer(ctx):
+        start = started.pop(id(ctx), None)
+        if start is not None:
+            seconds.observe(time.perf_counter() - start, "command", ctx.command.qualified_name)
+        if ctx.command_failed:
+            errors.inc("command", ctx.command.qualified_name)
+
+
+def instrument_outbound(metrics, scheduler):
+    """REST call latency and errors by route, and lane backlogs, for an ``OutboundScheduler``."""
+    seconds = metrics.histogram("filar_rest_seconds", "Duration of REST calls made through the scheduler.",
+                                ("lane", "route"))
+    errors = metrics.counter("filar_rest_errors_total", "Failed REST calls by route and HTTP status.",
+                             ("route", "status"))
+    metrics.callback("filar_outbound_waiting", "Actions waiting in each scheduler lane.",
+                     lambda: {(name,): scheduler.depth(lane) for lane, name in enumerate(LANE_NAMES)}, ("lane",))
+    metrics.callback("filar_outbound_shed_total", "Actions dropped because their lane was backed up.",
+                     lambda: {(name,): scheduler.shed[lane] for lane, name in enumerate(LANE_NAMES)}, ("lane",),
+                     kind="counter")
+    metrics.callback("filar_outbound_in_flight", "REST calls currently running.", lambda: scheduler.in_flight)
+
+    def observe(lane, route, elapsed, error):
+        seconds.observe(elapsed, LANE_NAMES[lane], route)
+        if error is not None:
+            errors.inc(route, getattr(error, "status", "error"))
+
+    scheduler.observer = observe
+
+
+def instrument_pipeline(metrics, group, name="message"):
+    """Per-stage timings and errors of a handler pipeline built on a ``TaskGroup``."""
+    seconds = metrics.histogram(f"filar_{name}_stage_seconds", f"Time spent in each {name} handling stage.", ("stage",))
+    errors = metrics.counter(f"filar_{name}_stage_errors_total", f"{name.capitalize()} handling stages that raised.",
+                             ("stage",))
+    metrics.callback(f"filar_{name}_tasks_running", f"{name.capitalize()} side effects running or waiting to finish.",
+                     lambda: len(group))
+
+    def observe(stage, elapsed, error):
+        seconds.observe(elapsed, stage)
+        if error is not None:
+            errors.inc(stage)
+
+    group.observer = observe
+
+
+class _RateLimitHandler(logging.Handler):
+    # discord.py logs every 429 with the first message, and a global one with the second right after it.
+    RESPONSE = "We are being rate limited."
+    GLOBAL = "Global rate limit has been hit."
+
+    def __init__(self, responses, global_limits):
+        super().__init__(logging.WARNING)
+        self.responses = responses
+        self.global_limits = global_limits
+
+    def emit(self, record):
+        if not isinstance(record.msg, str):
+            return
+        if record.msg.startswith(self.RESPONSE):
+            self.responses.inc()
+        elif record.msg.startswith(self.GLOBAL):
+            self.global_limits.inc()
+
+
+def watch_rate_limits(metrics):
+    """Count the 429s discord.py reports (it retries them itself and only logs a warning)."""
+    handler = _RateLimitHandler(
+        metrics.counter("filar_rate_limited_total", "429 responses reported by discord.py."),
+        metrics.counter("filar_global_rate_limited_total", "429 responses that hit the global rate limit."),
+    )
+    logging.getLogger("discord.http").addHandler(handler)
+    return handler
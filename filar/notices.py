@@ -0,0 +1,85 @@
+import asyncio
+from collections import OrderedDict
+
+from filar.outbound import direct
+
+
+class WarningDigest:
+    """Per-user cooldown for warning DMs, with repeats folded into one digest.
+
+    The first warning for a user is sent right away and starts a cooldown of
+    ``cooldown`` seconds. Warnings during the cooldown are collected and sent
+    as a single DM when it ends, which starts the next cooldown. ``render``
+    is called as ``render(count, channels)`` to build the text. DM channels
+    are kept in an LRU of ``dm_cache_size`` users, and DMs are sent through
+    ``runner``.
+    """
+
+    def __init__(self, render, cooldown=60.0, dm_cache_size=256, runner=None):
+        self.render = render
+        self.cooldown = cooldown
+        self.dm_cache_size = dm_cache_size
+        self.runner = runner or direct
+        # user_id -> loop time the cooldown ends; expired entries are pruned in bulk.
+        self._cooldown_until = {}
+        self._prune_at = 1024
+        # user_id -> [user, channels, count] waiting for the cooldown to end
+        self._pending = {}
+        self._dm_channels = OrderedDict()
+        self.violations = 0
+        self.dms = 0
+
+    @property
+    def dms_saved(self):
+        """Warnings folded into a digest instead of getting their own DM."""
+        return self.violations - self.dms - sum(entry[2] for entry in self._pending.values())
+
+    def warn(self, user, channel):
+        """Record one removed message by ``user`` in ``channel``."""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        self.violations += 1
+
+        entry = self._pending.get(user.id)
+        if entry is None:
+            until = self._cooldown_until.get(user.id, 0)
+            if until <= now:
+                self._start_cooldown(user.id, now)
+                asyncio.create_task(self._send(user, 1, [channel]))
+                return
+            entry = self._pending[user.id] = [user, [], 0]
+            loop.call_at(until, self._flush, user.id)
+        if channel not in entry[1]:
+            entry[1].append(channel)
+        entry[2] += 1
+
+    def _start_cooldown(self, user_id, now):
+        self._cooldown_until[user_id] = now + self.cooldown
+        if len(self._cooldown_until) >= self._prune_at:
+            self._cooldown_until = {uid: until for uid, until in self._cooldown_until.items() if until > now}
+            self._prune_at = max(1024, 2 * len(self._cooldown_until))
+
+    def _flush(self, user_id):
+        user, channels, count = self._pending.pop(user_id)
+        self._start_cooldown(user_id, asyncio.get_running_loop().time())
+        asyncio.create_task(self._send(user, count, channels))
+
+    async def _dm_channel(self, user):
+        channel = self._dm_channels.get(user.id)
+        if channel is not None:
+            self._dm_channels.move_to_end(user.id)
+            return channel
+        channel = user.dm_channel or await self.runner(user.create_dm)
+        self._dm_channels[user.id] = channel
+        if len(self._dm_channels) > self.dm_cache_size:
+            self._dm_channels.popitem(last=False)
+        return channel
+
+    async def _send(self, user, count, channels):
+        self.dms += 1
+        try:
+            channel = await self._dm_channel(user)
+            await self.runner(channel.send, self.render(count, channels))
+        except Exception as e:
+            self._dm_channels.pop(user.id, None)
+            print(f"Could not send warning DM to {user}: {e}")
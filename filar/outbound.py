@@ -0,0 +1,144 @@
+import asyncio
+import time
+from collections import deque
+
+MODERATION, VERIFICATION, ROLES, COSMETIC = range(4)
+LANE_NAMES = ("moderation", "verification", "roles", "cosmetic")
+
+# How far into a lane the scheduler looks for a job whose route has room.
+_SCAN_DEPTH = 16
+
+
+class LoadShed(Exception):
+    """The action was dropped because its lane was backed up."""
+
+
+async def direct(func, *args, **kwargs):
+    """Await ``func(*args, **kwargs)`` at once.
+
+    The default ``runner`` of helpers that make REST calls; the bot passes
+    one that goes through an ``OutboundScheduler`` lane instead.
+    """
+    return await func(*args, **kwargs)
+
+
+class OutboundScheduler:
+    """Single queue in front of the bot's REST calls, with priority lanes.
+
+    Jobs wait in one FIFO lane per priority (moderation > verification >
+    roles > cosmetic) and are started highest lane first, with at most
+    ``max_concurrency`` calls in flight overall and ``route_limits[route]``
+    per route (the called method's name, e.g. ``"add_reaction"``). When a
+    lane at or below ``shed_lane`` holds more than ``shed_backlog`` jobs the
+    oldest one is dropped with ``LoadShed``. ``observer``, if set, is
+    called as ``observer(lane, route, seconds, error)`` after every call.
+    """
+
+    def __init__(self, max_concurrency=8, route_limits=None, default_route_limit=4,
+                 shed_lane=COSMETIC, shed_backlog=50):
+        self.max_concurrency = max_concurrency
+        self.route_limits = dict(route_limits or {})
+        self.default_route_limit = default_route_limit
+        self.shed_lane = shed_lane
+        self.shed_backlog = shed_backlog
+        self._lanes = [deque() for _ in LANE_NAMES]
+        self._active = 0
+        self._route_active = {}
+        self.completed = [0] * len(LANE_NAMES)
+        self.failed = [0] * len(LANE_NAMES)
+        self.shed = [0] * len(LANE_NAMES)
+        self.observer = None
+
+    def depth(self, lane):
+        return len(self._lanes[lane])
+
+    @property
+    def in_flight(self):
+        return self._active
+
+    def status(self):
+        """One line per lane: waiting, done, failed and shed counts."""
+        return "\n".join(
+            f"{name}: {len(self._lanes[lane])} waiting, {self.completed[lane]} done, "
+            f"{self.failed[lane]} failed, {self.shed[lane]} shed"
+            for lane, name in enumerate(LANE_NAMES)
+        )
+
+    def _enqueue(self, lane, func, args, kwargs, route):
+        future = asyncio.get_running_loop().create_future()
+        queue = self._lanes[lane]
+        queue.append((route or getattr(func, "__name__", "call"), func, args, kwargs, future, lane))
+        if lane >= self.shed_lane and len(queue) > self.shed_backlog:
+            dropped = queue.popleft()[4]
+            self.shed[lane] += 1
+            if not dropped.done():
+                dropped.set_exception(LoadShed(f"{LANE_NAMES[lane]} lane is backed up"))
+        self._pump()
+        return future
+
+    async def call(self, lane, func, *args, route=None, **kwargs):
+        """Run ``func(*args, **kwargs)`` in ``lane`` and return its result."""
+        return await self._enqueue(lane, func, args, kwargs, route)
+
+    def submit(self, lane, func, *args, route=None, **kwargs):
+        """Like ``call`` but fire-and-forget; failures are only logged."""
+        future = self._enqueue(lane, func, args, kwargs, route)
+        future.add_done_callback(_log_failure)
+        return future
+
+    def _route_limit(self, route):
+        return self.route_limits.get(route, self.default_route_limit)
+
+    def _next_job(self):
+        for queue in self._lanes:
+            i = 0
+            while i < len(queue) and i < _SCAN_DEPTH:
+                job = queue[i]
+                if job[4].done():
+                    # Shed, or cancelled by the caller before it started.
+                    del queue[i]
+                    continue
+                if self._route_active.get(job[0], 0) < self._route_limit(job[0]):
+                    del queue[i]
+                    return job
+                i += 1
+        return None
+
+    def _pump(self):
+        while self._active < self.max_concurrency:
+            job = self._next_job()
+            if job is None:
+                return
+            self._active += 1
+            self._route_active[job[0]] = self._route_active.get(job[0], 0) + 1
+            asyncio.create_task(self._run(job))
+
+    async def _run(self, job):
+        route, func, args, kwargs, future, lane = job
+        error = None
+        start = time.perf_counter()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            error = e
+            self.failed[lane] += 1
+            if not future.done():
+                future.set_exception(e)
+        else:
+            self.completed[lane] += 1
+            if not future.done():
+                future.set_result(result)
+        finally:
+            if self.observer is not None:
+                self.observer(lane, route, time.perf_counter() - start, error)
+            self._active -= 1
+            self._route_active[route] -= 1
+            self._pump()
+
+
+def _log_failure(future):
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None and not isinstance(error, LoadShed):
+        print(f"Outbound action failed: {error}")
@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+
+class TaskGroup:
+    """Side effects a handler starts without waiting for them, at most ``limit`` at a time.
+
+    ``spawn`` only waits while the group is full, so a flood slows the
+    handlers down instead of piling up tasks. Every stage, spawned or timed
+    by the handler itself with ``record``, is reported as
+    ``observer(stage, seconds, error)``; failures are otherwise only logged.
+    """
+
+    def __init__(self, limit=100, observer=None):
+        self.limit = limit
+        self.observer = observer
+        self._slots = asyncio.Semaphore(limit)
+        self._tasks = set()
+
+    def __len__(self):
+        return len(self._tasks)
+
+    async def spawn(self, stage, func, *args):
+        await self._slots.acquire()
+        task = asyncio.create_task(self._run(stage, func, args))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def record(self, stage, seconds, error=None):
+        if self.observer is not None:
+            self.observer(stage, seconds, error)
+
+    async def _run(self, stage, func, args):
+        start = time.perf_counter()
+        error = None
+        try:
+            await func(*args)
+        except Exception as e:
+            error = e
+            print(f"{stage} failed: {e}")
+        finally:
+            self._slots.release()
+            self.record(stage, time.perf_counter() - start, error)
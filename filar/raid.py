@@ -0,0 +1,153 @@
+import asyncio
+import time
+from collections import deque
+
+
+class TokenBucket:
+    """Allows ``rate`` actions per second with bursts of up to ``capacity``.
+
+    The burst is at least one action, so a rate below one per second still
+    lets an action through every ``1 / rate`` seconds.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = max(1.0, capacity or rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def set_rate(self, rate, capacity=None):
+        self._refill()
+        self.rate = rate
+        self.capacity = max(1.0, capacity or rate)
+        self.tokens = min(self.tokens, self.capacity)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self):
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    async def acquire(self):
+        while not self.try_acquire():
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class ActionQueue:
+    """Bounded queue of REST actions drained at a token-bucket rate.
+
+    Actions are zero-argument callables returning a coroutine. ``submit``
+    drops the action when the queue is full so callers can fall back to
+    something cheaper; ``put`` waits for room instead (backpressure).
+    """
+
+    def __init__(self, name, rate, capacity=None, maxsize=200):
+        self.name = name
+        self.bucket = TokenBucket(rate, capacity)
+        self.queue = asyncio.Queue(maxsize)
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+        self._finished_at = deque()
+        self._worker = None
+
+    @property
+    def depth(self):
+        return self.queue.qsize()
+
+    @property
+    def maxsize(self):
+        return self.queue.maxsize
+
+    def drain_rate(self, window=60.0):
+        """Actions finished per second over the last ``window`` seconds."""
+        cutoff = time.monotonic() - window
+        while self._finished_at and self._finished_at[0] < cutoff:
+            self._finished_at.popleft()
+        return len(self._finished_at) / window
+
+    def submit(self, action):
+        self._ensure_worker()
+        try:
+            self.queue.put_nowait(action)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        return True
+
+    async def put(self, action):
+        self._ensure_worker()
+        await self.queue.put(action)
+
+    async def join(self):
+        """Wait until every queued action has run."""
+        await self.queue.join()
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            action = await self.queue.get()
+            await self.bucket.acquire()
+            try:
+                await action()
+                self.completed += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"{self.name} queue action failed: {e}")
+            finally:
+                self._finished_at.append(time.monotonic())
+                self.queue.task_done()
+
+
+class RaidMonitor:
+    """Switches raid mode on when joins within ``window`` seconds reach ``threshold``.
+
+    Raid mode switches off again once no burst has been seen for ``cooldown`` seconds.
+    """
+
+    def __init__(self, threshold=10, window=10.0, cooldown=120.0):
+        self.threshold = threshold
+        self.window = window
+        self.cooldown = cooldown
+        self._joins = deque()
+        self._triggered_at = None
+
+    def _trim(self, now):
+        cutoff = now - self.window
+        while self._joins and self._joins[0] < cutoff:
+            self._joins.popleft()
+
+    @property
+    def active(self):
+        if self._triggered_at is None:
+            return False
+        if time.monotonic() - self._triggered_at > self.cooldown:
+            self._triggered_at = None
+            print("✅ Raid mode disabled, join rate is back to normal.")
+            return False
+        return True
+
+    def join_rate(self):
+        """Joins per second over the last ``window`` seconds."""
+        self._trim(time.monotonic())
+        return len(self._joins) / self.window
+
+    def record_join(self):
+        """Record one join and return whether raid mode is active."""
+        now = time.monotonic()
+        self._joins.append(now)
+        self._trim(now)
+        if len(self._joins) >= self.threshold:
+            if self._triggered_at is None:
+                print(f"🚨 Raid mode enabled: {len(self._joins)} joins in {self.window:g}s.")
+            self._triggered_at = now
+        return self.active
@@ -0,0 +1,138 @@
+import time
+from collections import Counter
+
+DISCORD_EPOCH_MS = 1420070400000
+
+
+def snowflake_time(snowflake):
+    """Creation time of a Discord id, in epoch seconds."""
+    return ((snowflake >> 22) + DISCORD_EPOCH_MS) / 1000
+
+
+def parse_window(text):
+    """Turn "12h" or "7d" into seconds; returns None for anything else."""
+    try:
+        amount = int(text[:-1])
+    except (TypeError, ValueError):
+        return None
+    unit = text[-1].lower()
+    if amount <= 0 or unit not in ("h", "d"):
+        return None
+    return amount * (3600 if unit == "h" else 86400)
+
+
+class ReactionTally:
+    """Live reaction counts for the tracked channels, kept from gateway events.
+
+    Counts are held per message and also summed into 5-minute, hourly and
+    daily buckets keyed by message creation time (read from the snowflake).
+    A windowed total is assembled from the coarsest buckets that fit, so a
+    week costs a few dozen lookups however many messages it covers. Each
+    bucket keeps per-channel counts plus an all-channels total under
+    ``None``. Messages older than ``retention`` seconds are dropped.
+    """
+
+    BUCKET_SIZES = (86400, 3600, 300)
+
+    def __init__(self, retention=7 * 86400):
+        self.retention = retention
+        self.bucket_size = self.BUCKET_SIZES[-1]
+        # message_id -> (channel_id, Counter of emoji -> count)
+        self._messages = {}
+        # bucket size -> {bucket start: {channel_id or None: Counter of emoji -> count}}
+        self._buckets = {size: {} for size in self.BUCKET_SIZES}
+        self._last_prune = 0.0
+
+    def __len__(self):
+        return len(self._messages)
+
+    def __contains__(self, message_id):
+        return message_id in self._messages
+
+    def _apply(self, channel_id, message_id, counts, sign):
+        created = int(snowflake_time(message_id))
+        for size, buckets in self._buckets.items():
+            channels = buckets.setdefault(created - created % size, {})
+            for key in (channel_id, None):
+                bucket = channels.setdefault(key, Counter())
+                for emoji, count in counts.items():
+                    bucket[emoji] += sign * count
+                    if bucket[emoji] <= 0:
+                        del bucket[emoji]
+
+    def add(self, channel_id, message_id, emoji, delta=1):
+        now = time.time()
+        if now - snowflake_time(message_id) > self.retention:
+            return
+        entry = self._messages.get(message_id)
+        if entry is None:
+            if delta < 0:
+                # A removal for a reaction we never counted.
+                return
+            entry = self._messages[message_id] = (channel_id, Counter())
+        counts = entry[1]
+        delta = max(delta, -counts[emoji])
+        if delta == 0:
+            return
+        counts[emoji] += delta
+        if counts[emoji] == 0:
+            del counts[emoji]
+        self._apply(channel_id, message_id, {emoji: delta}, 1)
+        if now - self._last_prune > self.bucket_size:
+            self.prune(now)
+
+    def remove(self, channel_id, message_id, emoji):
+        self.add(channel_id, message_id, emoji, delta=-1)
+
+    def clear(self, message_id, emoji=None):
+        """Drop all counts of a message, or only those of one emoji."""
+        entry = self._messages.get(message_id)
+        if entry is None:
+            return
+        channel_id, counts = entry
+        if emoji is None:
+            self._apply(channel_id, message_id, counts, -1)
+            counts.clear()
+        elif emoji in counts:
+            self._apply(channel_id, message_id, {emoji: counts.pop(emoji)}, -1)
+
+    def forget(self, message_id):
+        self.clear(message_id)
+        self._messages.pop(message_id, None)
+
+    def backfill(self, channel_id, message_id, counts):
+        """Seed counts read from history; messages already seen live are kept."""
+        if message_id in self._messages or time.time() - snowflake_time(message_id) > self.retention:
+            return
+        counts = Counter({emoji: count for emoji, count in counts.items() if count > 0})
+        self._messages[message_id] = (channel_id, counts)
+        self._apply(channel_id, message_id, counts, 1)
+
+    def totals(self, window=None, channel_id=None):
+        """Emoji counts for messages created in the last ``window`` seconds."""
+        now = int(time.time())
+        window = min(window or self.retention, self.retention)
+        step = self.bucket_size
+        position = (now - window) // step * step
+        end = (now // step + 1) * step
+        result = Counter()
+        while position < end:
+            # Largest bucket that starts here and ends inside the window.
+            for size in self.BUCKET_SIZES:
+                if position % size == 0 and position + size <= end:
+                    break
+            channels = self._buckets[size].get(position)
+            if channels and channel_id in channels:
+                result.update(channels[channel_id])
+            position += size
+        return result
+
+    def prune(self, now=None):
+        now = now or time.time()
+        self._last_prune = now
+        cutoff = now - self.retention
+        for size, buckets in self._buckets.items():
+            for start in [start for start in buckets if start + size < cutoff]:
+                del buckets[start]
+        for message_id in [m for m in self._messages if snowflake_time(m) < cutoff]:
+            del self._messages[message_id]
@@ -0,0 +1,34 @@
+class RolePanelIndex:
+    """Which posted messages are role panels, keyed by message id.
+
+    Every reaction in every served guild is checked against it, so a
+    reaction on any other message is turned away with one dict lookup,
+    before the guild or member caches are touched. ``bind`` records where
+    a panel was posted; posting it again moves it.
+    """
+
+    def __init__(self):
+        # message_id -> (guild_id, panel name)
+        self._by_message = {}
+        # (guild_id, panel name) -> message_id
+        self._by_panel = {}
+
+    def __len__(self):
+        return len(self._by_message)
+
+    def get(self, message_id):
+        """``(guild_id, panel name)`` of the panel posted as ``message_id``, or None."""
+        return self._by_message.get(message_id)
+
+    def message_id(self, guild_id, name):
+        return self._by_panel.get((guild_id, name))
+
+    def bind(self, guild_id, name, message_id):
+        self.unbind(guild_id, name)
+        self._by_message[message_id] = (guild_id, name)
+        self._by_panel[(guild_id, name)] = message_id
+
+    def unbind(self, guild_id, name):
+        message_id = self._by_panel.pop((guild_id, name), None)
+        if message_id is not None:
+            self._by_message.pop(message_id, None)
@@ -0,0 +1,118 @@
+import asyncio
+
+from filar.outbound import direct
+
+
+class RoleCoalescer:
+    """Collects role changes per member and applies their net result with one edit.
+
+    ``add``/``remove`` record the wanted state of one role; a later request
+    for the same role replaces an earlier one, so the outcome follows event
+    order however adds and removes race. ``window`` seconds after a member's
+    first change the batch is compared with their current roles and, unless
+    it cancels out, applied with a single ``member.edit(roles=...)``.
+    Changes arriving while that edit is in flight go into the next batch,
+    so a member never has two edits racing.
+
+    ``edit(roles=...)`` replaces the whole role list, so it is built from
+    the member cache. Until the cache shows an edit, or ``settle`` seconds
+    have passed, the roles it set are used instead, so a second batch can't
+    undo the first from a stale cache. With ``deltas`` set, for a member
+    cache that holds no members (whose copies from events or lookups go
+    stale), the batch is sent as ``add_roles`` and ``remove_roles`` instead,
+    so roles others changed in the meantime are left alone. Edits go
+    through ``runner``.
+    """
+
+    def __init__(self, window=0.5, settle=5.0, runner=None, deltas=False):
+        self.window = window
+        self.settle = settle
+        self.runner = runner or direct
+        self.deltas = deltas
+        # (guild_id, member_id) -> [member, {role_id: (role, wanted)}, requests]
+        self._pending = {}
+        self._in_flight = set()
+        # (guild_id, member_id) -> role ids set by the last edit, until the cache has them
+        self._applied = {}
+        self.requested = 0
+        self.rest_calls = 0
+
+    def __len__(self):
+        """Members with role changes waiting or being applied."""
+        return len(self._pending.keys() | self._in_flight)
+
+    @property
+    def calls_saved(self):
+        """Role changes that didn't need a REST call of their own."""
+        return self.requested - self.rest_calls - sum(entry[2] for entry in self._pending.values())
+
+    def add(self, member, role):
+        self._request(member, role, True)
+
+    def remove(self, member, role):
+        self._request(member, role, False)
+
+    def _request(self, member, role, wanted):
+        self.requested += 1
+        key = (member.guild.id, member.id)
+        entry = self._pending.get(key)
+        if entry is None:
+            entry = self._pending[key] = [member, {}, 0]
+            if key not in self._in_flight:
+                asyncio.get_running_loop().call_later(self.window, self._flush, key)
+        entry[0] = member
+        entry[1][role.id] = (role, wanted)
+        entry[2] += 1
+
+    def _flush(self, key):
+        entry = self._pending.pop(key, None)
+        if entry is not None:
+            self._in_flight.add(key)
+            asyncio.create_task(self._apply(key, entry[0], entry[1]))
+
+    def _current_roles(self, key, member):
+        guild = member.guild
+        member = guild.get_member(member.id) or member
+        roles = {role.id: role for role in member.roles if role.id != guild.id}
+        applied = self._applied.get(key)
+        if applied is None or applied == roles.keys():
+            self._applied.pop(key, None)
+            return member, roles
+        # The gateway hasn't confirmed our last edit yet.
+        return member, {role_id: roles.get(role_id) or guild.get_role(role_id) for role_id in applied}
+
+    async def _apply(self, key, member, changes):
+        try:
+            if self.deltas:
+                await self._apply_deltas(member, changes)
+                return
+            member, roles = self._current_roles(key, member)
+            target = dict(roles)
+            for role_id, (role, wanted) in changes.items():
+                if wanted:
+                    target[role_id] = role
+                else:
+                    target.pop(role_id, None)
+            if target.keys() != roles.keys():
+                self.rest_calls += 1
+                await self.runner(member.edit, roles=[role for role in target.values() if role is not None])
+                applied = self._applied[key] = frozenset(target)
+                asyncio.get_running_loop().call_later(self.settle, self._expire, key, applied)
+        except Exception as e:
+            print(f"Could not update the roles of {member}: {e}")
+        finally:
+            self._in_flight.discard(key)
+            if key in self._pending:
+                asyncio.get_running_loop().call_later(self.window, self._flush, key)
+
+    async def _apply_deltas(self, member, changes):
+        added = [role for role, wanted in changes.values() if wanted]
+        removed = [role for role, wanted in changes.values() if not wanted]
+        for func, roles in ((member.add_roles, added), (member.remove_roles, removed)):
+            if roles:
+                self.rest_calls += 1
+                await self.runner(func, *roles)
+
+    def _expire(self, key, applied):
+        if self._applied.get(key) is applied:
+            del self._applied[key]
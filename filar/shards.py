@@ -0,0 +1,127 @@
+"""Shard layout for ``AutoShardedBot``, and a launcher that runs shard ranges in worker processes.
+
+    python -m filar.shards bot.py --shards 16 --workers 4
+
+starts four copies of ``bot.py`` in the current directory, each connecting
+shards 0-3, 4-7 and so on. Every worker reads the same config.json and
+state file; the launcher passes its shards through the environment. Before
+the workers start, the launcher runs the script once with ``FILAR_PREPARE``
+set, so one-time setup like migrating state happens in one process.
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+
+ENV_SHARD_COUNT = "FILAR_SHARD_COUNT"
+ENV_SHARD_IDS = "FILAR_SHARD_IDS"
+ENV_WORKER = "FILAR_WORKER"
+ENV_PREPARE = "FILAR_PREPARE"
+
+
+def shard_of(guild_id, shard_count):
+    """The shard Discord routes a guild's events to."""
+    return (guild_id >> 22) % shard_count
+
+
+class ShardLayout:
+    """Which shards this process connects, and so which guilds it owns.
+
+    ``shard_count=None`` lets Discord pick the count; ``shard_ids=None``
+    connects all of them. ``worker`` is the launcher's worker number, and
+    ``launched`` whether the launcher started this process as a worker.
+    """
+
+    def __init__(self, shard_count=None, shard_ids=None, worker=0, launched=False):
+        self.shard_count = shard_count
+        self.shard_ids = frozenset(shard_ids) if shard_ids is not None else None
+        self.worker = worker
+        self.launched = launched
+
+    @classmethod
+    def from_config(cls, config, environ=os.environ):
+        """The launcher's environment wins over ``shard_count``/``shard_ids`` in the config."""
+        if ENV_SHARD_IDS in environ:
+            return cls(
+                int(environ[ENV_SHARD_COUNT]),
+                [int(part) for part in environ[ENV_SHARD_IDS].split(",")],
+                int(environ.get(ENV_WORKER, 0)),
+                launched=True,
+            )
+        return cls(config.shard_count, config.shard_ids)
+
+    def owns(self, guild_id):
+        return self.shard_ids is None or shard_of(guild_id, self.shard_count) in self.shard_ids
+
+    def bot_options(self):
+        """Keyword arguments for ``AutoShardedBot``."""
+        options = {}
+        if self.shard_count is not None:
+            options["shard_count"] = self.shard_count
+        if self.shard_ids is not None:
+            options["shard_ids"] = sorted(self.shard_ids)
+        return options
+
+    def describe(self):
+        if self.shard_ids is None:
+            return f"all of {self.shard_count or 'the recommended number of'} shards"
+        return f"shards {', '.join(map(str, sorted(self.shard_ids)))} of {self.shard_count} (worker {self.worker})"
+
+
+def split(shard_count, workers):
+    """Contiguous shard ranges, as even as possible, one per worker."""
+    workers = min(workers, shard_count)
+    size, extra = divmod(shard_count, workers)
+    ranges, start = [], 0
+    for worker in range(workers):
+        end = start + size + (1 if worker < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+def preparing(environ=os.environ):
+    """Whether this is the launcher's setup run, which should exit once one-time setup is done."""
+    return bool(environ.get(ENV_PREPARE))
+
+
+def launch(script, shard_count, workers):
+    """Run ``script`` once to prepare, then once per shard range, and wait for all of them."""
+    prepared = subprocess.run([sys.executable, script], env={**os.environ, ENV_PREPARE: "1"})
+    if prepared.returncode != 0:
+        print(f"❌ {script} failed to prepare (exit code {prepared.returncode}), not starting workers.")
+        return prepared.returncode
+
+    processes = []
+    for worker, shard_ids in enumerate(split(shard_count, workers)):
+        env = dict(os.environ)
+        env[ENV_SHARD_COUNT] = str(shard_count)
+        env[ENV_SHARD_IDS] = ",".join(map(str, shard_ids))
+        env[ENV_WORKER] = str(worker)
+        processes.append(subprocess.Popen([sys.executable, script], env=env))
+        print(f"✅ Worker {worker}: shards {shard_ids[0]}-{shard_ids[-1]} (pid {processes[-1].pid})")
+
+    def stop(signum, frame):
+        for process in processes:
+            if process.poll() is None:
+                process.send_signal(signal.SIGINT)
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    return max(process.wait() for process in processes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a bot's shards across several worker processes.")
+    parser.add_argument("script", help="bot script to run, e.g. bot.py")
+    parser.add_argument("--shards", type=int, required=True, help="total number of shards")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of worker processes")
+    args = parser.parse_args()
+    if args.shards < 1 or args.workers < 1:
+        parser.error("--shards and --workers must be at least 1")
+    sys.exit(launch(args.script, args.shards, args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+
+_DELETE = object()
+
+
+class StateStore:
+    """Bot state in one SQLite database, written in batches by a background thread.
+
+    State is grouped in namespaces of string keys and JSON values. Everything
+    is read in one query when the store opens; each namespace is then handed
+    to the object that owns it with ``load`` and kept in memory there.
+    ``set`` and ``delete`` only record the change, so they never block the
+    event loop; a writer thread commits what has accumulated every
+    ``flush_interval`` seconds in one transaction, keeping only the latest
+    value per key. The database runs in WAL mode, so a crash loses at most
+    the last unflushed batch and never leaves a half-written one. Values are
+    serialized when they are recorded, so a value that isn't JSON fails in
+    the caller, not in the writer.
+    """
+
+    def __init__(self, path, flush_interval=0.5):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flushed = threading.Condition(self._lock)
+        self._wake = threading.Event()
+        # (namespace, key) -> JSON text, or _DELETE
+        self._pending = {}
+        self._generation = 0
+        self._written_generation = 0
+        self._closed = False
+        self._writer_alive = True
+        self.batches = 0
+        self.rows_written = 0
+
+        connection = self._connect()
+        try:
+            self._snapshot = {}
+            for namespace, key, value in connection.execute("SELECT namespace, key, value FROM state"):
+                self._snapshot.setdefault(namespace, {})[key] = json.loads(value)
+        finally:
+            connection.close()
+
+        self._thread = threading.Thread(target=self._writer, name="state-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # In WAL mode NORMAL only risks the latest commits on power loss, not corruption.
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS state ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+            "PRIMARY KEY (namespace, key)) WITHOUT ROWID"
+        )
+        connection.commit()
+        return connection
+
+    def load(self, namespace):
+        """Hand over the stored entries of ``namespace`` as a dict (once)."""
+        return self._snapshot.pop(namespace, {})
+
+    def set(self, namespace, key, value):
+        """Store a JSON-serializable value. Don't mutate it afterwards."""
+        key = str(key)
+        text = json.dumps(value)
+        if namespace in self._snapshot:
+            self._snapshot[namespace][key] = value
+        with self._lock:
+            self._pending[(namespace, key)] = text
+            self._generation += 1
+
+    def update(self, namespace, items):
+        """``set`` for many ``(key, value)`` pairs under one lock."""
+        items = [(str(key), value) for key, value in items]
+        texts = [((namespace, key), json.dumps(value)) for key, value in items]
+        if namespace in self._snapshot:
+            self._snapshot[namespace].update(items)
+        with self._lock:
+            self._pending.update(texts)
+            self._generation += 1
+
+    def delete(self, namespace, key):
+        key = str(key)
+        if namespace in self._snapshot:
+            self._snapshot[namespace].pop(key, None)
+        with self._lock:
+            self._pending[(namespace, key)] = _DELETE
+            self._generation += 1
+
+    def rename(self, old, new):
+        """Move the entries of namespace ``old`` to ``new``. Call before ``load`` of either."""
+        entries = self._snapshot.pop(old, {})
+        if entries:
+            self._snapshot.setdefault(new, {}).update(entries)
+            with self._lock:
+                for key, value in entries.items():
+                    self._pending[(new, key)] = json.dumps(value)
+                    self._pending[(old, key)] = _DELETE
+                self._generation += 1
+        return len(entries)
+
+    def migrate_json(self, path, namespace, convert=None):
+        """Import a legacy JSON file into ``namespace`` once, then rename it.
+
+        The file's top-level object becomes the namespace's entries, or
+        ``convert(data)`` does if given. Call before ``load(namespace)``.
+        """
+        if not os.path.exists(path):
+            return 0
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"⚠️ Could not import {path}: {e}")
+            return 0
+        entries = convert(data) if convert else data
+        self._snapshot.setdefault(namespace, {})
+        self.update(namespace, entries.items())
+        if not self.flush():
+            # Left in place, so the next start imports it again.
+            print(f"⚠️ Could not save the entries from {path}; it will be imported again next time.")
+            return len(entries)
+        try:
+            os.replace(path, path + ".migrated")
+        except FileNotFoundError:
+            # Another process imported and renamed it first; importing it twice is harmless.
+            pass
+        print(f"✅ Imported {len(entries)} entries from {path} into {self.path}.")
+        return len(entries)
+
+    def flush(self, timeout=None):
+        """Block until everything recorded so far is committed. Not for the event loop.
+
+        Returns False if that didn't happen: on ``timeout``, or when the store
+        is closed or its writer has stopped.
+        """
+        with self._lock:
+            target = self._generation
+            self._wake.set()
+            self._flushed.wait_for(
+                lambda: self._written_generation >= target or self._closed or not self._writer_alive, timeout
+            )
+            return self._written_generation >= target
+
+    def close(self):
+        if self._closed:
+            return
+        with self._lock:
+            self._closed = True
+        self._wake.set()
+        self._thread.join()
+
+    def _writer(self):
+        try:
+            connection = self._connect()
+        except Exception as e:
+            print(f"❌ Could not open {self.path} for writing, state changes won't be saved: {e}")
+            self._writer_stopped()
+            return
+        try:
+            while True:
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                with self._lock:
+                    batch, self._pending = self._pending, {}
+                    generation = self._generation
+                    closing = self._closed
+                if batch:
+                    try:
+                        self._write(connection, batch)
+                    except Exception as e:
+                        print(f"❌ Writing state to {self.path} failed, retrying: {e}")
+                        with self._lock:
+                            # Changes made since the swap are newer and win.
+                            batch.update(self._pending)
+                            self._pending = batch
+                        if closing:
+                            return
+                        time.sleep(self.flush_interval)
+                        continue
+                with self._lock:
+                    self._written_generation = generation
+                    self._flushed.notify_all()
+                if closing:
+                    return
+        finally:
+            connection.close()
+            self._writer_stopped()
+
+    def _writer_stopped(self):
+        with self._lock:
+            self._writer_alive = False
+            self._flushed.notify_all()
+
+    def _write(self, connection, batch):
+        upserts = [(namespace, key, value) for (namespace, key), value in batch.items() if value is not _DELETE]
+        deletes = [(namespace, key) for (namespace, key), value in batch.items() if value is _DELETE]
+        with connection:
+            if upserts:
+                connection.executemany(
+                    "INSERT INTO state (namespace, key, value) VALUES (?, ?, ?) "
+                    "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value",
+                    upserts,
+                )
+            if deletes:
+                connection.executemany("DELETE FROM state WHERE namespace = ? AND key = ?", deletes)
+        self.batches += 1
+        self.rows_written += len(batch)
@@ -0,0 +1,108 @@
+import asyncio
+import heapq
+import time
+
+
+class TempBanScheduler:
+    """Persistent unban queue for temporary bans.
+
+    Pending unbans live in a ``StateStore`` and in a min-heap ordered by expiry,
+    so a temporary ban costs one small entry instead of a sleeping coroutine
+    and is not lost when the bot restarts. A single background task waits for
+    the earliest expiry and fires due unbans in small, rate-limited batches.
+    An entry is only forgotten once ``unban_callback`` returns; if it raises,
+    the unban is retried after ``retry_delay`` seconds.
+    When several processes share the store, ``owns(guild_id)`` picks the
+    entries this one is responsible for; the others are left alone.
+    """
+
+    def __init__(self, store, unban_callback, batch_size=5, batch_interval=1.0, retry_delay=60,
+                 namespace="temp_bans", owns=None):
+        self.store = store
+        self.namespace = namespace
+        self.unban_callback = unban_callback
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.retry_delay = retry_delay
+        self.owns = owns
+        # (guild_id, user_id) -> (expires_at, channel_id)
+        self._pending = {}
+        # (expires_at, guild_id, user_id); entries that no longer match _pending are skipped
+        self._heap = []
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self.load()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def load(self):
+        self._pending.clear()
+        for key, (expires_at, channel_id) in self.store.load(self.namespace).items():
+            guild_id, user_id = (int(part) for part in key.split(":"))
+            if self.owns is not None and not self.owns(guild_id):
+                continue
+            self._pending[(guild_id, user_id)] = (expires_at, channel_id)
+        self._heap = [(expires_at, guild_id, user_id)
+                      for (guild_id, user_id), (expires_at, _) in self._pending.items()]
+        heapq.heapify(self._heap)
+
+    def schedule(self, guild_id, user_id, expires_at, channel_id=None):
+        self._pending[(guild_id, user_id)] = (expires_at, channel_id)
+        heapq.heappush(self._heap, (expires_at, guild_id, user_id))
+        self.store.set(self.namespace, f"{guild_id}:{user_id}", [expires_at, channel_id])
+        self._wakeup.set()
+
+    def cancel(self, guild_id, user_id):
+        if self._pending.pop((guild_id, user_id), None) is not None:
+            self.store.delete(self.namespace, f"{guild_id}:{user_id}")
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def _pop_due(self, now):
+        due = []
+        while self._heap and len(due) < self.batch_size:
+            expires_at, guild_id, user_id = self._heap[0]
+            entry = self._pending.get((guild_id, user_id))
+            if entry is None or entry[0] != expires_at:
+                heapq.heappop(self._heap)
+                continue
+            if expires_at > now:
+                break
+            heapq.heappop(self._heap)
+            # Stays in _pending and the store until the unban went through.
+            due.append((guild_id, user_id, expires_at, entry[1]))
+        return due
+
+    def _done(self, guild_id, user_id, expires_at):
+        entry = self._pending.get((guild_id, user_id))
+        # A new ban while the unban ran replaces the entry; keep that one.
+        if entry is not None and entry[0] == expires_at:
+            self.cancel(guild_id, user_id)
+
+    async def _run(self):
+        while True:
+            now = time.time()
+            due = self._pop_due(now)
+            if due:
+                for guild_id, user_id, expires_at, channel_id in due:
+                    try:
+                        await self.unban_callback(guild_id, user_id, channel_id)
+                    except Exception as e:
+                        print(f"Failed to unban {user_id}, retrying in {self.retry_delay}s: {e}")
+                        if self._pending.get((guild_id, user_id), (None,))[0] == expires_at:
+                            self.schedule(guild_id, user_id, now + self.retry_delay, channel_id)
+                    else:
+                        self._done(guild_id, user_id, expires_at)
+                # Spread large catch-up backlogs out instead of bursting the ban route.
+                await asyncio.sleep(self.batch_interval)
+                continue
+
+            timeout = self._heap[0][0] - now if self._heap else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
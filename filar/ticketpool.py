@@ -0,0 +1,70 @@
+import asyncio
+
+# Topic of a spare channel, so the pool can find its channels again after a restart.
+SPARE_TOPIC = "Spare ticket channel, not in use yet."
+
+
+class TicketPool:
+    """Hidden ticket channels created ahead of time, so a ticket doesn't wait for one.
+
+    ``claim`` hands out a spare channel at once, or None when the pool is
+    empty and the caller has to create a channel itself. ``refill`` creates
+    channels with ``await create()`` in the background until ``size`` are
+    ready, at most one every ``interval`` seconds, so channel creation, a
+    slow and tightly rate-limited call, stays off the interaction path.
+    """
+
+    def __init__(self, create, size=0, interval=5.0):
+        self.create = create
+        self.size = size
+        self.interval = interval
+        self._spares = []
+        self._filling = None
+        self._last_created = None
+        self.claimed = 0
+        self.created = 0
+
+    def __len__(self):
+        return len(self._spares)
+
+    def adopt(self, channels):
+        """Take back spare channels that exist already, e.g. from before a restart."""
+        known = {channel.id for channel in self._spares}
+        self._spares.extend(channel for channel in channels if channel.id not in known)
+
+    def close(self):
+        """Stop refilling; spare channels that exist stay for ``adopt`` to find."""
+        self.size = 0
+        if self._filling is not None:
+            self._filling.cancel()
+
+    def claim(self):
+        while self._spares:
+            channel = self._spares.pop(0)
+            # Skip channels someone deleted while they waited.
+            if channel.guild.get_channel(channel.id) is not None:
+                self.claimed += 1
+                self.refill()
+                return channel
+        self.refill()
+        return None
+
+    def refill(self):
+        if self._filling is None and len(self._spares) < self.size:
+            self._filling = asyncio.create_task(self._fill())
+
+    async def _fill(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while len(self._spares) < self.size:
+                if self._last_created is not None:
+                    delay = self._last_created + self.interval - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                self._last_created = loop.time()
+                self._spares.append(await self.create())
+                self.created += 1
+        except Exception as e:
+            print(f"❌ Could not create a spare ticket channel: {e}")
+        finally:
+            self._filling = None
@@ -0,0 +1,87 @@
+import re
+
+# Both bots end the ticket channel topic with "(ID: <owner id>)".
+_TOPIC_OWNER = re.compile(r"\(ID: (\d+)\)\s*$")
+
+
+def owner_from_topic(topic):
+    if not topic:
+        return None
+    match = _TOPIC_OWNER.search(topic)
+    return int(match.group(1)) if match else None
+
+
+class TicketRegistry:
+    """Open tickets indexed both by owner and by channel, saved in a ``StateStore``.
+
+    ``sync`` reconciles the saved index with the guild's channels at startup,
+    dropping tickets whose channel is gone and picking up ticket channels
+    that are missing from the store, using the owner id in the channel topic.
+    """
+
+    def __init__(self, store, namespace="tickets"):
+        self.store = store
+        self.namespace = namespace
+        self._by_owner = {}
+        self._by_channel = {}
+        for owner_id, channel_id in store.load(namespace).items():
+            self._link(int(owner_id), channel_id)
+
+    def __len__(self):
+        return len(self._by_owner)
+
+    def __contains__(self, owner_id):
+        return owner_id in self._by_owner
+
+    def channel_for(self, owner_id):
+        return self._by_owner.get(owner_id)
+
+    def owner_of(self, channel_id):
+        return self._by_channel.get(channel_id)
+
+    def _link(self, owner_id, channel_id):
+        old_channel = self._by_owner.pop(owner_id, None)
+        if old_channel is not None:
+            self._by_channel.pop(old_channel, None)
+        old_owner = self._by_channel.pop(channel_id, None)
+        if old_owner is not None:
+            self._by_owner.pop(old_owner, None)
+            self.store.delete(self.namespace, old_owner)
+        self._by_owner[owner_id] = channel_id
+        self._by_channel[channel_id] = owner_id
+
+    def add(self, owner_id, channel_id):
+        self._link(owner_id, channel_id)
+        self.store.set(self.namespace, owner_id, channel_id)
+
+    def remove_owner(self, owner_id):
+        channel_id = self._by_owner.pop(owner_id, None)
+        if channel_id is not None:
+            self._by_channel.pop(channel_id, None)
+            self.store.delete(self.namespace, owner_id)
+        return channel_id
+
+    def remove_channel(self, channel_id):
+        owner_id = self._by_channel.pop(channel_id, None)
+        if owner_id is not None:
+            self._by_owner.pop(owner_id, None)
+            self.store.delete(self.namespace, owner_id)
+        return owner_id
+
+    def sync(self, channels):
+        """Reconcile with the guild's text channels. Returns (added, removed)."""
+        seen = set()
+        added = 0
+        for channel in channels:
+            seen.add(channel.id)
+            if channel.id in self._by_channel:
+                continue
+            owner_id = owner_from_topic(channel.topic)
+            if owner_id is not None and owner_id not in self._by_owner:
+                self.add(owner_id, channel.id)
+                added += 1
+
+        stale = [channel_id for channel_id in self._by_channel if channel_id not in seen]
+        for channel_id in stale:
+            self.remove_channel(channel_id)
+        return added, len(stale)
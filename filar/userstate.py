@@ -0,0 +1,222 @@
+import time
+from array import array
+from bisect import bisect_left
+
+
+class CompactIdMap:
+    """Dict-like map from Discord ids to small unsigned ints, stored in arrays.
+
+    Keys live in a sorted ``array('Q')`` with a parallel value array of the
+    given typecode, so an entry costs 8 bytes plus the value size instead of
+    a dict slot and two int objects. New keys are collected in a small dict
+    and deletions in a tombstone set; both are merged into the arrays once
+    they grow past a fraction of the map, which keeps inserts amortized cheap.
+    """
+
+    def __init__(self, typecode="I", merge_ratio=8, min_merge=1024):
+        self._keys = array("Q")
+        self._values = array(typecode)
+        self._pending = {}
+        self._deleted = set()
+        self.merge_ratio = merge_ratio
+        self.min_merge = min_merge
+
+    def _index(self, key):
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return i
+        return -1
+
+    def __len__(self):
+        return len(self._keys) - len(self._deleted) + len(self._pending)
+
+    def __contains__(self, key):
+        if key in self._pending:
+            return True
+        return key not in self._deleted and self._index(key) >= 0
+
+    def get(self, key, default=None):
+        if key in self._pending:
+            return self._pending[key]
+        if key in self._deleted:
+            return default
+        i = self._index(key)
+        return self._values[i] if i >= 0 else default
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key not in self._pending:
+            i = self._index(key)
+            if i >= 0:
+                self._values[i] = value
+                self._deleted.discard(key)
+                return
+        self._pending[key] = value
+        self._maybe_merge()
+
+    def update(self, items):
+        """Set many entries at once, merging into the arrays at most once."""
+        for key, value in items:
+            if key not in self._pending:
+                i = self._index(key)
+                if i >= 0:
+                    self._values[i] = value
+                    self._deleted.discard(key)
+                    continue
+            self._pending[key] = value
+        self._maybe_merge()
+
+    def pop(self, key, default=None):
+        if key in self._pending:
+            return self._pending.pop(key)
+        if key in self._deleted:
+            return default
+        i = self._index(key)
+        if i < 0:
+            return default
+        value = self._values[i]
+        self._deleted.add(key)
+        # Merging moves entries, so ``i`` is stale afterwards.
+        self._maybe_merge()
+        return value
+
+    def __delitem__(self, key):
+        if self.pop(key, _MISSING) is _MISSING:
+            raise KeyError(key)
+
+    def clear(self):
+        del self._keys[:]
+        del self._values[:]
+        self._pending.clear()
+        self._deleted.clear()
+
+    def items(self):
+        deleted = self._deleted
+        for key, value in zip(self._keys, self._values):
+            if key not in deleted:
+                yield key, value
+        yield from list(self._pending.items())
+
+    def __iter__(self):
+        for key, _ in self.items():
+            yield key
+
+    def _maybe_merge(self):
+        limit = max(self.min_merge, len(self._keys) // self.merge_ratio)
+        if len(self._pending) > limit or len(self._deleted) > limit:
+            self.compact()
+
+    def compact(self):
+        """Fold pending inserts and deletions into the sorted arrays."""
+        if self._deleted:
+            live = [(key, value) for key, value in zip(self._keys, self._values) if key not in self._deleted]
+            keys = [key for key, _ in live]
+            values = [value for _, value in live]
+        else:
+            keys = self._keys.tolist()
+            values = self._values.tolist()
+        keys.extend(self._pending.keys())
+        values.extend(self._pending.values())
+        # Two sorted runs, so this sort is close to linear.
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self._keys = array("Q", map(keys.__getitem__, order))
+        self._values = array(self._values.typecode, map(values.__getitem__, order))
+        self._pending.clear()
+        self._deleted.clear()
+
+    def nbytes(self):
+        """Approximate memory held by the arrays (pending entries not included)."""
+        return self._keys.buffer_info()[1] * self._keys.itemsize + \
+            self._values.buffer_info()[1] * self._values.itemsize
+
+
+_MISSING = object()
+
+VERIFIED = 1
+FAILED = 2
+
+
+class VerificationOutcomes:
+    """Verification results per user as flag bits, forgotten after ``ttl`` seconds.
+
+    Each record packs the epoch second it was written and its flags into one
+    64-bit value in a ``CompactIdMap``. ``verified`` and ``failed`` are
+    set-like views, so code that used plain sets keeps working.
+    """
+
+    def __init__(self, ttl=30 * 86400, evict_interval=3600):
+        self.ttl = ttl
+        self.evict_interval = evict_interval
+        self._records = CompactIdMap("Q")
+        self._counts = {VERIFIED: 0, FAILED: 0}
+        self._last_evict = time.time()
+        self.verified = OutcomeSet(self, VERIFIED)
+        self.failed = OutcomeSet(self, FAILED)
+
+    def _forget(self, user_id):
+        record = self._records.pop(user_id)
+        if record is not None:
+            for flag in self._counts:
+                if record & flag:
+                    self._counts[flag] -= 1
+        return record
+
+    def set(self, user_id, flag):
+        """Record an outcome, replacing the user's previous one."""
+        now = time.time()
+        self._forget(user_id)
+        self._records[user_id] = (int(now) << 8) | flag
+        self._counts[flag] += 1
+        if now - self._last_evict > self.evict_interval:
+            self.evict(now)
+
+    def has(self, user_id, flag):
+        record = self._records.get(user_id)
+        if record is None or not record & flag:
+            return False
+        return time.time() - (record >> 8) <= self.ttl
+
+    def discard(self, user_id, flag):
+        record = self._records.get(user_id)
+        if record is not None and record & flag:
+            self._forget(user_id)
+
+    def count(self, flag):
+        now = time.time()
+        if now - self._last_evict > self.evict_interval:
+            self.evict(now)
+        return self._counts[flag]
+
+    def evict(self, now=None):
+        now = now or time.time()
+        self._last_evict = now
+        cutoff = int(now - self.ttl)
+        expired = [user_id for user_id, record in self._records.items() if record >> 8 < cutoff]
+        for user_id in expired:
+            self._forget(user_id)
+        return len(expired)
+
+
+class OutcomeSet:
+    """Set-like view of the users carrying one verification flag."""
+
+    def __init__(self, outcomes, flag):
+        self._outcomes = outcomes
+        self._flag = flag
+
+    def add(self, user_id):
+        self._outcomes.set(user_id, self._flag)
+
+    def discard(self, user_id):
+        self._outcomes.discard(user_id, self._flag)
+
+    def __contains__(self, user_id):
+        return self._outcomes.has(user_id, self._flag)
+
+    def __len__(self):
+        return self._outcomes.count(self._flag)
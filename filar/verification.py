@@ -0,0 +1,99 @@
+import asyncio
+import heapq
+
+
+class VerificationManager:
+    """Routes DM answers to pending verification challenges.
+
+    Pending challenges are keyed by user id and then guild id, so an
+    incoming DM finds its session with one dict lookup instead of being
+    tested against a ``wait_for`` check per pending join. A user who joined
+    several guilds at once has a challenge from each; DMs answer them in
+    the order they were asked. All timeouts share one loop timer that is
+    armed for the earliest expiry in a min-heap.
+    """
+
+    def __init__(self, timeout=120):
+        self.timeout = timeout
+        # user_id -> {guild_id: (expires_at, future)}, oldest challenge first
+        self._sessions = {}
+        # (expires_at, user_id, guild_id); entries whose session was answered are skipped on expiry
+        self._heap = []
+        self._timer = None
+        self._timer_when = None
+
+    def __len__(self):
+        return sum(len(pending) for pending in self._sessions.values())
+
+    def __contains__(self, user_id):
+        return user_id in self._sessions
+
+    async def wait_for_answer(self, guild_id, user_id, timeout=None):
+        """Wait for a DM from ``user_id`` answering ``guild_id``'s challenge.
+
+        Raises ``asyncio.TimeoutError``. Returns None if a newer challenge
+        from the same guild, e.g. after the user rejoined, replaced this one.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        expires_at = loop.time() + (timeout if timeout is not None else self.timeout)
+
+        pending = self._sessions.setdefault(user_id, {})
+        previous = pending.pop(guild_id, None)
+        if previous and not previous[1].done():
+            previous[1].set_result(None)
+        pending[guild_id] = (expires_at, future)
+        heapq.heappush(self._heap, (expires_at, user_id, guild_id))
+        self._arm(loop)
+
+        try:
+            return await future
+        finally:
+            self._forget(user_id, guild_id, future)
+
+    def _forget(self, user_id, guild_id, future):
+        pending = self._sessions.get(user_id)
+        if pending is None:
+            return
+        entry = pending.get(guild_id)
+        if entry and entry[1] is future:
+            del pending[guild_id]
+            if not pending:
+                del self._sessions[user_id]
+
+    def dispatch(self, message):
+        """Hand a DM to the user's oldest pending session. Returns True if it was consumed."""
+        pending = self._sessions.get(message.author.id)
+        if not pending:
+            return False
+        guild_id = next(iter(pending))
+        future = pending.pop(guild_id)[1]
+        if not pending:
+            del self._sessions[message.author.id]
+        if not future.done():
+            future.set_result(message)
+        return True
+
+    def _arm(self, loop):
+        if not self._heap:
+            return
+        when = self._heap[0][0]
+        if self._timer is not None:
+            if self._timer_when <= when:
+                return
+            self._timer.cancel()
+        self._timer = loop.call_at(when, self._expire, loop)
+        self._timer_when = when
+
+    def _expire(self, loop):
+        self._timer = None
+        now = loop.time()
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, user_id, guild_id = heapq.heappop(self._heap)
+            entry = self._sessions.get(user_id, {}).get(guild_id)
+            if entry is None or entry[0] != expires_at:
+                continue
+            self._forget(user_id, guild_id, entry[1])
+            if not entry[1].done():
+                entry[1].set_exception(asyncio.TimeoutError())
+        self._arm(loop)
@@ -0,0 +1,86 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from filar.config import ConfigError, ConfigManager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    path = tmp_path / "config.json"
+    shutil.copy(os.path.join(ROOT, "config.json"), path)
+    return path
+
+
+def rewrite(path, **changes):
+    config = json.loads(path.read_text(encoding="utf-8"))
+    config.update(changes)
+    path.write_text(json.dumps(config), encoding="utf-8")
+
+
+def test_reload_swaps_config_and_notifies_listeners(config_path):
+    settings = ConfigManager(str(config_path))
+    seen = []
+    settings.on_reload(lambda old, new: seen.append((old.link_warning_cooldown, new.link_warning_cooldown)))
+    rewrite(config_path, link_warning_cooldown=5, raid_join_threshold=4)
+    changed, needs_restart = settings.reload()
+    assert set(changed) == {"link_warning_cooldown", "raid_join_threshold"}
+    assert needs_restart == []
+    assert settings.current.link_warning_cooldown == 5
+    assert settings.current.guild(settings.current.guild_id).raid_join_threshold == 4
+    assert seen == [(60, 5)]
+
+
+def test_keys_that_need_a_restart_keep_their_value(config_path):
+    settings = ConfigManager(str(config_path))
+    rewrite(config_path, member_cache="lean", link_warning_cooldown=5)
+    changed, needs_restart = settings.reload()
+    assert needs_restart == ["member_cache"]
+    assert changed == ["link_warning_cooldown"]
+    assert settings.current.member_cache == "full"
+
+
+def test_invalid_file_keeps_the_current_config(config_path):
+    settings = ConfigManager(str(config_path))
+    current = settings.current
+    calls = []
+    settings.on_reload(lambda old, new: calls.append(new))
+    rewrite(config_path, link_warning_cooldown=-1)
+    with pytest.raises(ConfigError):
+        settings.reload()
+    config_path.write_text("{ not json", encoding="utf-8")
+    with pytest.raises(ConfigError):
+        settings.reload()
+    assert settings.current is current
+    assert calls == []
+
+
+def test_extra_guilds_do_not_inherit_ids(config_path):
+    rewrite(config_path, auto_reaction_channels={"999": ["🎉"]}, ticket_pool_category_id=998, guilds={
+        "42": {"ticket_channel_id": 1, "role_channel_id": 2, "target_channel_id": 3, "staff_role_id": 4},
+        "43": {"ticket_channel_id": 5, "role_channel_id": 6, "target_channel_id": 7, "staff_role_id": 8,
+               "emoji_to_role": {"⭐": 9}, "allowed_link_channels": [10]},
+    })
+    config = ConfigManager(str(config_path)).current
+    main = config.guild(config.guild_id)
+    assert main.role_panels["role_message"].emoji_to_role
+    assert main.allowed_link_channels
+
+    bare = config.guild(42)
+    assert bare.role_panels == {}
+    assert bare.allowed_link_channels == frozenset()
+    assert bare.auto_reaction_channels == {}
+    assert bare.ticket_pool_category_id is None
+    assert 999 not in bare.reaction_sets
+    # Settings that aren't IDs are still shared.
+    assert bare.link_filter == main.link_filter
+    assert bare.auto_reaction_emojis == main.auto_reaction_emojis
+
+    own = config.guild(43)
+    assert own.role_panels["role_message"].emoji_to_role == {"⭐": 9}
+    assert own.role_panels["role_message"].channel_id == 6
+    assert own.allowed_link_channels == frozenset({10})
@@ -0,0 +1,131 @@
+import asyncio
+import contextlib
+import io
+import json
+
+import pytest
+
+pytest.importorskip("discord")
+
+from benchmarks.simulator import Simulation
+
+
+def rewrite_config(**changes):
+    with open("config.json", "r", encoding="utf-8") as f:
+        config = json.load(f)
+    config.update(changes)
+    with open("config.json", "w", encoding="utf-8") as f:
+        json.dump(config, f)
+
+
+def test_reload_updates_live_objects(tmp_path, monkeypatch):
+    async def run():
+        sim = Simulation(str(tmp_path))
+        try:
+            module = sim.module
+            # The bot reads its config relative to where it runs.
+            monkeypatch.chdir(tmp_path)
+            rewrite_config(link_warning_cooldown=5, role_change_window=0.25, raid_join_threshold=3,
+                           raid_dm_rate=3, outbound_cosmetic_backlog=7)
+            with contextlib.redirect_stdout(io.StringIO()):
+                changed, needs_restart = module.settings.reload()
+
+            assert "link_warning_cooldown" in changed
+            assert needs_restart == []
+            assert module.link_warnings.cooldown == 5
+            assert module.role_changes.window == 0.25
+            assert module.guilds.get(sim.guild.id).raid_monitor.threshold == 3
+            assert module.dm_queue.bucket.rate == 3
+            assert module.outbound.shed_backlog == 7
+        finally:
+            sim.close()
+
+    asyncio.run(run())
+
+
+def test_watcher_keeps_applying_changes(tmp_path, monkeypatch):
+    async def run():
+        sim = Simulation(str(tmp_path), config_watch_interval=0.01)
+        settings = sim.module.settings
+        try:
+            monkeypatch.chdir(tmp_path)
+            with contextlib.redirect_stdout(io.StringIO()):
+                settings.start()
+                for cooldown in (9, 11):
+                    rewrite_config(link_warning_cooldown=cooldown)
+                    # Make sure the watcher sees a new modification time.
+                    settings._mtime = None
+                    await asyncio.sleep(0.05)
+                    assert sim.module.link_warnings.cooldown == cooldown
+            assert not settings._task.done()
+        finally:
+            settings._task.cancel()
+            sim.close()
+
+    asyncio.run(run())
+
+
+def test_removed_guild_is_no_longer_served(tmp_path, monkeypatch):
+    async def run():
+        sim = Simulation(str(tmp_path), guilds=2)
+        module = sim.module
+        removed = sim.guilds[1]
+        try:
+            monkeypatch.chdir(tmp_path)
+            assert module.guilds.get(removed.id) is not None
+            with open("config.json", "r", encoding="utf-8") as f:
+                extra_guilds = json.load(f)["guilds"]
+            with contextlib.redirect_stdout(io.StringIO()):
+                rewrite_config(guilds={})
+                module.settings.reload()
+                assert module.guilds.get(removed.id) is None
+                assert removed.id not in [g.guild_id for g in module.guilds]
+                assert module.guilds.get(sim.guild.id) is not None
+
+                member = removed.add_member("chatter")
+                sim.gateway.dispatch("message", sim.message(removed.target_channel, member, "hi discord.gg/abc"))
+                sim.gateway.dispatch("member_join", removed.add_member("newbie"))
+                await sim.settle()
+                assert sim.gateway.errors == 0
+
+                rewrite_config(guilds=extra_guilds)
+                module.settings.reload()
+                assert module.guilds.get(removed.id).rules.guild_id == removed.id
+        finally:
+            sim.close()
+
+    asyncio.run(run())
+
+
+def test_added_guild_is_set_up(tmp_path, monkeypatch):
+    async def run():
+        sim = Simulation(str(tmp_path), guilds=2)
+        module = sim.module
+        added = sim.guilds[1]
+        set_up = []
+
+        async def setup_guild(guild):
+            set_up.append(guild.id)
+
+        try:
+            monkeypatch.chdir(tmp_path)
+            monkeypatch.setattr(module, "setup_guild", setup_guild)
+            monkeypatch.setattr(module.bot, "is_ready", lambda: True)
+            with open("config.json", "r", encoding="utf-8") as f:
+                extra_guilds = json.load(f)["guilds"]
+            with contextlib.redirect_stdout(io.StringIO()):
+                rewrite_config(guilds={})
+                module.settings.reload()
+                rewrite_config(guilds=extra_guilds)
+                module.settings.reload()
+                await asyncio.sleep(0)
+                # A reload that doesn't add the guild again doesn't set it up again.
+                rewrite_config(link_warning_cooldown=5)
+                module.settings.reload()
+                await asyncio.sleep(0)
+            assert set_up == [added.id]
+            assert module.guilds.get(added.id) is not None
+        finally:
+            sim.close()
+
+    asyncio.run(run())
@@ -0,0 +1,93 @@
+import asyncio
+import contextlib
+import io
+import time
+
+import pytest
+
+from filar.links import DENIED, INVITE, LINK, LinkClassifier
+
+
+@pytest.mark.parametrize("content, verdict", [
+    ("just chatting, nothing to see", None),
+    ("see https://example.com/page", LINK),
+    ("hxxps://discord[.]gg/abc", INVITE),
+    ("join discord . gg / abc", INVITE),
+    ("https://discord.com/invite/abc", INVITE),
+    ("example.com/page", LINK),
+    ("go to example.com", LINK),
+    ("www.hi.to", LINK),
+    ("hi.to/page", LINK),
+    ("https://ok.co", LINK),
+    ("docs.python.org", LINK),
+    ("write to bob@example.com", None),
+])
+def test_classify(content, verdict):
+    assert LinkClassifier().classify(content) == verdict
+
+
+@pytest.mark.parametrize("content", [
+    "I like it.Me too",
+    "hi.to all",
+    "this is so.com",
+    "ok.co",
+    "po prostu.pl",
+    "that's it.Us vs them",
+])
+def test_no_false_positives(content):
+    assert LinkClassifier().classify(content) is None
+
+
+def test_allow_and_deny_lists():
+    classifier = LinkClassifier(allow_domains=["youtube.com"], deny_domains=["evil.co"])
+    assert classifier.classify("https://www.youtube.com/watch?v=1") is None
+    assert classifier.classify("https://cdn.evil.co/x") == DENIED
+    # A denied domain counts even where a bare one would be ignored.
+    assert classifier.classify("try evil.co") == DENIED
+    assert classifier.classify("youtube.com/a then discord.gg/abc then evil.co/x") == DENIED
+
+
+@pytest.mark.parametrize("content", [
+    "a.co." * 400,
+    "a.to" * 500,
+    "x" * 2000 + ".com",
+    "a.b" * 1000 + ".com",
+    "a.com." * 400,
+    "a.com.a" * 300,
+    ("x" * 50 + ".com ") * 40,
+    "http:" * 400,
+    "discord " * 250,
+], ids=lambda content: f"{content[:10]}..({len(content)})")
+def test_worst_case_is_linear(content):
+    classifier = LinkClassifier(deny_domains=["evil.co"])
+    start = time.perf_counter()
+    for _ in range(10):
+        classifier.classify(content)
+    assert (time.perf_counter() - start) / 10 < 0.01
+
+
+def test_message_with_removed_link_still_runs_commands(tmp_path, monkeypatch):
+    pytest.importorskip("discord")
+    from benchmarks.simulator import Simulation
+
+    async def run():
+        sim = Simulation(str(tmp_path))
+        module = sim.module
+        processed = []
+
+        async def process_commands(message):
+            processed.append(message.content)
+
+        monkeypatch.setattr(module.bot, "process_commands", process_commands)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                member = sim.guild.add_member("chatter")
+                sim.gateway.dispatch("message", sim.message(sim.guild.target_channel, member, "!stats discord.gg/abc"))
+                await sim.settle()
+            assert sim.gateway.errors == 0
+        finally:
+            sim.close()
+        assert processed == ["!stats discord.gg/abc"]
+        assert sim.rest.calls["delete"] + sim.rest.calls["delete_messages"] == 1
+
+    asyncio.run(run())
@@ -0,0 +1,59 @@
+import asyncio
+import contextlib
+import io
+import logging
+
+import pytest
+
+from filar.metrics import MetricsRegistry, watch_rate_limits
+
+
+def test_each_429_is_counted_once():
+    metrics = MetricsRegistry()
+    handler = watch_rate_limits(metrics)
+    log = logging.getLogger("discord.http")
+    try:
+        # What discord.py logs for a route 429, one that waits too long, and a global one.
+        log.warning("We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds.", "POST", "/x", 1.0)
+        log.warning("We are being rate limited. %s %s responded with 429. Timeout of %.2f was too long, "
+                    "erroring instead.", "POST", "/x", 90.0)
+        log.warning("We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds.", "GET", "/y", 2.0)
+        log.warning("Global rate limit has been hit. Retrying in %.2f seconds.", 2.0)
+        log.warning("Some other warning about a 429 and a rate limit.")
+    finally:
+        log.removeHandler(handler)
+    assert handler.responses.get() == 3
+    assert handler.global_limits.get() == 1
+    assert 'filar_rate_limited_total 3' in metrics.render()
+
+
+def test_interactions_are_timed(tmp_path):
+    pytest.importorskip("discord")
+    from benchmarks.simulator import FakeInteraction, Simulation
+
+    async def run():
+        sim = Simulation(str(tmp_path))
+        module = sim.module
+        seconds = module.metrics._metrics["filar_handler_seconds"]
+        errors = module.metrics._metrics["filar_handler_errors_total"]
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                interaction = FakeInteraction(sim.rest, sim.guild.add_member("customer"), sim.guild)
+                sim.gateway.click(module.TicketButton().create_ticket, interaction)
+                await sim.settle()
+
+                interaction = FakeInteraction(sim.rest, sim.guild.add_member("moderator"), None)
+                await module.unban.callback(interaction, user="nobody")
+
+                broken = FakeInteraction(sim.rest, sim.guild.add_member("other"), sim.guild)
+                broken.response = None
+                with pytest.raises(AttributeError):
+                    await module.TicketButton().create_ticket.callback(broken)
+        finally:
+            sim.close()
+        assert seconds.count("component", "TicketButton.create_ticket") == 2
+        assert errors.get("component", "TicketButton.create_ticket") == 1
+        assert seconds.count("app_command", "unban") == 1
+        assert errors.get("app_command", "unban") == 0
+
+    asyncio.run(run())
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from filar.outbound import COSMETIC, MODERATION, ROLES, LoadShed, OutboundScheduler
+
+
+def test_higher_lanes_go_first():
+    async def run():
+        outbound = OutboundScheduler(max_concurrency=1)
+        order = []
+        gate = asyncio.Event()
+
+        async def job(name):
+            order.append(name)
+            await gate.wait()
+
+        first = outbound.submit(COSMETIC, job, "first")
+        calls = [outbound.submit(lane, job, name)
+                 for lane, name in ((COSMETIC, "cosmetic"), (ROLES, "roles"), (MODERATION, "moderation"))]
+        gate.set()
+        await asyncio.gather(first, *calls)
+        assert order == ["first", "moderation", "roles", "cosmetic"]
+
+    asyncio.run(run())
+
+
+def test_backed_up_cosmetic_lane_sheds_oldest():
+    async def run():
+        outbound = OutboundScheduler(max_concurrency=1, shed_backlog=2)
+        gate = asyncio.Event()
+
+        async def job(value):
+            await gate.wait()
+            return value
+
+        running = asyncio.ensure_future(outbound.call(ROLES, job, "running"))
+        await asyncio.sleep(0)
+        waiting = [asyncio.ensure_future(outbound.call(COSMETIC, job, i)) for i in range(4)]
+        await asyncio.sleep(0)
+        assert outbound.depth(COSMETIC) == 2
+        assert outbound.shed[COSMETIC] == 2
+        gate.set()
+        results = await asyncio.gather(*waiting, return_exceptions=True)
+        assert [type(r) for r in results[:2]] == [LoadShed, LoadShed]
+        assert results[2:] == [2, 3]
+        assert await running == "running"
+
+    asyncio.run(run())
+
+
+def test_other_lanes_never_shed():
+    async def run():
+        outbound = OutboundScheduler(max_concurrency=1, shed_backlog=0)
+        done = []
+
+        async def job(i):
+            await asyncio.sleep(0)
+            done.append(i)
+
+        await asyncio.gather(*(outbound.call(ROLES, job, i) for i in range(10)))
+        assert done == list(range(10))
+        assert outbound.shed == [0, 0, 0, 0]
+
+    asyncio.run(run())
+
+
+def test_route_limit_and_failures():
+    async def run():
+        outbound = OutboundScheduler(max_concurrency=8, default_route_limit=2)
+        active = peak = 0
+
+        async def add_reaction():
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.001)
+            active -= 1
+
+        async def broken():
+            raise RuntimeError("boom")
+
+        await asyncio.gather(*(outbound.call(COSMETIC, add_reaction) for _ in range(10)))
+        assert peak == 2
+        with pytest.raises(RuntimeError):
+            await outbound.call(ROLES, broken)
+        assert outbound.failed[ROLES] == 1
+        assert outbound.completed[COSMETIC] == 10
+
+    asyncio.run(run())
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from filar.raid import ActionQueue, TokenBucket
+
+
+def test_bucket_bursts_up_to_capacity():
+    bucket = TokenBucket(rate=2, capacity=3)
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+
+@pytest.mark.parametrize("rate", [0.5, 0.2])
+def test_fractional_rate_still_allows_actions(rate):
+    bucket = TokenBucket(rate)
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    bucket.updated -= 1 / rate
+    assert bucket.try_acquire()
+
+
+def test_fractional_rate_acquire_does_not_hang():
+    async def run():
+        bucket = TokenBucket(0.5)
+        await asyncio.wait_for(bucket.acquire(), 1)
+
+    asyncio.run(run())
+
+
+def test_set_rate_keeps_a_whole_token():
+    bucket = TokenBucket(5)
+    bucket.set_rate(0.5)
+    assert bucket.capacity == 1
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+
+def test_queue_with_fractional_rate_runs_its_action():
+    async def run():
+        queue = ActionQueue("test", rate=0.25)
+        done = asyncio.Event()
+
+        async def action():
+            done.set()
+
+        assert queue.submit(action)
+        await asyncio.wait_for(done.wait(), 1)
+
+    asyncio.run(run())
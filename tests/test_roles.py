@@ -0,0 +1,88 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from filar.roles import RoleCoalescer
+
+GUILD_ID = 1
+
+
+class Server:
+    """The roles Discord really has for each member, behind members whose ``roles`` may be stale."""
+
+    def __init__(self):
+        self.roles = {}
+        self.calls = []
+        self.guild = SimpleNamespace(id=GUILD_ID, get_member=lambda member_id: None, get_role=self.role)
+
+    def role(self, role_id):
+        return SimpleNamespace(id=role_id)
+
+    def member(self, member_id, seen_roles):
+        server = self
+        self.roles.setdefault(member_id, set(seen_roles))
+
+        class Member:
+            id = member_id
+            guild = server.guild
+            roles = [server.role(role_id) for role_id in seen_roles]
+
+            async def edit(self, roles):
+                server.calls.append("edit")
+                server.roles[member_id] = {role.id for role in roles}
+
+            async def add_roles(self, *roles):
+                server.calls.append("add_roles")
+                server.roles[member_id] |= {role.id for role in roles}
+
+            async def remove_roles(self, *roles):
+                server.calls.append("remove_roles")
+                server.roles[member_id] -= {role.id for role in roles}
+
+        return Member()
+
+
+def run_batch(coalescer, requests):
+    async def run():
+        for change, member, role in requests:
+            getattr(coalescer, change)(member, role)
+        while len(coalescer):
+            await asyncio.sleep(0.001)
+
+    asyncio.run(run())
+
+
+def test_batch_is_one_edit():
+    server = Server()
+    member = server.member(10, [])
+    red, blue = server.role(100), server.role(101)
+    coalescer = RoleCoalescer(window=0.01)
+    run_batch(coalescer, [("add", member, red), ("add", member, blue), ("remove", member, blue)])
+    assert server.calls == ["edit"]
+    assert server.roles[10] == {100}
+    assert coalescer.calls_saved == 2
+
+
+def test_deltas_keep_roles_the_stale_copy_does_not_show():
+    server = Server()
+    # The member's copy is from before staff gave them role 7.
+    member = server.member(10, [])
+    server.roles[10].add(7)
+    red, blue = server.role(100), server.role(101)
+    coalescer = RoleCoalescer(window=0.01, deltas=True)
+    run_batch(coalescer, [("add", member, red), ("add", member, blue), ("remove", member, blue)])
+    assert server.roles[10] == {7, 100}
+    assert sorted(server.calls) == ["add_roles", "remove_roles"]
+
+
+@pytest.mark.parametrize("deltas", [False, True])
+def test_cancelling_changes(deltas):
+    server = Server()
+    member = server.member(10, [100])
+    red = server.role(100)
+    coalescer = RoleCoalescer(window=0.01, deltas=deltas)
+    run_batch(coalescer, [("remove", member, red), ("add", member, red)])
+    assert server.roles[10] == {100}
+    if not deltas:
+        assert server.calls == []
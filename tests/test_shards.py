@@ -0,0 +1,52 @@
+import sys
+
+from filar import shards
+from filar.shards import ShardLayout, split
+
+
+def test_split_is_even_and_contiguous():
+    assert split(10, 4) == [[0, 1, 2], [3, 4, 5], [6, 7], [8, 9]]
+    assert split(2, 4) == [[0], [1]]
+
+
+def test_layout_from_launcher_environment():
+    layout = ShardLayout.from_config(None, {shards.ENV_SHARD_COUNT: "8", shards.ENV_SHARD_IDS: "2,3",
+                                            shards.ENV_WORKER: "1"})
+    assert layout.launched and layout.worker == 1
+    assert layout.bot_options() == {"shard_count": 8, "shard_ids": [2, 3]}
+    assert layout.owns(2 << 22) and not layout.owns(4 << 22)
+
+
+def test_launcher_prepares_once_before_the_workers(tmp_path, monkeypatch):
+    log = tmp_path / "log"
+    script = tmp_path / "script.py"
+    script.write_text(
+        "import os\n"
+        "from filar.shards import ShardLayout, preparing\n"
+        "class Config:\n"
+        "    shard_count = shard_ids = None\n"
+        "layout = ShardLayout.from_config(Config)\n"
+        f"with open({str(log)!r}, 'a') as f:\n"
+        "    f.write(('prepare' if preparing() else f'worker {layout.worker} {sorted(layout.shard_ids)}') + '\\n')\n",
+        encoding="utf-8",
+    )
+    monkeypatch.setenv("PYTHONPATH", ":".join(sys.path))
+    monkeypatch.setattr(shards.signal, "signal", lambda *args: None)
+    assert shards.launch(str(script), 4, 2) == 0
+    lines = log.read_text(encoding="utf-8").splitlines()
+    assert lines[0] == "prepare"
+    assert sorted(lines[1:]) == ["worker 0 [0, 1]", "worker 1 [2, 3]"]
+
+
+def test_failed_prepare_starts_no_workers(tmp_path, capsys):
+    started = tmp_path / "started"
+    script = tmp_path / "script.py"
+    script.write_text(
+        "import os, sys\n"
+        "if os.environ.get('FILAR_PREPARE'):\n"
+        "    sys.exit(3)\n"
+        f"open({str(started)!r}, 'w').close()\n",
+        encoding="utf-8",
+    )
+    assert shards.launch(str(script), 4, 2) == 3
+    assert not started.exists()
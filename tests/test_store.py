@@ -0,0 +1,208 @@
+import json
+import os
+import random
+import signal
+import sqlite3
+import subprocess
+import sys
+import time
+
+import pytest
+
+from filar.store import StateStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def reopen(path, namespace):
+    store = StateStore(path)
+    try:
+        return store.load(namespace)
+    finally:
+        store.close()
+
+
+def test_changes_are_written_in_batches(tmp_path):
+    path = str(tmp_path / "state.db")
+    store = StateStore(path, flush_interval=60)
+    for i in range(1000):
+        store.set("counts", i % 10, i)
+    store.update("counts", [(10, "ten"), (11, {"nested": [1, 2]})])
+    assert store.flush(timeout=5)
+    # Only the latest value per key is written, in one transaction.
+    assert store.batches == 1
+    assert store.rows_written == 12
+    store.close()
+    data = reopen(path, "counts")
+    assert data == {**{str(i): 990 + i for i in range(10)}, "10": "ten", "11": {"nested": [1, 2]}}
+
+
+def test_delete_and_rename(tmp_path):
+    path = str(tmp_path / "state.db")
+    store = StateStore(path)
+    store.update("old", [("a", 1), ("b", 2), ("c", 3)])
+    store.delete("old", "b")
+    store.close()
+
+    store = StateStore(path)
+    assert store.rename("old", "new") == 2
+    assert store.rename("missing", "new") == 0
+    store.close()
+    assert reopen(path, "old") == {}
+    assert reopen(path, "new") == {"a": 1, "c": 3}
+
+
+def test_loaded_namespace_is_handed_over_once(tmp_path):
+    store = StateStore(str(tmp_path / "state.db"))
+    store.set("tickets", 1, 2)
+    assert store.load("tickets") == {}
+    store.close()
+    store = StateStore(str(tmp_path / "state.db"))
+    assert store.load("tickets") == {"1": 2}
+    assert store.load("tickets") == {}
+    store.close()
+
+
+def test_migrate_json(tmp_path):
+    path = str(tmp_path / "state.db")
+    legacy = tmp_path / "open_tickets.json"
+    legacy.write_text(json.dumps({"1": 100, "2": 200}), encoding="utf-8")
+    store = StateStore(path)
+    assert store.migrate_json(str(legacy), "tickets", convert=lambda data: {k: v + 1 for k, v in data.items()}) == 2
+    assert not legacy.exists() and (tmp_path / "open_tickets.json.migrated").exists()
+    assert store.load("tickets") == {"1": 101, "2": 201}
+    # A second start finds nothing to import.
+    assert store.migrate_json(str(legacy), "tickets") == 0
+    store.close()
+    assert reopen(path, "tickets") == {"1": 101, "2": 201}
+
+
+def test_broken_json_file_is_left_alone(tmp_path):
+    legacy = tmp_path / "temp_bans.json"
+    legacy.write_text("{ not json", encoding="utf-8")
+    store = StateStore(str(tmp_path / "state.db"))
+    assert store.migrate_json(str(legacy), "temp_bans") == 0
+    store.close()
+    assert legacy.exists()
+
+
+def test_value_that_is_not_json_fails_in_the_caller(tmp_path):
+    store = StateStore(str(tmp_path / "state.db"))
+    with pytest.raises(TypeError):
+        store.set("bad", "key", object())
+    with pytest.raises(TypeError):
+        store.update("bad", [("key", {1, 2})])
+    store.set("good", "key", 1)
+    assert store.flush(timeout=5)
+    store.close()
+
+
+def test_failed_batch_is_retried(tmp_path):
+    class FlakyStore(StateStore):
+        failures = 1
+
+        def _write(self, connection, batch):
+            if self.failures:
+                self.failures -= 1
+                raise sqlite3.OperationalError("database is locked")
+            super()._write(connection, batch)
+
+    path = str(tmp_path / "state.db")
+    store = FlakyStore(path, flush_interval=0.01)
+    store.set("ns", "key", 1)
+    assert store.flush(timeout=5)
+    store.close()
+    assert reopen(path, "ns") == {"key": 1}
+
+
+def test_flush_does_not_hang_when_the_writer_stops(tmp_path):
+    class UnwritableStore(StateStore):
+        connects = 0
+
+        def _connect(self):
+            self.connects += 1
+            if self.connects > 1:
+                raise sqlite3.OperationalError("unable to open database file")
+            return super()._connect()
+
+    legacy = tmp_path / "activity.json"
+    legacy.write_text(json.dumps({"1": 5}), encoding="utf-8")
+    store = UnwritableStore(str(tmp_path / "state.db"))
+    start = time.perf_counter()
+    store.set("ns", "key", 1)
+    assert not store.flush()
+    # Nothing was saved, so the file stays for the next start.
+    store.migrate_json(str(legacy), "activity")
+    assert legacy.exists()
+    assert time.perf_counter() - start < 5
+    store.close()
+
+
+def test_close_does_not_report_a_failed_batch_as_written(tmp_path):
+    class BrokenStore(StateStore):
+        def _write(self, connection, batch):
+            raise sqlite3.OperationalError("disk I/O error")
+
+    store = BrokenStore(str(tmp_path / "state.db"), flush_interval=60)
+    store.set("ns", "key", 1)
+    store.close()
+    assert store._written_generation == 0
+    assert not store.flush(timeout=1)
+
+
+CHILD = """
+import sys
+import time
+from filar.store import StateStore
+store = StateStore(sys.argv[1], flush_interval=0.01)
+i = store.load("crash").get("a", 0)
+while True:
+    i += 1
+    # One update call, so both keys always land in the same batch.
+    store.update("crash", [("a", i), ("b", i), (f"seq{i % 1000}", i)])
+    if i % 5000 == 0:
+        store.flush()
+        print(i, flush=True)
+    elif i % 50 == 0:
+        # Let the writer thread commit batches between flushes, like an idle event loop would.
+        time.sleep(0.001)
+"""
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGKILL"), reason="needs SIGKILL")
+def test_killed_writer_leaves_a_consistent_database(tmp_path):
+    path = str(tmp_path / "crash.db")
+    rng = random.Random(1234)
+    previous = 0
+    for _ in range(3):
+        child = subprocess.Popen([sys.executable, "-c", CHILD, path], cwd=ROOT, stdout=subprocess.PIPE, text=True)
+        # Kill at a random moment, usually with an unflushed batch in memory.
+        time.sleep(rng.uniform(0.3, 0.8))
+        child.send_signal(signal.SIGKILL)
+        child.wait()
+        lines = child.stdout.read().split()
+        flushed = int(lines[-1]) if lines else 0
+
+        with sqlite3.connect(path) as connection:
+            assert connection.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+        data = reopen(path, "crash")
+        a, b = data.get("a", 0), data.get("b", 0)
+        # No batch was applied halfway, and every flushed write survived.
+        assert a == b
+        assert a >= max(flushed, previous)
+        previous = a
+
+
+def test_migrate_json_tolerates_a_file_moved_by_another_process(tmp_path):
+    legacy = tmp_path / "temp_bans.json"
+    legacy.write_text(json.dumps({"1": 2}), encoding="utf-8")
+
+    def convert(data):
+        # Another worker finishes the same import first.
+        os.replace(legacy, str(legacy) + ".migrated")
+        return data
+
+    store = StateStore(str(tmp_path / "state.db"))
+    assert store.migrate_json(str(legacy), "temp_bans", convert=convert) == 1
+    assert store.load("temp_bans") == {"1": 2}
+    store.close()
@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+from filar.store import StateStore
+from filar.tempbans import TempBanScheduler
+
+
+def stored(path):
+    store = StateStore(path)
+    try:
+        return store.load("temp_bans")
+    finally:
+        store.close()
+
+
+def test_due_unban_is_forgotten_after_it_succeeds(tmp_path):
+    path = str(tmp_path / "state.db")
+
+    async def run():
+        store = StateStore(path)
+        started, release = asyncio.Event(), asyncio.Event()
+        unbanned = []
+
+        async def unban(guild_id, user_id, channel_id):
+            started.set()
+            await release.wait()
+            unbanned.append((guild_id, user_id, channel_id))
+
+        scheduler = TempBanScheduler(store, unban, batch_interval=0)
+        scheduler.schedule(1, 2, time.time() - 1, 3)
+        scheduler.start()
+        await started.wait()
+        # A crash now must not lose the ban.
+        store.flush()
+        assert stored(path) == {"1:2": [scheduler._pending[(1, 2)][0], 3]}
+        release.set()
+        while len(scheduler):
+            await asyncio.sleep(0.001)
+        scheduler._task.cancel()
+        store.close()
+        assert unbanned == [(1, 2, 3)]
+
+    asyncio.run(run())
+    assert stored(path) == {}
+
+
+def test_failed_unban_is_retried(tmp_path):
+    path = str(tmp_path / "state.db")
+
+    async def run():
+        store = StateStore(path)
+        attempts = []
+
+        async def unban(guild_id, user_id, channel_id):
+            attempts.append(time.time())
+            if len(attempts) == 1:
+                raise LookupError("guild 1 is not available")
+
+        scheduler = TempBanScheduler(store, unban, batch_interval=0, retry_delay=0.05)
+        scheduler.schedule(1, 2, time.time() - 1)
+        scheduler.start()
+        while len(attempts) < 2:
+            await asyncio.sleep(0.005)
+        await asyncio.sleep(0.01)
+        assert len(scheduler) == 0
+        scheduler._task.cancel()
+        store.close()
+
+    asyncio.run(run())
+    assert stored(path) == {}
+
+
+def test_ban_renewed_during_unban_is_kept(tmp_path):
+    async def run():
+        store = StateStore(str(tmp_path / "state.db"))
+        scheduler = None
+        later = time.time() + 3600
+
+        async def unban(guild_id, user_id, channel_id):
+            scheduler.schedule(guild_id, user_id, later)
+
+        scheduler = TempBanScheduler(store, unban, batch_interval=0)
+        scheduler.schedule(1, 2, time.time() - 1)
+        scheduler.start()
+        await asyncio.sleep(0.05)
+        assert scheduler._pending == {(1, 2): (later, None)}
+        scheduler._task.cancel()
+        store.close()
+
+    asyncio.run(run())
+
+
+def test_pending_unbans_survive_a_restart(tmp_path):
+    path = str(tmp_path / "state.db")
+    store = StateStore(path)
+
+    async def unban(guild_id, user_id, channel_id):
+        pass
+
+    expires_at = time.time() + 3600
+    TempBanScheduler(store, unban).schedule(1, 2, expires_at, 3)
+    store.close()
+    store = StateStore(path)
+    restarted = TempBanScheduler(store, unban, owns=lambda guild_id: guild_id == 1)
+    other = TempBanScheduler(store, unban, owns=lambda guild_id: guild_id != 1)
+    store.close()
+    assert restarted._pending == {(1, 2): (expires_at, 3)}
+    assert len(other) == 0
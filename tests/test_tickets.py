@@ -0,0 +1,98 @@
+import asyncio
+import contextlib
+import io
+
+import pytest
+
+pytest.importorskip("discord")
+
+from benchmarks.simulator import FakeInteraction, Simulation
+
+
+async def fill(pool):
+    pool.interval = 0
+    pool.refill()
+    while pool._filling:
+        await asyncio.sleep(0.001)
+
+
+def click(sim, name):
+    interaction = FakeInteraction(sim.rest, sim.guild.add_member(name), sim.guild)
+    replies = []
+
+    async def follow_up(content=None, **kwargs):
+        replies.append(content)
+
+    interaction.followup.send = follow_up
+    sim.gateway.click(sim.module.TicketButton().create_ticket, interaction)
+    return interaction.user, replies
+
+
+def run(tmp_path, test, **overrides):
+    async def main():
+        sim = Simulation(str(tmp_path), **overrides)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                await test(sim, sim.module.guilds.get(sim.guild.id))
+                await sim.settle()
+            assert sim.gateway.errors == 0
+        finally:
+            sim.close()
+
+    asyncio.run(main())
+
+
+def test_ticket_from_pool(tmp_path):
+    async def test(sim, guild_state):
+        await fill(guild_state.ticket_pool)
+        spare = guild_state.ticket_pool._spares[0]
+        user, replies = click(sim, "customer")
+        await sim.settle()
+        assert guild_state.tickets.owner_of(spare.id) == user.id
+        assert replies and spare.mention in replies[0]
+        assert sim.rest.calls["interaction_response"] == 1
+
+    run(tmp_path, test, ticket_pool_size=1)
+
+
+def test_failed_claim_falls_back_to_a_new_channel(tmp_path):
+    async def test(sim, guild_state):
+        await fill(guild_state.ticket_pool)
+        spare = guild_state.ticket_pool._spares[0]
+
+        async def broken_edit(**kwargs):
+            raise RuntimeError("edit failed")
+
+        spare.edit = broken_edit
+        user, replies = click(sim, "customer")
+        await sim.settle()
+        channel_id = guild_state.tickets.channel_for(user.id)
+        assert channel_id is not None and channel_id != spare.id
+        assert sim.guild.get_channel(spare.id) is None
+        assert replies and f"<#{channel_id}>" in replies[0]
+
+    run(tmp_path, test, ticket_pool_size=1)
+
+
+def test_failed_creation_is_reported(tmp_path):
+    async def test(sim, guild_state):
+        async def broken_create(**kwargs):
+            raise RuntimeError("create failed")
+
+        sim.guild.create_text_channel = broken_create
+        user, replies = click(sim, "customer")
+        await sim.settle()
+        assert guild_state.tickets.channel_for(user.id) is None
+        assert len(replies) == 1 and "create failed" in replies[0]
+
+    run(tmp_path, test)
+
+
+def test_refill_is_not_shed(tmp_path):
+    async def test(sim, guild_state):
+        # Every cosmetic call is dropped; spare channels must still be created.
+        sim.module.outbound.shed_backlog = 0
+        await fill(guild_state.ticket_pool)
+        assert len(guild_state.ticket_pool) == 3
+
+    run(tmp_path, test, ticket_pool_size=3)
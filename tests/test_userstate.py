@@ -0,0 +1,101 @@
+import random
+
+import pytest
+
+from filar.activity import NEVER, ActivityIndex, today
+from filar.store import StateStore
+from filar.userstate import CompactIdMap
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_compact_id_map_matches_dict(seed):
+    rng = random.Random(seed)
+    # Small merge thresholds, so merges happen between almost every operation.
+    ids = CompactIdMap("I", merge_ratio=rng.choice((2, 100)), min_merge=rng.choice((1, 2, 4)))
+    expected = {}
+    keys = [rng.randrange(1, 2 ** 63) for _ in range(200)]
+    for _ in range(5000):
+        key = rng.choice(keys)
+        op = rng.random()
+        if op < 0.4:
+            value = rng.randrange(2 ** 32)
+            ids[key] = value
+            expected[key] = value
+        elif op < 0.5:
+            items = [(rng.choice(keys), rng.randrange(2 ** 32)) for _ in range(rng.randrange(1, 10))]
+            ids.update(items)
+            expected.update(items)
+        elif op < 0.8:
+            assert ids.pop(key, None) == expected.pop(key, None)
+        elif op < 0.85:
+            if key in expected:
+                del ids[key]
+                del expected[key]
+            else:
+                with pytest.raises(KeyError):
+                    del ids[key]
+        elif op < 0.9:
+            ids.compact()
+        else:
+            assert ids.get(key) == expected.get(key)
+            assert (key in ids) == (key in expected)
+        assert len(ids) == len(expected)
+    assert dict(ids.items()) == expected
+    assert sorted(ids) == sorted(expected)
+
+
+def test_compact_id_map_pop_across_merge():
+    ids = CompactIdMap("I", merge_ratio=100, min_merge=1)
+    ids.update((key, key * 10) for key in range(1, 6))
+    ids.pop(1)
+    # This pop triggers a merge, which shifts every later entry down by one.
+    assert ids.pop(3) == 30
+    assert dict(ids.items()) == {2: 20, 4: 40, 5: 50}
+
+
+def check_counts(index, expected):
+    assert len(index) == len(expected)
+    for days in (0, 1, 7, 30):
+        cutoff = today() - days
+        assert index.active_count(days) == sum(1 for day in expected.values() if day >= cutoff)
+        assert index.inactive_count(days) == len(expected) - index.active_count(days)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_activity_index_matches_dict(tmp_path, seed):
+    rng = random.Random(seed)
+    store = StateStore(str(tmp_path / "state.db"))
+    index = ActivityIndex(store)
+    index._day_of.min_merge = 4
+    expected = {}
+    members = list(range(1, 300))
+    for _ in range(2000):
+        member_id = rng.choice(members)
+        op = rng.random()
+        if op < 0.4:
+            day = today() - rng.randrange(60)
+            index.touch(member_id, day)
+            expected[member_id] = day
+        elif op < 0.6:
+            index.add(member_id)
+            expected.setdefault(member_id, NEVER)
+        elif op < 0.9:
+            index.remove(member_id)
+            expected.pop(member_id, None)
+        else:
+            current = rng.sample(members, rng.randrange(len(members)))
+            added, removed = index.sync(current)
+            assert added == len(set(current) - expected.keys())
+            assert removed == len(expected.keys() - set(current))
+            expected = {member_id: expected.get(member_id, NEVER) for member_id in current}
+        check_counts(index, expected)
+    for member_id in members:
+        day = expected.get(member_id)
+        assert index.last_active_day(member_id) == (None if day in (None, NEVER) else day)
+
+    store.close()
+    store = StateStore(str(tmp_path / "state.db"))
+    reloaded = ActivityIndex(store)
+    store.close()
+    assert dict(reloaded._day_of.items()) == expected
+    check_counts(reloaded, expected)
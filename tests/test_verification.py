@@ -0,0 +1,92 @@
+import asyncio
+import contextlib
+import io
+from types import SimpleNamespace
+
+import pytest
+
+from filar.verification import VerificationManager
+
+
+def dm(user_id, content="2"):
+    return SimpleNamespace(author=SimpleNamespace(id=user_id), content=content)
+
+
+def test_answers_go_to_challenges_in_order():
+    async def run():
+        manager = VerificationManager(timeout=5)
+        first = asyncio.create_task(manager.wait_for_answer(1, 42))
+        second = asyncio.create_task(manager.wait_for_answer(2, 42))
+        await asyncio.sleep(0)
+        assert len(manager) == 2
+        assert manager.dispatch(dm(42, "first"))
+        assert (await first).content == "first"
+        assert not second.done()
+        assert manager.dispatch(dm(42, "second"))
+        assert (await second).content == "second"
+        assert len(manager) == 0 and 42 not in manager
+        assert not manager.dispatch(dm(42))
+
+    asyncio.run(run())
+
+
+def test_rejoin_replaces_challenge_of_the_same_guild_only():
+    async def run():
+        manager = VerificationManager(timeout=5)
+        old = asyncio.create_task(manager.wait_for_answer(1, 42))
+        other = asyncio.create_task(manager.wait_for_answer(2, 42))
+        await asyncio.sleep(0)
+        new = asyncio.create_task(manager.wait_for_answer(1, 42))
+        await asyncio.sleep(0)
+        assert await old is None
+        assert not other.done()
+        assert len(manager) == 2
+        manager.dispatch(dm(42, "for guild 2"))
+        manager.dispatch(dm(42, "for guild 1"))
+        assert (await other).content == "for guild 2"
+        assert (await new).content == "for guild 1"
+
+    asyncio.run(run())
+
+
+def test_timeouts_are_per_challenge():
+    async def run():
+        manager = VerificationManager(timeout=5)
+        short = asyncio.create_task(manager.wait_for_answer(1, 42, timeout=0.01))
+        long = asyncio.create_task(manager.wait_for_answer(2, 42, timeout=1))
+        with pytest.raises(asyncio.TimeoutError):
+            await short
+        assert manager.dispatch(dm(42))
+        assert (await long).content == "2"
+        assert len(manager) == 0
+
+    asyncio.run(run())
+
+
+def test_member_joining_two_guilds_is_verified_in_both(tmp_path):
+    pytest.importorskip("discord")
+    from benchmarks.simulator import Simulation
+
+    async def run():
+        sim = Simulation(str(tmp_path), guilds=2)
+        try:
+            sim.module.generate_math_question = lambda text: ("1 + 1", 2)
+            user_id = 4242
+            members = [guild.add_member("newbie", id=user_id) for guild in sim.guilds]
+            with contextlib.redirect_stdout(io.StringIO()):
+                for member in members:
+                    sim.gateway.dispatch("member_join", member)
+                await asyncio.sleep(0.05)
+                for member in members:
+                    sim.gateway.dispatch("message", sim.dm(member, "2"))
+                await sim.settle()
+            assert sim.gateway.errors == 0
+            assert sim.rest.calls["kick"] == 0
+            assert user_id in sim.module.verified_members
+            for guild in sim.guilds:
+                assert sim.module.guilds.get(guild.id).stats["passed_verification"] == 1
+            assert len(sim.module.verification_sessions) == 0
+        finally:
+            sim.close()
+
+    asyncio.run(run())